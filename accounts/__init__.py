@@ -0,0 +1 @@
+from .host import AccountHost
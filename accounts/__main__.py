@@ -0,0 +1,89 @@
+"""
+    run the multi-account mode:
+
+        # trade the accounts of config.accounts.
+        python -m accounts --config config.json
+
+        # trade 5 accounts on the SimulatedExchange of 50 symbols through its local http server for 30 seconds, then
+        # print the requests of every endpoint, the market data requests are the same for any number of accounts.
+        python -m accounts --simulated 50 --accounts 5 --seconds 30 --scan-interval 10
+"""
+
+import time
+import argparse
+from threading import Thread
+
+from utils.config import config
+from utils.metrics import metrics
+from utils.utility import get_file_path
+from accounts.host import AccountHost
+from sharding.worker import shard_file
+
+MARKET_ENDPOINTS = ('exchangeInfo', 'klines', 'bookTicker')
+
+
+def run_simulated(args):
+    from simulator import SimulatedExchange
+    from simulator.http_server import ExchangeHttpServer
+
+    config.turnover_threshold = 0
+    config.pump_pct = config.pump_pct_4h = -1  # every symbol is a signal.
+    config.platform = 'binance_future' if args.market == 'future' else 'binance_spot'
+    exchange = SimulatedExchange(symbol_count=args.simulated, bars=100, market=args.market, match_orders=True,
+                                 volatility=args.volatility)
+    server = ExchangeHttpServer(exchange)
+    server.start()
+    metrics.enable()  # count the requests of every endpoint.
+
+    running = True
+
+    def move_prices():
+        while running:
+            time.sleep(0.1)
+            exchange.advance(1)
+
+    Thread(target=move_prices, daemon=True).start()
+    accounts = [{'name': f"simulated{index}", 'api_key': f"key{index}", 'api_secret': 'simulated'} for index in
+                range(args.accounts)]
+    positions_file = f"simulated_{args.market}_positions.json"  # don't touch the positions of the real bot.
+    host = AccountHost(accounts, host=server.url, scan_interval=args.scan_interval, positions_file=positions_file)
+    try:
+        host.run(args.seconds)
+    finally:
+        running = False
+        server.stop()
+
+    print(f"{'account':>12} {'positions':>10} {'total_profit':>13}")
+    for name, trader in host.traders.items():
+        print(f"{name:>12} {len(trader.positions.positions):>10} {trader.positions.total_profit:>13.4f}")
+
+    print(f"{host.cycles} loops, requests of every endpoint:")
+    for (name, labels), histogram in sorted(metrics.histograms.items()):
+        if name == 'request_seconds':
+            endpoint = dict(labels)['endpoint']
+            kind = 'market' if any(item in endpoint for item in MARKET_ENDPOINTS) else 'account'
+            print(f"{kind:>8} {endpoint:<40} {histogram.count:>7}")
+
+    if not args.keep:
+        get_file_path(positions_file).unlink(missing_ok=True)
+        for account in accounts:
+            get_file_path(shard_file(positions_file, account['name'])).unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m accounts')
+    parser.add_argument('--config', default='', help='the config json file.')
+    parser.add_argument('--seconds', type=float, default=0, help='stop after the seconds, 0 means forever.')
+    parser.add_argument('--scan-interval', type=float, default=0, help='the seconds between the scans, 0 is hourly.')
+    parser.add_argument('--simulated', type=int, default=0, help='trade the SimulatedExchange of the symbols.')
+    parser.add_argument('--accounts', type=int, default=3, help='the simulated accounts.')
+    parser.add_argument('--market', choices=['future', 'spot'], default='future')
+    parser.add_argument('--volatility', type=float, default=0.05)
+    parser.add_argument('--keep', action='store_true', help='keep the positions files of the simulated run.')
+    args = parser.parse_args()
+
+    config.loads(args.config or None)
+    if args.simulated:
+        run_simulated(args)
+    else:
+        AccountHost(config.accounts, scan_interval=args.scan_interval).run(args.seconds or None)
@@ -0,0 +1,175 @@
+"""
+    Trade several accounts in one process with one market data pipeline.
+
+    the market trader requests the exchangeInfo, scans the klines and refreshes the bookTickers once for all the
+    accounts, so the market data request weight doesn't grow with the accounts. Every account is a trader with its
+    own credentials, positions file (like future_positions_sub1.json), trade store and orders, sharing the
+    symbols_dict, the tickers_dict, signal_data and the loop scheduler of the host.
+
+        host = AccountHost([{'name': 'sub1', 'api_key': '...', 'api_secret': '...'}, ...])
+        host.run()
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config import config
+from utils.market_bus import market_bus
+from utils.tracing import tracer
+from gateway.decoders import remove_stale_tickers
+from sharding.worker import shard_file, positions_file_name, create_trader
+
+
+class AccountHost(object):
+
+    def __init__(self, accounts: list, host: str = None, scan_interval: float = 0, positions_file: str = None):
+        """
+        :param accounts: [{'name': 'sub1', 'api_key': '', 'api_secret': ''}], like config.accounts.
+        :param host: the rest host of all the traders instead of the exchange's, like the ExchangeHttpServer's url.
+        :param scan_interval: the seconds between the scans, 0 means every hour like main.py.
+        :param positions_file: the positions file of the single account mode, the accounts add their names to it.
+        """
+        names = [account.get('name') for account in accounts]
+        if not all(names) or len(set(names)) != len(names):
+            raise ValueError(f"每个账户需要不同的name: {names}")
+
+        self.accounts = accounts
+        self.host = host
+        self.scan_interval = scan_interval
+        self.positions_file = positions_file or positions_file_name()
+        self.market = None  # requests the market data, never trades.
+        self.traders = {}  # {name: trader}
+        self.ticker_stream = None
+        self.executor = None
+        self.scheduler = None
+        self.cycles = 0
+
+    def create_market(self):
+        market = create_trader(positions_file=None, trade_store_file='')  # no positions file and no trade store.
+        if self.host:
+            market.http_client.host = self.host
+        market.keep_symbols = self.get_held_symbols  # the market trader never trades, keep what the accounts hold.
+        market.get_exchange_info()
+        return market
+
+    def create_account(self, account: dict):
+        name = account['name']
+        trade_store_file = shard_file(config.trade_store_file, name) if config.trade_store_file else ''
+        trader = create_trader(shard_file(self.positions_file, name), trade_store_file=trade_store_file,
+                               api_key=account.get('api_key'), api_secret=account.get('api_secret'))
+        if self.host:
+            trader.http_client.host = self.host
+
+        # the market data of the host.
+        trader.symbols_dict = self.market.symbols_dict
+        trader.tickers_dict = self.market.tickers_dict
+        trader.shared_tickers = True
+        trader.account_name = name
+        trader.scheduler = self.market.scheduler
+        if config.user_data_stream:
+            trader.start_user_stream()
+        return trader
+
+    def start(self):
+        tracer.accounts = [account['name'] for account in self.accounts]  # a trace of every signal for every account.
+        self.market = self.create_market()
+        if config.market_bus:
+            market_bus.create(config.market_bus, list(self.market.symbols_dict.keys()))
+        for account in self.accounts:
+            self.traders[account['name']] = self.create_account(account)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.traders), thread_name_prefix='account')
+
+        if config.ticker_stream:
+            from gateway.binance_stream import TickerStream
+
+            self.ticker_stream = TickerStream(self.market.http_client, self.market.tickers_dict,
+                                              on_ticker=self.market.scheduler.on_ticker)
+            self.ticker_stream.subscribe(self.get_ticker_symbols())
+            self.ticker_stream.start()
+
+        from main import get_data
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        self.scheduler = BackgroundScheduler()
+        if self.scan_interval:
+            self.scheduler.add_job(get_data, trigger='interval', seconds=self.scan_interval, args=(self.market,))
+        else:
+            self.scheduler.add_job(get_data, trigger='cron', hour='*/1', args=(self.market,))
+        self.scheduler.start()
+        get_data(self.market)
+
+    def get_ticker_symbols(self):
+        symbols = set()
+        for trader in self.traders.values():
+            symbols.update(trader.get_ticker_symbols())
+        return symbols
+
+    def get_held_symbols(self):
+        symbols = set()
+        for trader in list(self.traders.values()):
+            symbols.update(trader.get_held_symbols())
+        return symbols
+
+    def refresh_tickers(self):
+        """
+        the tickers of all the accounts, from the ticker stream or one request.
+        """
+        if self.ticker_stream:
+            symbols = self.get_ticker_symbols()
+            missing_symbols = self.ticker_stream.subscribe(symbols)
+            if len(symbols) == 0 or (self.ticker_stream.is_alive() and len(missing_symbols) == 0):
+                remove_stale_tickers(self.market.tickers_dict, symbols)
+                market_bus.publish_tickers(self.market.tickers_dict)
+                return
+        self.market.get_all_tickers()
+        market_bus.publish_tickers(self.market.tickers_dict)
+
+    def run_account(self, name: str):
+        """
+        one loop of the account, the error of an account doesn't stop the others.
+        """
+        trader = self.traders[name]
+        try:
+            trader.start()
+            return trader.get_watch_prices()
+        except Exception as error:
+            print(f"{name} 账户的交易循环出错: {error}")
+            logging.exception(f"{name} trading loop error")
+            return {}
+
+    def run_once(self):
+        self.refresh_tickers()
+        for trader in self.traders.values():
+            trader.symbols_dict = self.market.symbols_dict  # the refresh of the exchangeInfo swaps the dict.
+        symbol_levels = {}
+        for levels in self.executor.map(self.run_account, list(self.traders.keys())):
+            for symbol, prices in levels.items():
+                symbol_levels.setdefault(symbol, []).extend(prices)
+        self.market.scheduler.watch(symbol_levels, self.market.tickers_dict)
+        self.cycles += 1
+
+    def run(self, seconds: float = None):
+        """
+        run the loops of all the accounts, until the seconds pass or forever.
+        """
+        self.start()
+        end_time = time.time() + seconds if seconds else None
+        try:
+            while end_time is None or time.time() < end_time:
+                self.market.scheduler.wait()
+                self.run_once()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.scheduler:
+            self.scheduler.shutdown(wait=False)
+        if self.ticker_stream:
+            self.ticker_stream.stop()
+        if self.executor:
+            self.executor.shutdown()
+        for trader in self.traders.values():
+            if trader.user_stream:
+                trader.user_stream.stop()
+            trader.positions.save_data()
@@ -0,0 +1,3 @@
+from .engine import Backtest, BacktestResult
+from .data import load_klines, save_klines, download_klines, simulated_klines
+from .sweep import Sweep
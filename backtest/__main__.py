@@ -0,0 +1,128 @@
+"""
+    the command line of the backtest:
+
+        # download the 1h klines of the USDT symbols (or --symbols BTCUSDT ETHUSDT) into the data folder.
+        python -m backtest download --config config.json --start 2023-01-01 --end 2024-01-01 --data backtest_data
+
+        # replay the klines with the strategy of the config, save the equity curve, the trades and the summary.
+        python -m backtest run --config config.json --data backtest_data --output backtest_result
+
+        # replay the random walk klines of 300 symbols for a year.
+        python -m backtest run --simulated 300 --bars 8760
+
+        # sweep the grid of pump_pct and the random exit_profit_pct on all the cores, sorted by the return.
+        python -m backtest sweep --data backtest_data --param pump_pct=0.02,0.03,0.05 \
+            --param exit_profit_pct=0.005:0.03 --samples 20 --output sweep_result --sort return_pct
+"""
+
+import time
+import argparse
+from datetime import datetime, timezone
+
+from utils.config import config
+from backtest.data import download_klines, save_klines, load_klines, simulated_klines
+from backtest.engine import Backtest
+from backtest.sweep import Sweep, parse_param
+
+
+def parse_time(value: str):
+    return int(datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def download(args):
+    if config.platform == 'binance_future':
+        from gateway import BinanceFutureHttp
+        http_client = BinanceFutureHttp(proxy_host=config.proxy_host, proxy_port=config.proxy_port)
+        get_exchange_info = http_client.exchangeInfo
+    else:
+        from gateway import BinanceSpotHttp
+        http_client = BinanceSpotHttp(proxy_host=config.proxy_host, proxy_port=config.proxy_port)
+        get_exchange_info = http_client.get_exchange_info
+
+    symbols = args.symbols
+    if not symbols:
+        data = get_exchange_info()
+        symbols = [item['symbol'] for item in data.get('symbols', []) if
+                   item.get('quoteAsset') == 'USDT' and item.get('status') == 'TRADING'] if data else []
+
+    start_time, end_time = parse_time(args.start), parse_time(args.end)
+    for index, symbol in enumerate(symbols):
+        klines = download_klines(http_client, symbol, start_time, end_time)
+        save_klines(args.data, symbol, klines)
+        print(f"{index + 1}/{len(symbols)} {symbol}: {len(klines)} klines")
+
+
+def load(args):
+    start = time.perf_counter()
+    if args.simulated:
+        times, symbols, data = simulated_klines(args.simulated, args.bars, seed=args.seed)
+    else:
+        times, symbols, data = load_klines(args.data, args.symbols or None)
+    print(f"loaded {len(symbols)} symbols x {len(times)} bars in {time.perf_counter() - start:.2f}s")
+    return times, symbols, data
+
+
+def run(args):
+    times, symbols, data = load(args)
+    start = time.perf_counter()
+    result = Backtest(times, symbols, data, initial_capital=args.capital, min_notional=args.min_notional).run()
+    print(f"replayed in {time.perf_counter() - start:.2f}s")
+
+    for key, value in result.summary().items():
+        print(f"{key:>20}: {value:.4f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+    if args.output:
+        result.save(args.output)
+        print(f"saved the equity curve and the trades into {args.output}")
+
+
+def sweep(args):
+    grid, ranges = {}, {}
+    for text in args.param:
+        name, values, low_high = parse_param(text)
+        if values is not None:
+            grid[name] = values
+        else:
+            ranges[name] = low_high
+
+    times, symbols, data = load(args)
+    start = time.perf_counter()
+    table = Sweep(times, symbols, data, args.output or 'sweep_result', initial_capital=args.capital,
+                  min_notional=args.min_notional).run(grid, ranges, samples=args.samples, seed=args.seed,
+                                                      workers=args.workers, sort=args.sort)
+    print(f"swept in {time.perf_counter() - start:.2f}s")
+
+    columns = [column for column in list(grid) + list(ranges) + ['return_pct', 'max_drawdown_pct', 'trades',
+                                                                  'win_rate', 'profit_factor'] if column in table]
+    print(table[columns].head(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m backtest')
+    parser.add_argument('command', choices=['run', 'download', 'sweep'])
+    parser.add_argument('--config', default='', help='the config json file of the strategy.')
+    parser.add_argument('--data', default='backtest_data', help='the folder of the klines.')
+    parser.add_argument('--symbols', nargs='*', default=[])
+    parser.add_argument('--start', default='2023-01-01', help='the download start date, UTC.')
+    parser.add_argument('--end', default='2024-01-01', help='the download end date, UTC.')
+    parser.add_argument('--simulated', type=int, default=0, help='replay the random walk klines of the symbols.')
+    parser.add_argument('--bars', type=int, default=8760)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--capital', type=float, default=10000)
+    parser.add_argument('--min-notional', type=float, default=5)
+    parser.add_argument('--output', default='', help='the folder of equity.csv, trades.csv and summary.json.')
+    parser.add_argument('--param', action='append', default=[],
+                        help='the sweep field: name=v1,v2,v3 for a grid, name=low:high for a random range.')
+    parser.add_argument('--samples', type=int, default=1, help='the random draws for every grid combination.')
+    parser.add_argument('--workers', type=int, default=0, help='the sweep processes, default is the cpu count.')
+    parser.add_argument('--sort', default='return_pct')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    config.loads(args.config or None)
+    if args.command == 'download':
+        download(args)
+    elif args.command == 'sweep':
+        sweep(args)
+    else:
+        run(args)
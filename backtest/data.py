@@ -0,0 +1,117 @@
+"""
+    The klines of the backtest: downloaded from the exchange into .npy files, or generated with a random walk.
+
+    every symbol is saved as a float64 array of the 7 fields of utils.signals (open_time, open, high, low, close,
+    volume, turnover), load_klines aligns the symbols to a common hourly grid, the bars a symbol doesn't have (before
+    it's listed or after it's delisted) are nan.
+
+        klines = download_klines(BinanceFutureHttp(), 'BTCUSDT', start_time, end_time)
+        save_klines('backtest_data', 'BTCUSDT', klines)
+        times, symbols, data = load_klines('backtest_data')
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from gateway.binance_future import Interval
+from gateway.decoders import decode_klines
+from utils.signals import KLINE_COLUMNS, OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, TURNOVER, HOUR_MS
+
+FILE_SUFFIX = '_1h.npy'
+
+
+def download_klines(http_client, symbol: str, start_time: int, end_time: int, limit: int = 1000):
+    """
+    download the 1h klines between start_time and end_time (ms), page by page from the start_time.
+    :param http_client: BinanceFutureHttp or BinanceSpotHttp.
+    :return: a float64 array of shape (klines, 7).
+    """
+    pages = []
+    while start_time < end_time:
+        klines = http_client.get_kline(symbol=symbol, interval=Interval.HOUR_1, start_time=start_time,
+                                       end_time=end_time, limit=limit)
+        if not isinstance(klines, list) or len(klines) == 0:
+            break
+
+        pages.append(decode_klines(klines)[:, KLINE_COLUMNS])
+        next_time = int(klines[-1][0]) + HOUR_MS
+        if next_time <= start_time or len(klines) < limit:
+            break
+        start_time = next_time
+
+    if not pages:
+        return np.empty((0, len(KLINE_COLUMNS)), dtype=np.float64)
+    klines = np.concatenate(pages)
+    # the last kline may not be closed yet.
+    return klines[klines[:, OPEN_TIME] + HOUR_MS <= end_time]
+
+
+def save_klines(folder, symbol: str, klines: np.ndarray):
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    np.save(folder.joinpath(symbol + FILE_SUFFIX), klines)
+
+
+def load_klines(folder, symbols: list = None):
+    """
+    :param symbols: the symbols to load, default is all the files in the folder.
+    :return: (times, symbols, data), data is an array of shape (len(symbols), len(times), 7) on the hourly grid.
+    """
+    folder = Path(folder)
+    if symbols is None:
+        symbols = sorted(path.name[:-len(FILE_SUFFIX)] for path in folder.glob('*' + FILE_SUFFIX))
+
+    symbol_klines = []
+    for symbol in symbols:
+        path = folder.joinpath(symbol + FILE_SUFFIX)
+        if path.exists():
+            symbol_klines.append((symbol, np.load(path)))
+        else:
+            print(f"没有{symbol}的K线数据: {path}")
+    return align_klines(symbol_klines)
+
+
+def align_klines(symbol_klines: list):
+    """
+    :param symbol_klines: [(symbol, klines), ...], the klines are arrays of the 7 fields, the empty ones are skipped.
+    :return: (times, symbols, data)
+    """
+    symbol_klines = [(symbol, klines) for symbol, klines in symbol_klines if len(klines) > 0]
+    if not symbol_klines:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0, len(KLINE_COLUMNS)), dtype=np.float64)
+
+    first = min(int(klines[0, OPEN_TIME]) for _, klines in symbol_klines)
+    last = max(int(klines[-1, OPEN_TIME]) for _, klines in symbol_klines)
+    times = np.arange(first, last + HOUR_MS, HOUR_MS, dtype=np.int64)
+
+    data = np.full((len(symbol_klines), len(times), len(KLINE_COLUMNS)), np.nan, dtype=np.float64)
+    for i, (_, klines) in enumerate(symbol_klines):
+        index = (klines[:, OPEN_TIME].astype(np.int64) - first) // HOUR_MS
+        data[i, index] = klines
+    return times, [symbol for symbol, _ in symbol_klines], data
+
+
+def simulated_klines(symbol_count: int, bars: int, seed: int = 0, start_time: int = 1672531200000,
+                     volatility: float = 0.015):
+    """
+    the random walk klines of the symbols, with the fat tails of the hourly returns so there are pumps and dumps.
+    :return: (times, symbols, data) like load_klines.
+    """
+    rand = np.random.default_rng(seed)
+    times = start_time + np.arange(bars, dtype=np.int64) * HOUR_MS
+
+    returns = rand.standard_t(3, size=(symbol_count, bars)) * volatility / np.sqrt(3)
+    closes = 10 ** rand.uniform(-3, 4, size=(symbol_count, 1)) * np.exp(np.cumsum(returns, axis=1))
+    opens = np.concatenate([closes[:, :1] / np.exp(returns[:, :1]), closes[:, :-1]], axis=1)
+    wicks = np.abs(rand.normal(0, volatility / 2, size=(2, symbol_count, bars)))
+
+    data = np.empty((symbol_count, bars, len(KLINE_COLUMNS)), dtype=np.float64)
+    data[:, :, OPEN_TIME] = times
+    data[:, :, OPEN] = opens
+    data[:, :, HIGH] = np.maximum(opens, closes) * (1 + wicks[0])
+    data[:, :, LOW] = np.minimum(opens, closes) * (1 - wicks[1])
+    data[:, :, CLOSE] = closes
+    data[:, :, TURNOVER] = 10 ** rand.uniform(4, 7, size=(symbol_count, 1)) * (1 + np.abs(returns) * 20)
+    data[:, :, VOLUME] = data[:, :, TURNOVER] / closes
+    return times, [f"SIM{i}USDT" for i in range(symbol_count)], data
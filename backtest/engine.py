@@ -0,0 +1,254 @@
+"""
+    Replay the historical 1h klines through the traders' rules.
+
+    the signals are calculated with utils.signals.signal_arrays like main.get_data, the entries, the increases and the
+    exits are decided by utils.strategy like BinanceFutureTrader.start and BinanceSpotTrader.start, with the config:
+
+    1. the signals of a bar are calculated when the bar is closed, the entries are placed at the open of the next bar.
+    2. a bar is replayed as 4 prices: open -> low -> high -> close if the bar goes up, else open -> high -> low ->
+    close, the positions are checked at every price like the traders' loop.
+    3. the orders are filled at once at their limit price like the traders record them: the buy at price * (1 +
+    taker_price_pct), the sell at price * (1 - taker_price_pct), the fee of both sides is charged when selling.
+    the klines have no bid and ask, so both sides use the kline price: the traders price the exits from the ask, here
+    they are priced from the bid side, lower by the spread, which is small for the liquid USDT symbols.
+    4. a position worth less than min_notional is dropped like the traders do, no profit is booked. It's kept in the
+    trades with the reason 'dust', but it's not counted in the trade stats of the summary.
+
+        backtest = Backtest(times, symbols, data)
+        result = backtest.run()
+        print(result.summary())
+        result.save('backtest_result')
+"""
+
+import json
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from utils.config import config
+from utils.signals import signal_arrays, OPEN, HIGH, LOW, CLOSE
+from utils.strategy import select_entries, position_action, increase_value, new_position, apply_trade, \
+    EXIT, STOP_LOSS, INCREASE
+
+DUST = 'dust'  # the position is dropped like the traders do, without profit.
+OPEN_POSITION = 'open'  # the positions are still open at the end of the data, marked at the last close.
+
+
+class BacktestResult(object):
+
+    def __init__(self, times: np.ndarray, equity: np.ndarray, exposure: np.ndarray, positions: np.ndarray,
+                 trades: list, initial_capital: float):
+        """
+        :param times: the open time (ms) of every bar.
+        :param equity: the capital plus the realized and unrealized profit at the close of every bar.
+        :param exposure: the value of the positions at the average price at the close of every bar.
+        :param positions: the open positions count at the close of every bar.
+        :param trades: the closed positions, see Backtest.close_trade.
+        """
+        self.times = times
+        self.equity = equity
+        self.exposure = exposure
+        self.positions = positions
+        self.trades = trades
+        self.initial_capital = initial_capital
+
+    @property
+    def drawdown(self):
+        """
+        the drawdown pct of the equity from its peak, 0 or negative.
+        """
+        if len(self.equity) == 0:
+            return self.equity
+        return self.equity / np.maximum.accumulate(self.equity) - 1
+
+    def summary(self):
+        trades = [trade for trade in self.trades if trade['reason'] not in (OPEN_POSITION, DUST)]
+        pnl = np.array([trade['pnl'] for trade in trades], dtype=np.float64)
+        wins, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+        final_equity = float(self.equity[-1]) if len(self.equity) else self.initial_capital
+        drawdown = self.drawdown
+
+        return {
+            'start': format_time(self.times[0]) if len(self.times) else '',
+            'end': format_time(self.times[-1]) if len(self.times) else '',
+            'bars': len(self.times),
+            'initial_capital': self.initial_capital,
+            'final_equity': final_equity,
+            'total_pnl': final_equity - self.initial_capital,
+            'return_pct': final_equity / self.initial_capital - 1,
+            'max_drawdown_pct': float(drawdown.min()) if len(drawdown) else 0.0,
+            'trades': len(trades),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'avg_pnl': float(pnl.mean()) if len(pnl) else 0.0,
+            'profit_factor': float(wins / losses) if losses > 0 else float('inf') if wins > 0 else 0.0,
+            'stop_losses': sum(1 for trade in trades if trade['reason'] == STOP_LOSS),
+            'dust': sum(1 for trade in self.trades if trade['reason'] == DUST),
+            'open_positions': sum(1 for trade in self.trades if trade['reason'] == OPEN_POSITION),
+            'avg_holding_hours': float(np.mean([trade['holding_hours'] for trade in trades])) if trades else 0.0,
+            'max_holding_hours': max([trade['holding_hours'] for trade in trades], default=0),
+            'max_increase_count': max([trade['entries'] for trade in self.trades], default=0),
+            'max_positions': int(self.positions.max()) if len(self.positions) else 0,
+            'max_exposure': float(self.exposure.max()) if len(self.exposure) else 0.0
+        }
+
+    def save(self, folder):
+        """
+        save equity.csv, trades.csv and summary.json into the folder.
+        """
+        import pandas as pd
+
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({'time': [format_time(t) for t in self.times], 'equity': self.equity,
+                      'drawdown': self.drawdown, 'exposure': self.exposure, 'positions': self.positions}
+                     ).to_csv(folder.joinpath('equity.csv'), index=False)
+
+        trades = pd.DataFrame(self.trades, columns=['symbol', 'entry_time', 'exit_time', 'holding_hours', 'entries',
+                                                    'invested', 'pnl', 'return_pct', 'reason'])
+        trades['entry_time'] = trades['entry_time'].map(format_time)
+        trades['exit_time'] = trades['exit_time'].map(format_time)
+        trades.to_csv(folder.joinpath('trades.csv'), index=False)
+
+        with open(folder.joinpath('summary.json'), 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+class Backtest(object):
+
+    def __init__(self, times: np.ndarray, symbols: list, data: np.ndarray, initial_capital: float = 10000,
+                 min_notional: float = 5, rule_hours: int = 4):
+        """
+        :param times: the open time (ms) of the bars.
+        :param symbols: the symbols of the data rows.
+        :param data: the klines of shape (len(symbols), len(times), 7) from backtest.data, nan for the missing bars.
+        :param initial_capital: the start of the equity curve, the orders are not limited by it.
+        :param min_notional: the positions worth less than it are dropped, like the symbol's min_notional.
+        """
+        self.times = times
+        self.symbols = symbols
+        self.data = data
+        self.initial_capital = initial_capital
+        self.min_notional = min_notional
+        self.rule_hours = rule_hours
+
+        self.symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.positions = {}
+        self.marks = {}  # the last price of the positions.
+        self.open_trades = {}
+        self.trades = []
+        self.total_profit = 0
+
+    def run(self) -> BacktestResult:
+        self.positions, self.marks, self.open_trades, self.trades, self.total_profit = {}, {}, {}, [], 0
+        bars = len(self.times)
+        equity = np.empty(bars, dtype=np.float64)
+        exposure = np.empty(bars, dtype=np.float64)
+        positions = np.empty(bars, dtype=np.int64)
+        entries = []
+
+        for t in range(bars):
+            # the 4 prices of the bar in the order they are replayed, the data is only read (it may be a memmap).
+            bar = self.data[:, t]
+            up = bar[:, CLOSE] >= bar[:, OPEN]
+            path = (bar[:, OPEN], np.where(up, bar[:, LOW], bar[:, HIGH]), np.where(up, bar[:, HIGH], bar[:, LOW]),
+                    bar[:, CLOSE])
+            for point, prices in enumerate(path):
+                self.check_positions(prices, t)
+                if point == 0 and entries:
+                    self.enter(entries, prices, t)
+                    entries = []
+
+            unrealized, value = 0.0, 0.0
+            for symbol, pos in self.positions.items():
+                unrealized += pos['pos'] * (self.marks[symbol] - pos['avg_price'])
+                value += pos['pos'] * pos['avg_price']
+            equity[t] = self.initial_capital + self.total_profit + unrealized
+            exposure[t] = value
+            positions[t] = len(self.positions)
+
+            entries = self.scan(t)
+
+        for symbol in list(self.positions.keys()):
+            pos, price = self.positions[symbol], self.marks[symbol]
+            self.close_trade(symbol, bars - 1, pos['pos'] * (price - pos['avg_price']), OPEN_POSITION)
+
+        return BacktestResult(self.times, equity, exposure, positions, self.trades, self.initial_capital)
+
+    def scan(self, t: int):
+        """
+        the buy signals at the close of the bar t, sorted by pct like main.get_data.
+        """
+        pct, pct_4h, turnover, signal = signal_arrays(self.data[:, max(t - self.rule_hours + 1, 0):t + 1],
+                                                      self.rule_hours)
+        index = np.flatnonzero(signal == 1)
+        index = index[np.argsort(-pct[index], kind='stable')]
+        return [{'pct': pct[i], 'pct_4h': pct_4h[i], 'symbol': self.symbols[i], 'hour_turnover': turnover[i],
+                 'signal': 1} for i in index]
+
+    def enter(self, signals: list, opens: np.ndarray, t: int):
+        """
+        :param opens: the open prices of the bar t.
+        """
+        left_times = config.max_pairs - len(self.positions)
+        for signal in select_entries(signals, self.positions, left_times):
+            symbol = signal['symbol']
+            price = opens[self.symbol_index[symbol]]
+            if not price > 0:
+                continue  # the symbol has no kline at this bar, like a ticker without the bid price.
+
+            self.positions[symbol] = new_position(symbol)
+            self.open_trades[symbol] = {'symbol': symbol, 'entry_time': int(self.times[t]), 'invested': 0.0}
+            self.marks[symbol] = float(price)
+            self.buy(symbol, config.initial_trade_value, price)
+
+    def check_positions(self, prices: np.ndarray, t: int):
+        """
+        :param prices: the prices of all the symbols at a point of the bar t.
+        """
+        for symbol in list(self.positions.keys()):
+            bid_price = prices[self.symbol_index[symbol]]
+            if not bid_price > 0:
+                continue
+            bid_price = float(bid_price)
+            self.marks[symbol] = bid_price
+
+            pos_data = self.positions[symbol]
+            if pos_data['pos'] * bid_price < self.min_notional:
+                self.close_trade(symbol, t, 0.0, DUST)  # the traders only delete the position data.
+                continue
+
+            if bid_price > pos_data['profit_max_price']:
+                pos_data['profit_max_price'] = bid_price
+
+            action = position_action(pos_data, bid_price)
+            if action == EXIT or action == STOP_LOSS:
+                sell_price = bid_price * (1 - config.taker_price_pct)
+                profit = apply_trade(pos_data, pos_data['pos'], sell_price, False)
+                self.close_trade(symbol, t, profit, action)
+            elif action == INCREASE:
+                self.buy(symbol, increase_value(pos_data['current_increase_pos_count']), bid_price)
+
+    def buy(self, symbol: str, value: float, price: float):
+        buy_price = price * (1 + config.taker_price_pct)
+        apply_trade(self.positions[symbol], value / buy_price, buy_price, True)
+        self.open_trades[symbol]['invested'] += value
+
+    def close_trade(self, symbol: str, t: int, profit: float, reason: str):
+        pos = self.positions.pop(symbol)
+        self.marks.pop(symbol, None)
+        trade = self.open_trades.pop(symbol)
+        if reason not in (OPEN_POSITION, DUST):
+            self.total_profit += profit
+
+        trade['exit_time'] = int(self.times[t])
+        trade['holding_hours'] = (trade['exit_time'] - trade['entry_time']) // 3_600_000
+        trade['entries'] = pos['current_increase_pos_count']
+        trade['pnl'] = profit
+        trade['return_pct'] = profit / trade['invested'] if trade['invested'] > 0 else 0.0
+        trade['reason'] = reason
+        self.trades.append(trade)
+
+
+def format_time(timestamp):
+    return datetime.utcfromtimestamp(int(timestamp) / 1000).strftime('%Y-%m-%d %H:%M')
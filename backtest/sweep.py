@@ -0,0 +1,203 @@
+"""
+    Run the backtest over the combinations of the strategy's config fields on a process pool.
+
+    1. the grid fields try every value (pump_pct=0.02,0.03,0.05), the range fields draw random values between the low
+    and the high (exit_profit_pct=0.005:0.03) for every sample, the int fields draw ints.
+    2. the klines are saved once as klines.npy in the output folder, every worker opens it with mmap, so the workers
+    share the page cache instead of copying the dataset.
+    3. every combination is keyed by the hash of the strategy fields, the dataset and the backtest options, the
+    results are appended to results.jsonl as they finish. Running the sweep again skips the cached keys, so an
+    interrupted sweep resumes where it stopped and the overlapping sweeps reuse the results.
+    4. results.csv is the table of all the cached results of the dataset sorted by the sort field.
+
+        sweep = Sweep(times, symbols, data, 'sweep_result')
+        table = sweep.run(grid={'pump_pct': [0.02, 0.03]}, ranges={'exit_profit_pct': (0.005, 0.03)}, samples=20)
+"""
+
+import os
+import json
+import random
+import hashlib
+import itertools
+from pathlib import Path
+from multiprocessing import Pool
+
+import numpy as np
+
+from utils.config import config
+from backtest.engine import Backtest
+
+# the config fields the backtest uses, the others don't change the results.
+STRATEGY_FIELDS = ['max_pairs', 'pump_pct', 'pump_pct_4h', 'initial_trade_value', 'trade_value_multiplier',
+                   'increase_pos_when_drop_down', 'exit_profit_pct', 'profit_drawdown_pct', 'trading_fee',
+                   'max_increase_pos_count', 'blocked_lists', 'allowed_lists', 'turnover_threshold', 'stop_loss_pct',
+                   'taker_price_pct']
+INT_FIELDS = ['max_pairs', 'max_increase_pos_count']
+
+# the dataset of the worker process, set by init_worker.
+worker_data = {}
+
+
+def parse_param(text: str):
+    """
+    :param text: 'name=v1,v2,v3' for a grid or 'name=low:high' for a random range.
+    :return: (name, values, low_high), one of values and low_high is None.
+    """
+    name, _, value = text.partition('=')
+    name = name.strip()
+    if name not in STRATEGY_FIELDS:
+        raise ValueError(f"不支持的参数: {name}, 可以是: {', '.join(STRATEGY_FIELDS)}")
+
+    if name in ('blocked_lists', 'allowed_lists'):
+        raise ValueError(f"不支持扫描列表参数: {name}, 请在配置文件里设置")
+    cast = int if name in INT_FIELDS else float
+    if ':' in value:
+        low, high = value.split(':')
+        return name, None, (cast(low), cast(high))
+    return name, [cast(item) for item in value.split(',') if item.strip()], None
+
+
+def combinations(grid: dict, ranges: dict, samples: int = 1, seed: int = 0):
+    """
+    :param grid: {field: [values]}
+    :param ranges: {field: (low, high)}
+    :return: the list of the params dicts, the same for the same arguments.
+    """
+    rand = random.Random(seed)
+    names = list(grid.keys())
+    params_list = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        for _ in range(max(samples, 1) if ranges else 1):
+            params = dict(zip(names, values))
+            for name, (low, high) in ranges.items():
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rand.randint(low, high)
+                else:
+                    params[name] = round(rand.uniform(low, high), 6)
+            params_list.append(params)
+    return params_list
+
+
+def params_key(params: dict, base: dict, dataset: str, options: dict):
+    fields = dict(base, **params)
+    text = json.dumps({'fields': fields, 'dataset': dataset, 'options': options}, sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def init_worker(path: str, base: dict, options: dict):
+    data = np.load(path, mmap_mode='r')
+    with open(Path(path).with_suffix('.json')) as f:
+        meta = json.load(f)
+    worker_data.update(times=np.array(meta['times'], dtype=np.int64), symbols=meta['symbols'], data=data,
+                       base=base, options=options)
+
+
+def run_params(task):
+    """
+    run the backtest of a combination in the worker.
+    :param task: (key, params)
+    :return: the result row.
+    """
+    key, params = task
+    config._update(worker_data['base'])
+    config._update(params)
+    result = Backtest(worker_data['times'], worker_data['symbols'], worker_data['data'],
+                      **worker_data['options']).run()
+    return dict({'key': key}, **params, **result.summary())
+
+
+class Sweep(object):
+
+    def __init__(self, times: np.ndarray, symbols: list, data: np.ndarray, output, initial_capital: float = 10000,
+                 min_notional: float = 5):
+        self.times = times
+        self.symbols = symbols
+        self.data = data
+        self.output = Path(output)
+        self.options = {'initial_capital': initial_capital, 'min_notional': min_notional}
+
+    def save_dataset(self):
+        """
+        save the klines for the workers' mmap.
+        :return: (the path of klines.npy, the hash of the dataset)
+        """
+        self.output.mkdir(parents=True, exist_ok=True)
+        data = np.ascontiguousarray(self.data, dtype=np.float64)
+        dataset = hashlib.sha1(data.tobytes()).hexdigest()[:16]
+        dataset = hashlib.sha1(json.dumps([dataset, self.symbols]).encode('utf-8')).hexdigest()[:16]
+
+        path = self.output.joinpath('klines.npy')
+        np.save(path, data)
+        with open(path.with_suffix('.json'), 'w') as f:
+            json.dump({'dataset': dataset, 'symbols': self.symbols, 'times': [int(t) for t in self.times]}, f)
+        return str(path), dataset
+
+    def load_results(self):
+        results = {}
+        path = self.output.joinpath('results.jsonl')
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        results[row['key']] = row
+                    except ValueError:
+                        continue  # the last line of an interrupted sweep may be cut.
+        return results
+
+    def run(self, grid: dict, ranges: dict = None, samples: int = 1, seed: int = 0, workers: int = None,
+            sort: str = 'return_pct'):
+        """
+        :param workers: the worker processes, default is the cpu count.
+        :param sort: the field of the summary or the param to sort the table by, descending.
+        :return: the table of the results as a pandas DataFrame.
+        """
+        import pandas as pd
+
+        ranges = ranges or {}
+        path, dataset = self.save_dataset()
+        base = {name: getattr(config, name) for name in STRATEGY_FIELDS}
+        results = self.load_results()
+
+        tasks, keys, cached = [], set(), 0
+        for params in combinations(grid, ranges, samples, seed):
+            key = params_key(params, base, dataset, self.options)
+            if key in keys:
+                continue
+            keys.add(key)
+            if key in results:
+                cached += 1
+            else:
+                tasks.append((key, params))
+        print(f"{len(keys)} combinations, {len(tasks)} to run, {cached} cached.")
+
+        workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+        with open(self.output.joinpath('results.jsonl'), 'a') as f:
+            if workers <= 1:
+                saved = {name: getattr(config, name) for name in STRATEGY_FIELDS}
+                init_worker(path, base, self.options)
+                rows = map(run_params, tasks)
+            else:
+                pool = Pool(workers, initializer=init_worker, initargs=(path, base, self.options))
+                rows = pool.imap_unordered(run_params, tasks)
+
+            try:
+                for index, row in enumerate(rows):
+                    row['dataset'] = dataset
+                    results[row['key']] = row
+                    f.write(json.dumps(row) + '\n')
+                    f.flush()
+                    print(f"{index + 1}/{len(tasks)} {row['key']}: return_pct {row['return_pct']:.4f}, "
+                          f"max_drawdown_pct {row['max_drawdown_pct']:.4f}, trades {row['trades']}")
+            finally:
+                if workers <= 1:
+                    config._update(saved)
+                else:
+                    pool.terminate()
+                    pool.join()
+
+        table = pd.DataFrame([row for row in results.values() if row.get('dataset') == dataset])
+        if len(table) and sort in table.columns:
+            table = table.sort_values(sort, ascending=False)
+        table.to_csv(self.output.joinpath('results.csv'), index=False)
+        return table
@@ -0,0 +1,70 @@
+"""
+    benchmark the kline scan against a local http stand-in of the exchange, the thread pool against hundreds of
+    requests in flight on the event loop. tests/test_async_gateway.py checks they return the same data.
+
+    usage: python -m benchmark.bench_async --symbols 300 --latency 0.05 --in-flight 10 100 300
+"""
+
+import io
+import time
+import asyncio
+import argparse
+from contextlib import redirect_stdout
+
+import main
+from gateway import BinanceFutureHttp
+from gateway.binance_async import AsyncBinanceFutureHttp
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer
+from trader.binance_future_trader import BinanceFutureTrader
+from utils import config
+
+
+def scan(trader, workers: int):
+    config.kline_workers = workers
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        main.get_data(trader)
+    return time.perf_counter() - start
+
+
+async def async_scan(trader, async_client, in_flight: int):
+    config.kline_workers = in_flight
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        await main.async_get_data(trader, async_client)
+    return time.perf_counter() - start
+
+
+async def run(symbols: int, latency: float, workers: int, in_flights: list):
+    exchange = SimulatedExchange(symbol_count=symbols, latency=latency)
+    server = ExchangeHttpServer(exchange)
+    server.start()
+
+    http_client = BinanceFutureHttp(host=server.url, api_key='key', secret='secret', pool_size=max(in_flights))
+    async_client = AsyncBinanceFutureHttp(host=server.url, api_key='key', secret='secret', pool_size=max(in_flights))
+
+    config.kline_cache = False
+    trader = BinanceFutureTrader(positions_file=None, trade_store_file='')
+    trader.http_client = http_client
+    trader.get_exchange_info()
+
+    print(f"symbols: {symbols}, request latency: {latency * 1000:.0f}ms")
+    cost = scan(trader, workers)
+    print(f"{'threads':>8} {workers:>4} in flight: {cost:.3f}s")
+    for in_flight in in_flights:
+        cost = await async_scan(trader, async_client, in_flight)
+        print(f"{'asyncio':>8} {in_flight:>4} in flight: {cost:.3f}s")
+
+    await async_client.close()
+    server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.05, help='the seconds of every request.')
+    parser.add_argument('--workers', type=int, default=10, help='the threads of the thread pool scan.')
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[10, 100, 300])
+    args = parser.parse_args()
+    asyncio.run(run(args.symbols, args.latency, args.workers, args.in_flight))
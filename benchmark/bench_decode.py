@@ -0,0 +1,119 @@
+"""
+    benchmark the payload decoding of gateway/decoders.py against the generic json + float() path of the traders, on a
+    bookTicker snapshot of all the symbols and the klines of the signal scan:
+
+    1. generic: json.loads, then the traders' conversions (the tickers_dict loop, stack_klines of the string lists).
+    2. typed: the decoders' loads (orjson if installed), then decode_book_tickers and decode_klines.
+
+    the payloads are generated like the spot market, the decode time is the best of the repeats and the memory is what
+    the decoded structure keeps (tracemalloc). Both paths must give the same tickers and signals data.
+
+    usage: python -m benchmark.bench_decode --symbols 500 2000 --klines 100 --repeat 5
+"""
+
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from gateway.decoders import loads, decode_book_tickers, decode_klines
+from utils.signals import stack_klines
+
+
+def generate_payloads(count: int, bars: int):
+    rand = random.Random(count)
+    symbols = [f"SIM{i}USDT" for i in range(count)]
+    tickers = []
+    for symbol in symbols:
+        price = 10 ** rand.uniform(-4, 4)
+        tickers.append({'symbol': symbol, 'bidPrice': f"{price:.8f}", 'bidQty': f"{rand.uniform(0, 1000):.8f}",
+                        'askPrice': f"{price * 1.001:.8f}", 'askQty': f"{rand.uniform(0, 1000):.8f}"})
+
+    klines = {}
+    open_time = 1700000000000 - bars * 3_600_000
+    for symbol in symbols:
+        price, rows = 10 ** rand.uniform(-4, 4), []
+        for i in range(bars):
+            close = price * (1 + rand.gauss(0, 0.01))
+            rows.append([open_time + i * 3_600_000, f"{price:.8f}", f"{max(price, close) * 1.002:.8f}",
+                         f"{min(price, close) * 0.998:.8f}", f"{close:.8f}", f"{rand.uniform(0, 1e6):.8f}",
+                         open_time + (i + 1) * 3_600_000 - 1, f"{rand.uniform(0, 1e7):.8f}", rand.randint(0, 9999),
+                         f"{rand.uniform(0, 1e5):.8f}", f"{rand.uniform(0, 1e6):.8f}", "0"])
+            price = close
+        klines[symbol] = json.dumps(rows).encode('utf-8')
+
+    return json.dumps(tickers).encode('utf-8'), klines
+
+
+def generic_tickers(content: bytes):
+    tickers_dict = {}
+    for tick in json.loads(content):
+        tickers_dict[tick['symbol']] = {"bid_price": float(tick['bidPrice']), "ask_price": float(tick["askPrice"])}
+    return tickers_dict
+
+
+def typed_tickers(content: bytes):
+    return decode_book_tickers(loads(content))
+
+
+def generic_klines(klines: dict):
+    return stack_klines([(symbol, json.loads(content)) for symbol, content in klines.items()])
+
+
+def typed_klines(klines: dict):
+    return stack_klines([(symbol, decode_klines(loads(content))) for symbol, content in klines.items()])
+
+
+def measure(function, argument, repeat: int):
+    """
+    :return: (the best seconds, the bytes the result keeps, the result)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = function(argument)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return best, memory, result
+
+
+def run(counts, bars: int, repeat: int):
+    print(f"json parser of the typed path: {loads.__module__}")
+    print(f"{'symbols':>8} {'payload':>14} {'size(KB)':>9} {'generic(ms)':>12} {'typed(ms)':>10} "
+          f"{'generic(KB)':>12} {'typed(KB)':>10}")
+    for count in counts:
+        tickers, klines = generate_payloads(count, bars)
+        cases = [('bookTicker', generic_tickers, typed_tickers, tickers, len(tickers)),
+                 (f'klines x{bars}', generic_klines, typed_klines, klines, sum(len(item) for item in klines.values()))]
+
+        for name, generic, typed, payload, size in cases:
+            generic_time, generic_memory, generic_result = measure(generic, payload, repeat)
+            typed_time, typed_memory, typed_result = measure(typed, payload, repeat)
+
+            if name == 'bookTicker':
+                assert typed_result.to_dict() == generic_result, "the decoded tickers are different."
+            else:
+                assert generic_result[0] == typed_result[0] and np.array_equal(generic_result[1], typed_result[1],
+                                                                               equal_nan=True), \
+                    "the decoded klines give different signals data."
+
+            print(f"{count:>8} {name:>14} {size / 1024:>9.0f} {generic_time * 1000:>12.2f} {typed_time * 1000:>10.2f} "
+                  f"{generic_memory / 1024:>12.0f} {typed_memory / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--klines', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.symbols, args.klines, args.repeat)
@@ -0,0 +1,75 @@
+"""
+    benchmark the hourly signal scan:
+    1. the sequential path against the concurrent kline fetching.
+    2. the first scan against the next scans with the kline cache.
+
+    the trader talks to the local SimulatedExchange, every request sleeps the latency to emulate the network.
+
+    usage: python -m benchmark.bench_get_data --latency 0.05 --workers 10
+"""
+
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+
+import main
+from trader.binance_future_trader import BinanceFutureTrader
+from simulator import SimulatedExchange
+from utils import config
+from utils.config import signal_data
+
+
+def scan(trader, workers: int, kline_cache=False):
+    config.kline_workers = workers
+    config.kline_cache = kline_cache
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):  # get_data prints the whole signal_data.
+        main.get_data(trader)
+    return time.perf_counter() - start, list(signal_data['signals'])
+
+
+def create_trader(count: int, latency: float):
+    trader = BinanceFutureTrader()
+    trader.http_client = SimulatedExchange(symbol_count=count, latency=latency)
+    trader.get_exchange_info()
+    return trader
+
+
+def run_concurrency(symbol_counts, latency, workers):
+    print(f"latency: {latency * 1000:.0f}ms, workers: {workers}")
+    print(f"{'symbols':>8} {'sequential(s)':>14} {'concurrent(s)':>14} {'speedup':>8}")
+    for count in symbol_counts:
+        trader = create_trader(count, latency)
+        sequential_time, sequential_signals = scan(trader, 1)
+        concurrent_time, concurrent_signals = scan(trader, workers)
+        assert sequential_signals == concurrent_signals, "the concurrent scan gives different signals."
+
+        print(f"{count:>8} {sequential_time:>14.3f} {concurrent_time:>14.3f} "
+              f"{sequential_time / concurrent_time:>7.1f}x")
+
+
+def run_kline_cache(symbol_counts, latency, workers):
+    print(f"\nkline cache, latency: {latency * 1000:.0f}ms, workers: {workers}")
+    print(f"{'symbols':>8} {'first scan(s)':>14} {'next scan(s)':>14} {'klines':>8} {'next klines':>12}")
+    for count in symbol_counts:
+        trader = create_trader(count, latency)
+        _, signals = scan(trader, workers)
+        trader.http_client.kline_count = 0
+        first_time, first_signals = scan(trader, workers, kline_cache=True)
+        first_klines = trader.http_client.kline_count
+
+        next_time, next_signals = scan(trader, workers, kline_cache=True)
+        assert signals == first_signals == next_signals, "the kline cache gives different signals."
+
+        print(f"{count:>8} {first_time:>14.3f} {next_time:>14.3f} {first_klines:>8} {trader.http_client.kline_count - first_klines:>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[50, 100, 300])
+    parser.add_argument('--latency', type=float, default=0.05, help='the seconds of every request.')
+    parser.add_argument('--workers', type=int, default=10)
+    args = parser.parse_args()
+    run_concurrency(args.symbols, args.latency, args.workers)
+    run_kline_cache(args.symbols, args.latency, args.workers)
@@ -0,0 +1,58 @@
+"""
+    benchmark the per-request latency of the gateway against a local https stand-in of the exchange, a new connection
+    (tcp + tls handshake) for every request against the keep-alive connection pool.
+
+    usage: python -m benchmark.bench_http --requests 200 --threads 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from gateway import BinanceFutureHttp
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer, create_certificate
+
+
+def measure(http_client: BinanceFutureHttp, count: int, threads: int):
+    def request(_):
+        start = time.perf_counter()
+        http_client.get_ticker('SIM0USDT')
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(request, range(count)))
+    return time.perf_counter() - start, latencies
+
+
+def run(count: int, threads: int):
+    folder = tempfile.mkdtemp()
+    certfile, keyfile = create_certificate(folder)
+    os.environ['REQUESTS_CA_BUNDLE'] = certfile  # trust the self signed certificate.
+
+    server = ExchangeHttpServer(SimulatedExchange(symbol_count=10), certfile=certfile, keyfile=keyfile)
+    server.start()
+
+    print(f"requests: {count}, threads: {threads}, server: {server.url}")
+    print(f"{'mode':>12} {'total(s)':>9} {'mean(ms)':>9} {'p50(ms)':>9} {'p99(ms)':>9} {'connections':>12}")
+    for name, pool_size in (('no pool', 0), ('keep-alive', 10)):
+        http_client = BinanceFutureHttp(host=server.url, pool_size=pool_size)
+        total, latencies = measure(http_client, count, threads)
+        latencies = sorted(value * 1000 for value in latencies)
+        connections = sum(item['connections'] for item in http_client.connection_stats().values()) \
+            if pool_size else count
+        print(f"{name:>12} {total:>9.3f} {statistics.mean(latencies):>9.2f} {latencies[len(latencies) // 2]:>9.2f} "
+              f"{latencies[int(len(latencies) * 0.99) - 1]:>9.2f} {connections:>12}")
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+    run(args.requests, args.threads)
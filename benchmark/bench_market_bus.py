@@ -0,0 +1,82 @@
+"""
+    benchmark the market data bus: the publisher writes the tickers of --symbols symbols --updates times, the reader
+    processes attached to the file read them at the same time.
+
+    it reports the seconds of a publish, of a zero-copy view with its check and of a consistent copy, and how many
+    views were invalid and retried. tests/test_market_bus.py checks no consistent read is torn.
+
+    usage: python -m benchmark.bench_market_bus --symbols 1000 --readers 2 --updates 20000
+"""
+
+import time
+import argparse
+import statistics
+import multiprocessing
+
+from utils.market_bus import MarketBus, MarketBusReader
+from utils.utility import get_file_path
+
+FILE_NAME = 'bench_market_bus.bin'
+
+
+def read_loop(seconds: float, results):
+    reader = MarketBusReader(FILE_NAME)
+    views, retries, reads = 0, 0, 0
+    view_time, read_time = 0.0, 0.0
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+        start = time.perf_counter()
+        seq, tickers = reader.view_tickers()
+        bid = tickers[:, 0].max()  # use the view.
+        if reader.valid_tickers(seq):
+            views += 1
+        else:
+            retries += 1
+        view_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, tickers = reader.read_tickers()
+        read_time += time.perf_counter() - start
+        reads += 1
+    results.put({'views': views, 'retries': retries, 'reads': reads,
+                 'view': view_time / max(views + retries, 1), 'read': read_time / max(reads, 1)})
+
+
+def run(symbols: int, readers: int, updates: int):
+    bus = MarketBus()
+    names = [f"SIM{i}USDT" for i in range(symbols)]
+    bus.create(FILE_NAME, names)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=read_loop, args=(3, results)) for _ in range(readers)]
+    for process in processes:
+        process.start()
+    time.sleep(1)  # the readers attached.
+
+    publish_times = []
+    for n in range(updates):
+        tickers_dict = {name: {'bid_price': float(n), 'ask_price': float(n + 1)} for name in names}
+        start = time.perf_counter()
+        bus.publish_tickers(tickers_dict)
+        publish_times.append(time.perf_counter() - start)
+
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    get_file_path(FILE_NAME).unlink(missing_ok=True)
+
+    print(f"{symbols} symbols, {readers} readers, {updates} updates, file {bus.memmap.size / 1024:.0f}KB")
+    print(f"publish_tickers: {statistics.median(publish_times) * 1000:.3f}ms")
+    for index, report in enumerate(reports):
+        print(f"reader {index}: view+check {report['view'] * 1e6:.1f}us ({report['views']} valid, "
+              f"{report['retries']} retried), copy {report['read'] * 1e6:.1f}us ({report['reads']} reads)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--updates', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.symbols, args.readers, args.updates)
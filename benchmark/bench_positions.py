@@ -0,0 +1,76 @@
+"""
+    benchmark the positions persistence of the trading loop, the profit_max_price of a few positions moves every
+    5 cycles, a position is added every 10 cycles, and every cycle saves the data:
+    1. rewrite: rewrite the json file every cycle, like before the dirty tracking.
+    2. snapshot: rewrite the json file only when the data changed.
+    3. journal: append the changes to the journal, compacted after compact_count lines.
+
+    every mode reloads the file(s) after the cycles and checks the positions are the same.
+
+    usage: python -m benchmark.bench_positions --positions 10 100 1000 --cycles 200
+"""
+
+import time
+import random
+import argparse
+
+from utils.positions import Positions
+from utils.utility import get_file_path
+
+FILE_NAME = 'bench_positions.json'
+
+
+def clear_files():
+    for name in (FILE_NAME, FILE_NAME + '.journal', FILE_NAME + '.tmp'):
+        get_file_path(name).unlink(missing_ok=True)
+
+
+def run_cycles(positions: Positions, count: int, cycles: int, rewrite: bool):
+    rand = random.Random(0)
+    symbols = [f"SIM{i}USDT" for i in range(count)]
+    for symbol in symbols:
+        positions.update(symbol, trade_amount=1, trade_price=100, min_qty=0.001, is_buy=True)
+    positions.save_data()
+
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        # the price rises above profit_max_price for a few symbols every 5 cycles, and a fill every 10 cycles.
+        if cycle % 5 == 0:
+            for symbol in rand.sample(symbols, min(3, count)):
+                positions.update_profit_max_price(symbol, 100 + cycle * 0.01 + rand.random())
+        if cycle % 10 == 0:
+            positions.update(rand.choice(symbols), trade_amount=0.5, trade_price=101, min_qty=0.001, is_buy=True)
+        if rewrite:
+            positions.dirty = True
+        positions.save_data()
+    return (time.perf_counter() - start) / cycles
+
+
+def run(counts, cycles: int, compact_count: int):
+    print(f"cycles: {cycles}, compact_count: {compact_count}")
+    print(f"{'positions':>10} {'rewrite(ms)':>12} {'snapshot(ms)':>13} {'journal(ms)':>12}")
+    for count in counts:
+        costs = []
+        for mode in ('rewrite', 'snapshot', 'journal'):
+            clear_files()
+            positions = Positions(FILE_NAME, journal=mode == 'journal', compact_count=compact_count)
+            costs.append(run_cycles(positions, count, cycles, rewrite=mode == 'rewrite') * 1000)
+
+            loaded = Positions(FILE_NAME, journal=mode == 'journal', compact_count=compact_count)
+            assert loaded.positions == positions.positions and loaded.total_profit == positions.total_profit, \
+                f"the {mode} mode loads different positions."
+            if positions.journal_file:
+                positions.journal_file.close()
+            if loaded.journal_file:
+                loaded.journal_file.close()
+        print(f"{count:>10} {costs[0]:>12.3f} {costs[1]:>13.3f} {costs[2]:>12.3f}")
+    clear_files()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--positions', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--compact-count', type=int, default=1000)
+    args = parser.parse_args()
+    run(args.positions, args.cycles, args.compact_count)
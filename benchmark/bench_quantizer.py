@@ -0,0 +1,51 @@
+"""
+    benchmark the SymbolQuantizer against round_to and floor_to, tests/test_quantizer.py checks it equals the Decimal
+    implementation of the exchange's filters.
+
+    usage: python -m benchmark.bench_quantizer --count 100000
+"""
+
+import time
+import random
+import argparse
+
+import numpy as np
+
+from utils.utility import round_to, floor_to
+from utils.quantizer import SymbolQuantizer
+
+
+def measure(function, values):
+    start = time.perf_counter()
+    for value in values:
+        function(value)
+    return (time.perf_counter() - start) / len(values) * 1e9
+
+
+def benchmark(count: int):
+    rand = random.Random(1)
+    prices = [rand.uniform(0.01, 60000) for _ in range(count)]
+    qtys = [rand.uniform(0.001, 1000) for _ in range(count)]
+    quantizer = SymbolQuantizer(tick_size='0.01', step_size='0.001')
+
+    print(f"{'method':>22} {'ns/value':>10}")
+    print(f"{'round_to':>22} {measure(lambda value: round_to(value, 0.01), prices):>10.0f}")
+    print(f"{'round_price':>22} {measure(quantizer.round_price, prices):>10.0f}")
+    print(f"{'floor_to':>22} {measure(lambda value: floor_to(value, 0.001), qtys):>10.0f}")
+    print(f"{'floor_qty':>22} {measure(quantizer.floor_qty, qtys):>10.0f}")
+
+    array = np.array(prices)
+    start = time.perf_counter()
+    quantizer.round_prices(array)
+    print(f"{'round_prices(array)':>22} {(time.perf_counter() - start) / count * 1e9:>10.1f}")
+    array = np.array(qtys)
+    start = time.perf_counter()
+    quantizer.floor_qtys(array)
+    print(f"{'floor_qtys(array)':>22} {(time.perf_counter() - start) / count * 1e9:>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+    benchmark(args.count)
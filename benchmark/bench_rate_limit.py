@@ -0,0 +1,77 @@
+"""
+    the hourly scan against a local exchange with a small request weight limit, while an order request is sent every
+    0.2 seconds like the trading loop:
+    1. reactive: the client only knows the limit from the 429 responses and waits their Retry-After.
+    2. proactive: the rate limiter is seeded from exchangeInfo and the scan leaves a reserve of the weight to the orders.
+
+    usage: python -m benchmark.bench_rate_limit --symbols 300 --limit 300 --interval 10 --workers 20
+"""
+
+import io
+import time
+import argparse
+from threading import Thread
+from contextlib import redirect_stdout
+
+import main
+from gateway import BinanceFutureHttp
+from gateway.rate_limiter import RateLimiter
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer
+from trader.binance_future_trader import BinanceFutureTrader
+from utils import config
+
+
+def send_orders(http_client, latencies: list, running: list):
+    while running:
+        start = time.perf_counter()
+        http_client.get_open_orders('SIM1USDT')
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.2)
+
+
+def run(symbols: int, limit: int, interval: int, workers: int, proactive: bool):
+    exchange = SimulatedExchange(symbol_count=symbols, rate_limits=[
+        {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'SECOND', 'intervalNum': interval, 'limit': limit}])
+    server = ExchangeHttpServer(exchange)
+    server.start()
+
+    config.kline_workers = workers
+    config.kline_cache = False
+    trader = BinanceFutureTrader()
+    trader.http_client = BinanceFutureHttp(host=server.url, api_key='key', secret='secret', pool_size=workers + 1)
+    with redirect_stdout(io.StringIO()):
+        trader.get_exchange_info()
+    if not proactive:
+        trader.http_client.rate_limiter = RateLimiter(weight_limit=10 ** 9)
+
+    # start in a new window of the exchange.
+    time.sleep(interval - time.time() % interval)
+    latencies, running = [], [True]
+    Thread(target=send_orders, args=(trader.http_client, latencies, running), daemon=True).start()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        main.get_data(trader)
+    cost = time.perf_counter() - start
+    running.clear()
+    server.stop()
+
+    latencies.sort()
+    print(f"{'proactive' if proactive else 'reactive':>10} {cost:>9.1f} {server.rejected_count:>6} "
+          f"{latencies[len(latencies) // 2] * 1000:>14.1f} {latencies[-1] * 1000:>13.1f}")
+    if proactive:
+        print(f"budget: {trader.http_client.rate_limiter.budget()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=300, help='the request weight limit of the exchange.')
+    parser.add_argument('--interval', type=int, default=10, help='the seconds of the rate limit interval.')
+    parser.add_argument('--workers', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"symbols: {args.symbols}, weight limit: {args.limit} per {args.interval}s, workers: {args.workers}")
+    print(f"{'':>10} {'scan(s)':>9} {'429s':>6} {'order p50(ms)':>14} {'order max(ms)':>13}")
+    run(args.symbols, args.limit, args.interval, args.workers, proactive=False)
+    run(args.symbols, args.limit, args.interval, args.workers, proactive=True)
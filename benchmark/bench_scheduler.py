@@ -0,0 +1,87 @@
+"""
+    benchmark the reaction latency of the trading loop: the seconds from a ticker crossing the price where a
+    position's action changes (or an order's price) to the start of the next loop, the loop waking up every
+    --interval seconds against the LoopScheduler waking up on the tickers.
+
+    a feed thread moves the prices of the SimulatedExchange every --tick seconds, fills the crossed orders and passes
+    the bookTickers of the watched symbols to the scheduler like the ticker stream does, the trader enters all the
+    symbols and trades them for --seconds in every mode.
+
+    usage: python -m benchmark.bench_scheduler --interval 10 --seconds 60 --symbols 10
+"""
+
+import io
+import time
+import argparse
+import statistics
+from threading import Thread
+from contextlib import redirect_stdout
+
+import main
+from utils import config
+from utils.utility import get_file_path
+from simulator import SimulatedExchange
+from trader.binance_future_trader import BinanceFutureTrader
+
+
+def measure(event_driven: bool, interval: float, seconds: float, symbols: int, tick: float, volatility: float):
+    config.max_pairs = symbols
+    config.turnover_threshold = 0
+    config.pump_pct = config.pump_pct_4h = -1  # enter all the symbols.
+    exchange = SimulatedExchange(symbol_count=symbols, bars=100, match_orders=True, volatility=volatility)
+    trader = BinanceFutureTrader()
+    trader.scheduler.heartbeat, trader.scheduler.event_driven = interval, event_driven
+    trader.positions.file_name = 'bench_scheduler_positions.json'  # don't touch the positions of the real bot.
+    trader.positions.positions = {}
+    trader.http_client = exchange
+
+    running = True
+
+    def feed():
+        # the simulated seconds pass 10 times faster than the real seconds, to see more crossings.
+        while running:
+            time.sleep(tick)
+            exchange.advance(tick * 10)
+            for symbol in list(trader.scheduler.levels.keys()):
+                ticker = exchange.book_ticker(symbol)
+                trader.scheduler.on_ticker(symbol, float(ticker['bidPrice']), float(ticker['askPrice']))
+
+    cycles = 0
+    with redirect_stdout(io.StringIO()):
+        trader.get_exchange_info()
+        main.get_data(trader)
+        thread = Thread(target=feed, daemon=True)
+        thread.start()
+        end_time = time.perf_counter() + seconds
+        while time.perf_counter() < end_time:
+            trader.scheduler.wait()
+            trader.start()
+            trader.watch_prices()
+            cycles += 1
+        running = False
+        thread.join()
+
+    get_file_path(trader.positions.file_name).unlink(missing_ok=True)
+    return cycles, list(trader.scheduler.latencies.get('ticker', [])), len(exchange.orders)
+
+
+def run(interval: float, seconds: float, symbols: int, tick: float, volatility: float):
+    print(f"heartbeat: {interval}s, {seconds}s per mode, {symbols} symbols, tick: {tick}s")
+    print(f"{'mode':>10} {'cycles':>7} {'orders':>7} {'reactions':>10} {'mean(ms)':>10} {'p50(ms)':>10} "
+          f"{'max(ms)':>10}")
+    for name, event_driven in (('interval', False), ('event', True)):
+        cycles, latencies, orders = measure(event_driven, interval, seconds, symbols, tick, volatility)
+        latencies = [value * 1000 for value in latencies] or [0]
+        print(f"{name:>10} {cycles:>7} {orders:>7} {len(latencies):>10} {statistics.mean(latencies):>10.1f} "
+              f"{statistics.median(latencies):>10.1f} {max(latencies):>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', type=float, default=10, help='the heartbeat seconds of the trading loop.')
+    parser.add_argument('--seconds', type=float, default=60, help='the seconds to run every mode.')
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--tick', type=float, default=0.05, help='the seconds between the price moves.')
+    parser.add_argument('--volatility', type=float, default=0.02)
+    args = parser.parse_args()
+    run(args.interval, args.seconds, args.symbols, args.tick, args.volatility)
@@ -0,0 +1,105 @@
+"""
+    benchmark the signal calculation, the per-symbol pandas resample (the old get_data) against the vectorized
+    utils.signals, and check they give the same signals list.
+
+    usage: python -m benchmark.bench_signals --symbols 100 300 1000
+"""
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from simulator import SimulatedExchange
+from gateway.binance_future import Interval
+from utils import config
+from utils.signals import stack_klines, calculate_signals
+
+
+def pandas_signal(symbol: str, klines: list):
+    """
+    the signal calculation of the old get_data.
+    """
+    df = pd.DataFrame(klines, dtype=np.float64,
+                      columns=['open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'turnover', 'a2',
+                               'a3', 'a4', 'a5'])
+    df = df[['open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover']]
+    df.set_index('open_time', inplace=True)
+    df.index = pd.to_datetime(df.index, unit='ms') + pd.Timedelta(hours=8)
+
+    df_4hour = df.resample(rule='4H').agg({'open': 'first',
+                                           'high': 'max',
+                                           'low': 'min',
+                                           'close': 'last',
+                                           'volume': 'sum',
+                                           'turnover': 'sum'
+                                           })
+
+    pct = df['close'] / df['open'] - 1
+    pct_4h = df_4hour['close'] / df_4hour['open'] - 1
+
+    value = {'pct': pct.iloc[-1], 'pct_4h': pct_4h.iloc[-1], 'symbol': symbol, 'hour_turnover': df['turnover'].iloc[-1]}
+
+    if value['pct'] >= config.pump_pct or value['pct_4h'] >= config.pump_pct_4h:
+        value['signal'] = 1
+    elif value['pct'] <= -config.pump_pct or value['pct_4h'] <= -config.pump_pct_4h:
+        value['signal'] = -1
+    else:
+        value['signal'] = 0
+    return value
+
+
+def pandas_signals(symbol_klines: list):
+    signals = [pandas_signal(symbol, klines) for symbol, klines in symbol_klines if len(klines) > 0]
+    signals.sort(key=lambda x: x['pct'], reverse=True)
+    return signals
+
+
+def numpy_signals(symbol_klines: list):
+    signals = calculate_signals(*stack_klines(symbol_klines))
+    signals.sort(key=lambda x: x['pct'], reverse=True)
+    return signals
+
+
+def load_klines(count: int, seed: int = 0):
+    """
+    the klines of the simulated exchange, some symbols are newly listed, have a gap or have no klines.
+    """
+    exchange = SimulatedExchange(symbol_count=count, seed=seed)
+    symbol_klines = []
+    for i, symbol in enumerate(exchange.symbols):
+        klines = exchange.get_kline(symbol, Interval.HOUR_1, limit=100)
+        if i % 10 == 1:
+            klines = klines[-(i % 7 + 1):]  # newly listed
+        elif i % 10 == 2:
+            klines = klines[:-3] + klines[-1:]  # halted for two hours
+        elif i % 10 == 3:
+            klines = []
+        symbol_klines.append((symbol, klines))
+    return symbol_klines
+
+
+def timeit(func, symbol_klines, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(symbol_klines)
+        cost = time.perf_counter() - start
+        best = cost if best is None else min(best, cost)
+    return best, result
+
+
+def run(symbol_counts):
+    print(f"{'symbols':>8} {'pandas(ms)':>11} {'numpy(ms)':>10} {'speedup':>8}")
+    for count in symbol_counts:
+        symbol_klines = load_klines(count)
+        pandas_time, expected = timeit(pandas_signals, symbol_klines)
+        numpy_time, signals = timeit(numpy_signals, symbol_klines)
+        assert signals == expected, "the vectorized signals are different from the pandas signals."
+        print(f"{count:>8} {pandas_time * 1000:>11.1f} {numpy_time * 1000:>10.1f} {pandas_time / numpy_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 300, 1000])
+    args = parser.parse_args()
+    run(args.symbols)
@@ -0,0 +1,102 @@
+"""
+    benchmark the sqlite trade store:
+    1. the cost of a fill on the trading loop: Positions.update with the store (the writer thread writes in batches)
+    against committing every fill to sqlite on the loop.
+    2. the queries of the per symbol realized pnl, holding time and martingale depth on the recorded history.
+
+    the realized pnl of the store is checked against the total_profit of the positions.
+
+    usage: python -m benchmark.bench_trade_store --symbols 500 --cycles 20000
+"""
+
+import time
+import random
+import sqlite3
+import argparse
+
+from utils.positions import Positions
+from utils.trade_store import TradeStore, SCHEMA
+from utils.utility import get_file_path
+
+POSITIONS_FILE = 'bench_trade_positions.json'
+STORE_FILE = 'bench_trades.db'
+SYNC_FILE = 'bench_trades_sync.db'
+
+
+def clear_files():
+    for name in (POSITIONS_FILE, POSITIONS_FILE + '.tmp'):
+        get_file_path(name).unlink(missing_ok=True)
+    for name in (STORE_FILE, SYNC_FILE):
+        for suffix in ('', '-wal', '-shm'):
+            get_file_path(name + suffix).unlink(missing_ok=True)
+
+
+def generate_fills(symbols: int, cycles: int):
+    """
+    the martingale cycles: buy 1 to 5 times while the price drops, then sell all.
+    """
+    rand = random.Random(0)
+    fills = []
+    for i in range(cycles):
+        symbol = f"SIM{rand.randrange(symbols)}USDT"
+        price, qty = rand.uniform(1, 100), 0
+        for depth in range(rand.randint(1, 5)):
+            fills.append((symbol, 10 / price, price, True))
+            qty += 10 / price
+            price *= 0.95
+        fills.append((symbol, qty, price * rand.uniform(1.0, 1.15), False))
+    return fills
+
+
+def run(symbols: int, cycles: int):
+    clear_files()
+    fills = generate_fills(symbols, cycles)
+
+    store = TradeStore(STORE_FILE)
+    positions = Positions(POSITIONS_FILE, store=store)
+    start = time.perf_counter()
+    for symbol, qty, price, is_buy in fills:
+        positions.update(symbol, trade_amount=qty, trade_price=price, min_qty=1e-9, is_buy=is_buy)
+    store_cost = time.perf_counter() - start
+    start = time.perf_counter()
+    store.flush()
+    flush_cost = time.perf_counter() - start
+
+    connection = sqlite3.connect(str(get_file_path(SYNC_FILE)))
+    connection.executescript(SCHEMA)
+    sync_count = min(len(fills), 2000)
+    start = time.perf_counter()
+    for symbol, qty, price, is_buy in fills[:sync_count]:
+        with connection:
+            connection.execute("INSERT INTO fills (time, symbol, side, price, qty, realized_pnl) VALUES (?, ?, ?, ?, ?, ?)",
+                               (time.time(), symbol, 'BUY' if is_buy else 'SELL', price, qty, 0))
+    sync_cost = (time.perf_counter() - start) / sync_count
+    connection.close()
+
+    print(f"fills: {len(fills)}, cycles: {cycles}, symbols: {symbols}")
+    print(f"on the loop, store: {store_cost / len(fills) * 1e6:.1f}us/fill, commit every fill: {sync_cost * 1e6:.1f}us/fill")
+    print(f"the writer thread finished {flush_cost:.3f}s after the last fill")
+
+    for name, query in (('realized_pnl', store.realized_pnl), ('holding_time', store.holding_time),
+                        ('martingale_depth', store.martingale_depth)):
+        start = time.perf_counter()
+        result = query()
+        all_cost = time.perf_counter() - start
+        start = time.perf_counter()
+        query('SIM1USDT')
+        symbol_cost = time.perf_counter() - start
+        print(f"{name:>17}: all symbols {all_cost * 1000:.1f}ms ({len(result)} symbols), "
+              f"one symbol {symbol_cost * 1000:.2f}ms")
+
+    total = sum(store.realized_pnl().values())
+    assert abs(total - positions.total_profit) < 1e-6 * max(1.0, abs(total)), "the store's pnl differs."
+    store.close()
+    clear_files()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.symbols, args.cycles)
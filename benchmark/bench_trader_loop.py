@@ -0,0 +1,88 @@
+"""
+    run the trader's loop against the SimulatedExchange matching the orders by itself, no api key or venue needed:
+
+    1. every cycle the exchange moves the prices 10 seconds along the random walk and fills the crossed orders
+    (partially with --fill-ratio < 1), then the trader gets the tickers and runs start().
+    2. every hour of the simulated time (360 cycles) the signals are scanned with main.get_data.
+    3. the requests fail with the probability --error-rate and sleep --latency, --http sends them through the
+    ExchangeHttpServer with the real gateway instead of calling the exchange in process.
+
+    it reports the cycles per second, the orders, the fills and the balances at the end.
+
+    usage: python -m benchmark.bench_trader_loop --cycles 5000 --symbols 100 --fill-ratio 0.5 --error-rate 0.01
+"""
+
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+
+import main
+from utils import config
+from utils.utility import get_file_path
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer
+from trader.binance_future_trader import BinanceFutureTrader
+from trader.binance_spot_trader import BinanceSpotTrader
+
+SECONDS_PER_CYCLE = 10
+
+
+def run(cycles: int, symbols: int, market: str, fill_ratio: float, error_rate: float, latency: float, http: bool):
+    config.max_pairs = 10
+    config.turnover_threshold = 0
+    exchange = SimulatedExchange(symbol_count=symbols, bars=100, latency=latency, market=market, match_orders=True,
+                                 fill_ratio=fill_ratio, error_rate=error_rate)
+    server = None
+    trader = BinanceSpotTrader() if market == 'spot' else BinanceFutureTrader()
+    trader.positions.file_name = f"bench_{market}_positions.json"  # don't touch the positions of the real bot.
+    trader.positions.positions = {}
+    if http:
+        server = ExchangeHttpServer(exchange)
+        server.start()
+        trader.http_client.host, trader.http_client.secret = server.url, 'simulated'
+    else:
+        trader.http_client = exchange
+
+    cycles_per_hour = 3600 // SECONDS_PER_CYCLE
+    loop_time, scan_time = 0.0, 0.0
+    with redirect_stdout(io.StringIO()):  # the trader prints every order.
+        trader.get_exchange_info()
+        for cycle in range(cycles):
+            exchange.advance(SECONDS_PER_CYCLE)
+            if cycle % cycles_per_hour == 0:
+                start = time.perf_counter()
+                main.get_data(trader)
+                scan_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            trader.get_all_tickers()
+            trader.start()
+            loop_time += time.perf_counter() - start
+
+    if server:
+        server.stop()
+    get_file_path(trader.positions.file_name).unlink(missing_ok=True)
+
+    filled = [order for order in exchange.orders.values() if order['status'] in ('FILLED', 'PARTIALLY_FILLED')]
+    print(f"{market} {'http' if http else 'in process'}, {symbols} symbols, fill_ratio {fill_ratio}, "
+          f"error_rate {error_rate}, latency {latency * 1000:.0f}ms")
+    print(f"{cycles} cycles ({cycles * SECONDS_PER_CYCLE / 3600:.1f} simulated hours) in {loop_time:.2f}s: "
+          f"{cycles / loop_time:.0f} cycles/s, scans {scan_time:.2f}s")
+    print(f"requests {exchange.request_count}, injected errors {exchange.error_count}, orders {len(exchange.orders)}, "
+          f"filled {len(filled)}, open {len(exchange.active_orders)}")
+    print(f"positions {len(trader.positions.positions)}, total profit {trader.positions.total_profit:.4f}, "
+          f"USDT balance {exchange.balances['USDT']:.4f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cycles', type=int, default=5000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--market', choices=['future', 'spot'], default='future')
+    parser.add_argument('--fill-ratio', type=float, default=1.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--http', action='store_true')
+    args = parser.parse_args()
+    run(args.cycles, args.symbols, args.market, args.fill_ratio, args.error_rate, args.latency, args.http)
@@ -0,0 +1,82 @@
+"""
+    benchmark the fill-to-reaction latency: the time from an order filled on the exchange to the position updated by
+    the trader, checking the orders every loop against receiving the updates from the user data stream.
+
+    the trader talks to the SimulatedExchange, the user data stream connects to its local stream server.
+
+    usage: python -m benchmark.bench_user_stream --interval 2 --fills 10
+"""
+
+import io
+import time
+import random
+import argparse
+import statistics
+from threading import Thread
+from contextlib import redirect_stdout
+from trader.binance_future_trader import BinanceFutureTrader
+from simulator import SimulatedExchange
+
+
+def measure(interval: float, fills: int, user_stream: bool, latency: float):
+    exchange = SimulatedExchange(symbol_count=fills, latency=latency)
+    exchange.start_stream_server()
+
+    trader = BinanceFutureTrader()
+    trader.scheduler.heartbeat = interval
+    trader.positions.positions = {}
+    trader.http_client = exchange
+    trader.get_exchange_info()
+    trader.get_all_tickers()
+    if user_stream:
+        trader.start_user_stream()
+        while not trader.user_stream.connected:
+            time.sleep(0.01)
+
+    for symbol in exchange.symbols:
+        trader.place_order(symbol, 0, 0)
+
+    running = True
+
+    def loop():
+        while running:
+            trader.scheduler.wait()
+            trader.start()
+
+    thread = Thread(target=loop, daemon=True)
+    thread.start()
+
+    latencies = []
+    for symbol, orders in list(trader.buy_orders_dict.items()):
+        time.sleep(random.uniform(0, interval))
+        start = time.perf_counter()
+        exchange.fill_order(orders[0]['clientOrderId'])
+        while symbol not in trader.positions.positions:
+            time.sleep(0.0005)
+        latencies.append(time.perf_counter() - start)
+
+    running = False
+    if user_stream:
+        trader.user_stream.stop()
+    exchange.stream_server.stop()
+    return latencies
+
+
+def run(interval: float, fills: int, latency: float):
+    print(f"loop interval: {interval}s, fills: {fills}, request latency: {latency * 1000:.0f}ms")
+    print(f"{'mode':>12} {'mean(ms)':>9} {'p50(ms)':>9} {'max(ms)':>9}")
+    for name, user_stream in (('polling', False), ('user stream', True)):
+        with redirect_stdout(io.StringIO()):
+            latencies = measure(interval, fills, user_stream, latency)
+        latencies = [value * 1000 for value in latencies]
+        print(f"{name:>12} {statistics.mean(latencies):>9.1f} {statistics.median(latencies):>9.1f} "
+              f"{max(latencies):>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', type=float, default=2, help='the seconds of the trading loop.')
+    parser.add_argument('--fills', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.005, help='the seconds of every request.')
+    args = parser.parse_args()
+    run(args.interval, args.fills, args.latency)
@@ -0,0 +1,249 @@
+"""
+    the benchmark suite of the bot's hot paths, run against the SimulatedExchange:
+
+    1. get_data: the hourly signal scan of all the symbols, without the kline cache and the next scan with it.
+    2. start: one BinanceFutureTrader.start cycle with the open orders and the positions, nothing is filled.
+    3. tickers: the tickers_dict refresh from a bookTicker snapshot of all the symbols.
+    4. positions: Positions.update of every position and save_data of all the positions.
+    5. round_to/floor_to: the price and quantity rounding of an order, and the SymbolQuantizer's.
+
+    the cases are run for every symbol count, the best and the median seconds of the repeats are saved as a JSON
+    baseline, compare flags the cases whose best and median are both slower than the baseline by more than the
+    threshold, a single noisy repeat doesn't flag a case.
+
+    usage:
+        python -m benchmark.suite run --symbols 100 1000 5000 --orders 50 --positions 20 --output baseline.json
+        # after the change
+        python -m benchmark.suite run --symbols 100 1000 5000 --orders 50 --positions 20 --output current.json
+        python -m benchmark.suite compare baseline.json current.json --threshold 0.1
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+from datetime import datetime
+from contextlib import redirect_stdout
+
+import numpy as np
+
+import main
+from utils import config, round_to, floor_to
+from utils.config import signal_data
+from utils.positions import Positions
+from utils.quantizer import SymbolQuantizer
+from utils.utility import get_file_path
+from simulator import SimulatedExchange
+from trader.binance_future_trader import BinanceFutureTrader
+from gateway.binance_future import OrderSide, OrderType
+
+POSITIONS_FILE = 'bench_suite_positions.json'
+
+
+class SnapshotGateway(object):
+    """
+    the exchange with the bookTicker snapshot taken once, so the tickers case measures the trader's side only.
+    """
+
+    def __init__(self, exchange: SimulatedExchange):
+        self.exchange = exchange
+        self.tickers = exchange.get_all_tickers()
+
+    def get_all_tickers(self):
+        return self.tickers
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+
+def measure(function, repeat: int, number: int = 1):
+    """
+    :return: (the best, the median) seconds of a call.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return min(times), statistics.median(times)
+
+
+def create_trader(symbols: int, orders: int, positions: int):
+    """
+    the trader with the open buy orders and the positions at the current prices, start() changes nothing.
+    """
+    exchange = SimulatedExchange(symbol_count=symbols, bars=100)
+    trader = BinanceFutureTrader()
+    trader.positions = Positions(POSITIONS_FILE)
+    trader.http_client = exchange
+    trader.get_exchange_info()
+    trader.get_all_tickers()
+    signal_data['signals'] = []
+
+    for symbol in exchange.symbols[:positions]:
+        price = exchange.get_price(symbol)
+        trader.positions.update(symbol, trade_amount=100 / price, trade_price=price, min_qty=0.001, is_buy=True)
+
+    for symbol in exchange.symbols[positions:positions + orders]:
+        price = exchange.get_price(symbol)
+        order = exchange.place_order(symbol, OrderSide.BUY, OrderType.LIMIT, f"{100 / price:.3f}",
+                                     f"{price * 0.5:.4f}")
+        trader.buy_orders_dict.setdefault(symbol, []).append(order)
+    return trader
+
+
+def bench_get_data(trader, repeat: int):
+    def scan(kline_cache):
+        config.kline_cache = kline_cache
+        with redirect_stdout(io.StringIO()):
+            main.get_data(trader)
+
+    results = {'get_data': measure(lambda: scan(False), repeat)}
+    scan(True)
+    results['get_data(kline_cache)'] = measure(lambda: scan(True), repeat)
+    return results
+
+
+def bench_start(trader, repeat: int):
+    def cycle():
+        with redirect_stdout(io.StringIO()):
+            trader.start()
+
+    return {'start': measure(cycle, repeat, number=10)}
+
+
+def bench_tickers(trader, repeat: int):
+    http_client = trader.http_client
+    trader.http_client = SnapshotGateway(http_client)
+    try:
+        return {'tickers': measure(trader.get_all_tickers, repeat, number=10)}
+    finally:
+        trader.http_client = http_client
+
+
+def bench_positions(count: int, repeat: int):
+    rand = random.Random(0)
+    positions = Positions(POSITIONS_FILE)
+    symbols = [f"SIM{i}USDT" for i in range(count)]
+    for symbol in symbols:
+        positions.update(symbol, trade_amount=1, trade_price=100, min_qty=0.001, is_buy=True)
+
+    def update():
+        for symbol in symbols:
+            positions.update(symbol, trade_amount=0.1, trade_price=100 + rand.random(), min_qty=0.001, is_buy=True)
+
+    def save():
+        positions.dirty = True
+        positions.save_data()
+
+    results = {'positions.update': measure(update, repeat, number=10), 'positions.save_data': measure(save, repeat)}
+    get_file_path(POSITIONS_FILE).unlink(missing_ok=True)
+    return results
+
+
+def bench_rounding(repeat: int, count: int = 10000):
+    rand = random.Random(0)
+    prices = [rand.uniform(0.01, 60000) for _ in range(count)]
+    quantizer = SymbolQuantizer(tick_size='0.01', step_size='0.001')
+
+    def rounding():
+        for price in prices:
+            round_to(price, 0.01)
+            floor_to(100 / price, 0.001)
+
+    def quantizing():
+        for price in prices:
+            quantizer.round_price(price)
+            quantizer.floor_qty(100 / price)
+
+    best, median = measure(rounding, repeat)
+    quantizer_best, quantizer_median = measure(quantizing, repeat)
+    return {'round_to+floor_to': (best / count, median / count),
+            'quantizer.round_price+floor_qty': (quantizer_best / count, quantizer_median / count)}
+
+
+def run(symbol_counts, orders: int, positions: int, repeat: int, output: str):
+    results = {}
+
+    def add(params: str, case_results: dict):
+        for name, (best, median) in case_results.items():
+            key = f"{name} {params}".strip()
+            results[key] = {'best': best, 'median': median}
+            print(f"{key:<60} {best * 1000:>12.4f} {median * 1000:>12.4f}")
+
+    print(f"{'case':<60} {'best(ms)':>12} {'median(ms)':>12}")
+    add('', bench_rounding(repeat))
+    for count in symbol_counts:
+        trader = create_trader(count, min(orders, count), min(positions, count))
+        params = f"symbols={count}"
+        add(params, bench_get_data(trader, repeat))
+        add(f"{params} orders={min(orders, count)} positions={min(positions, count)}", bench_start(trader, repeat))
+        add(params, bench_tickers(trader, repeat))
+        add(f"positions={count}", bench_positions(count, repeat))
+    get_file_path(POSITIONS_FILE).unlink(missing_ok=True)
+
+    if output:
+        baseline = {'time': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                    'numpy': np.__version__, 'machine': platform.machine(), 'repeat': repeat, 'results': results}
+        with open(output, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"saved the results into {output}")
+    return results
+
+
+def compare(baseline_file: str, current_file: str, threshold: float):
+    """
+    compare the seconds of the cases in both files.
+    :return: the regressed cases.
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)['results']
+    with open(current_file) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'case':<60} {'baseline(ms)':>13} {'current(ms)':>12} {'change':>8}")
+    for key, result in current.items():
+        if key not in baseline:
+            print(f"{key:<60} {'':>13} {result['best'] * 1000:>12.4f} {'new':>8}")
+            continue
+
+        change = result['best'] / baseline[key]['best'] - 1
+        median_change = result['median'] / baseline[key]['median'] - 1
+        flag = ''
+        if min(change, median_change) > threshold:
+            flag = ' REGRESSION'
+            regressions.append(key)
+        print(f"{key:<60} {baseline[key]['best'] * 1000:>13.4f} {result['best'] * 1000:>12.4f} "
+              f"{change:>+8.1%}{flag}")
+
+    print(f"{len(regressions)} regressions over {threshold:.0%}." if regressions else "no regressions.")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m benchmark.suite')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument('--symbols', type=int, nargs='+', default=[100, 1000, 5000])
+    run_parser.add_argument('--orders', type=int, default=50)
+    run_parser.add_argument('--positions', type=int, default=20)
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--output', default='')
+
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='the slowdown flagged, 0.1 is 10%%.')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.symbols, args.orders, args.positions, args.repeat, args.output)
+    else:
+        sys.exit(1 if compare(args.baseline, args.current, args.threshold) else 0)
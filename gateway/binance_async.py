@@ -0,0 +1,299 @@
+"""
+    Asyncio Binance future and spot http requests, the methods have the same names, parameters and return values as
+    BinanceFutureHttp and BinanceSpotHttp, but you need to await them:
+
+        http_client = AsyncBinanceFutureHttp(api_key, secret)
+        klines = await http_client.get_kline('BTCUSDT', Interval.HOUR_1, limit=100)
+        await http_client.close()
+
+    it needs the aiohttp library: pip install aiohttp
+"""
+
+import time
+import hmac
+import asyncio
+import hashlib
+from datetime import datetime
+from threading import Lock
+
+import aiohttp
+
+from gateway.binance_future import RequestMethod, Interval, OrderSide, OrderType
+from gateway.rate_limiter import get_rate_limiter
+from gateway.retry_policy import RetryPolicy
+from gateway.decoders import loads, decode_book_tickers, decode_order
+from utils.metrics import metrics
+
+
+class AsyncBinanceHttp(object):
+    """
+    the requests shared by the future and spot, the subclass provides the paths.
+    """
+
+    host = ""
+    client_order_id_prefix = ""
+
+    def __init__(self, api_key=None, secret=None, host=None, proxy_host="", proxy_port=0, timeout=5, try_counts=5,
+                 pool_size=100, retry_policy=None, fast_decode=False):
+        """
+        :param pool_size: the max connections in flight, the other requests wait for a free connection.
+        :param retry_policy: the RetryPolicy, the default is RetryPolicy(try_counts, timeout).
+        :param fast_decode: decode the tickers and the orders into typed structures, see gateway/decoders.py.
+        """
+        self.api_key = api_key
+        self.secret = secret
+        self.host = host if host else self.host
+        self.recv_window = 5000
+        self.timeout = timeout
+        self.order_count_lock = Lock()
+        self.order_count = 1_000_000
+        self.try_counts = try_counts  # 失败尝试的次数.
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.pool_size = pool_size
+        self.session = None
+        # shared with the sync clients of the same host.
+        self.rate_limiter = get_rate_limiter(self.host)
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy(try_counts=try_counts, timeout=timeout)
+        self.timeout = self.retry_policy.timeout  # the policy's deadline counts on the requests' timeout.
+        self.fast_decode = fast_decode
+
+    @property
+    def proxy(self):
+        if self.proxy_host and self.proxy_port:
+            return f"http://{self.proxy_host}:{self.proxy_port}"
+        return None
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def build_parameters(self, params: dict):
+        return '&'.join([f"{key}={params[key]}" for key in params.keys()])
+
+    def _timestamp(self):
+        return int(time.time() * 1000)
+
+    def _sign(self, params):
+        query_string = self.build_parameters(params)
+        hex_digest = hmac.new(self.secret.encode('utf8'), query_string.encode("utf-8"), hashlib.sha256).hexdigest()
+        return query_string + '&signature=' + str(hex_digest)
+
+    async def request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1,
+                      bulk=False):
+        """
+        the request with the retries, its latency and result are recorded in utils/metrics.py.
+        """
+        endpoint = f"{req_method.value} {path}"
+        with metrics.timer('request_seconds', endpoint=endpoint):
+            data = await self._request(req_method, path, requery_dict, verify, weight, bulk)
+        metrics.count_request(endpoint, data)
+        return data
+
+    async def _request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1,
+                       bulk=False):
+        headers = {"X-MBX-APIKEY": self.api_key} if self.api_key else {}
+
+        if self.session is None:
+            # the session must be created in the event loop.
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size),
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+        orders = 1 if req_method == RequestMethod.POST and path == self.order_path else 0
+        breaker = self.retry_policy.get_breaker(f"{req_method.value} {path}")
+        deadline = time.monotonic() + self.retry_policy.max_time
+
+        for i in range(0, self.retry_policy.try_counts):
+            if i > 0:
+                metrics.inc('request_retries_total', endpoint=f"{req_method.value} {path}")
+            if not breaker.allow():
+                print(f"请求:{path} 连续失败, 暂停请求{breaker.reset_timeout}秒")
+                return None
+            if not await self.rate_limiter.acquire_async(weight, orders, bulk,
+                                                         timeout=deadline - time.monotonic() - self.timeout):
+                print(f"请求:{path} 超过频率限制, 不能在{self.retry_policy.max_time}秒内发送")
+                return None
+
+            url = self.host + path
+            if verify:
+                # a new timestamp and signature every try, the exchange rejects the ones older than the recvWindow.
+                if 'timestamp' in requery_dict:
+                    requery_dict = dict(requery_dict, timestamp=self._timestamp())
+                url += '?' + self._sign(requery_dict)
+            elif requery_dict:
+                url += '?' + self.build_parameters(requery_dict)
+
+            status_code, retry_after = None, None
+            try:
+                async with self.session.request(req_method.value, url, headers=headers, proxy=self.proxy) as response:
+                    self.rate_limiter.update(response.status, response.headers)
+                    status_code, retry_after = response.status, response.headers.get('Retry-After')
+                    if response.status == 200:
+                        breaker.record_success()
+                        if self.fast_decode:
+                            return loads(await response.read())
+                        return await response.json(content_type=None)
+                    else:
+                        text = await response.text()
+                        print(f"请求没有成功, code: {response.status}, text: {text}")
+            except Exception as error:
+                print(f"请求:{path}, 发生了错误: {error}, 时间: {datetime.now()}")
+
+            if self.retry_policy.is_failure(status_code):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            delay = self.retry_policy.retry_delay(i, status_code, retry_after, deadline)
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
+        return None
+
+    def decode(self, data, decoder):
+        """
+        decode the payload with the decoder of gateway/decoders.py if the client is created with fast_decode.
+        """
+        if not self.fast_decode or data is None:
+            return data
+        return decoder(data)
+
+    def get_client_order_id(self):
+        """
+        generate the client_order_id for user.
+        :return: new client order id
+        """
+        with self.order_count_lock:
+            self.order_count += 1
+            return self.client_order_id_prefix + str(self._timestamp()) + str(self.order_count)
+
+    async def get_kline(self, symbol, interval: Interval, start_time=None, end_time=None, limit=500, max_try_time=10):
+        query_dict = {
+            "symbol": symbol,
+            "interval": interval.value,
+            "limit": limit
+        }
+
+        if start_time:
+            query_dict['startTime'] = start_time
+
+        if end_time:
+            query_dict['endTime'] = end_time
+
+        for i in range(max_try_time):
+            data = await self.request(RequestMethod.GET, self.kline_path, query_dict, weight=self.kline_weight(limit),
+                                      bulk=True)
+            if isinstance(data, list) and len(data):
+                return data
+            if data is None:
+                break  # the request has failed after the retries of the retry policy.
+        return []
+
+    async def get_ticker(self, symbol):
+        return await self.request(RequestMethod.GET, self.ticker_path, {"symbol": symbol})
+
+    async def get_all_tickers(self):
+        return self.decode(await self.request(RequestMethod.GET, self.ticker_path, weight=self.all_tickers_weight),
+                           decode_book_tickers)
+
+    async def place_order(self, symbol: str, order_side: OrderSide, order_type: OrderType, quantity, price,
+                          time_inforce="GTC", client_order_id=None, stop_price=0):
+        if client_order_id is None:
+            client_order_id = self.get_client_order_id()
+
+        params = {
+            "symbol": symbol,
+            "side": order_side.value,
+            "type": order_type.value,
+            "quantity": quantity,
+            "price": price,
+            "recvWindow": self.recv_window,
+            "timestamp": self._timestamp(),
+            "newClientOrderId": client_order_id
+        }
+
+        if order_type == OrderType.LIMIT:
+            params['timeInForce'] = time_inforce
+
+        if order_type == OrderType.MARKET:
+            if params.get('price'):
+                del params['price']
+
+        if order_type == OrderType.STOP:
+            if stop_price > 0:
+                params["stopPrice"] = stop_price
+            else:
+                raise ValueError("stopPrice must greater than 0")
+
+        return self.decode(await self.request(RequestMethod.POST, self.order_path, requery_dict=params, verify=True),
+                           decode_order)
+
+    async def get_order(self, symbol, client_order_id: str = ""):
+        params = {"symbol": symbol, "timestamp": self._timestamp()}
+        if client_order_id:
+            params["origClientOrderId"] = client_order_id
+
+        return self.decode(await self.request(RequestMethod.GET, self.order_path, params, verify=True), decode_order)
+
+    async def cancel_order(self, symbol, client_order_id: str = ""):
+        params = {"symbol": symbol, "timestamp": self._timestamp()}
+        if client_order_id:
+            params["origClientOrderId"] = client_order_id
+
+        return self.decode(await self.request(RequestMethod.DELETE, self.order_path, params, verify=True), decode_order)
+
+    async def get_open_orders(self, symbol: str = ""):
+        params = {"timestamp": self._timestamp()}
+        if symbol:
+            params["symbol"] = symbol
+
+        return self.decode(await self.request(RequestMethod.GET, self.open_orders_path, params, verify=True,
+                                              weight=self.symbol_open_orders_weight if symbol else
+                                              self.open_orders_weight), decode_order)
+
+
+class AsyncBinanceFutureHttp(AsyncBinanceHttp):
+    host = "https://fapi.binance.com"
+    client_order_id_prefix = "x-cLbi5uMH"
+    kline_path = "/fapi/v1/klines"
+    ticker_path = "/fapi/v1/ticker/bookTicker"
+    order_path = "/fapi/v1/order"
+    open_orders_path = "/fapi/v1/openOrders"
+    all_tickers_weight = 5
+    open_orders_weight = 40
+    symbol_open_orders_weight = 1
+
+    def kline_weight(self, limit):
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+    async def exchangeInfo(self):
+        data = await self.request(RequestMethod.GET, '/fapi/v1/exchangeInfo')
+        if isinstance(data, dict):
+            self.rate_limiter.set_rate_limits(data.get('rateLimits'))
+        return data
+
+
+class AsyncBinanceSpotHttp(AsyncBinanceHttp):
+    host = "https://api.binance.com"
+    client_order_id_prefix = "x-A6SIDXVS"
+    kline_path = "/api/v3/klines"
+    ticker_path = "/api/v3/ticker/bookTicker"
+    order_path = "/api/v3/order"
+    open_orders_path = "/api/v3/openOrders"
+    all_tickers_weight = 4
+    open_orders_weight = 80
+    symbol_open_orders_weight = 6
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recv_window = 10000
+
+    def kline_weight(self, limit):
+        return 2
+
+    async def get_exchange_info(self):
+        data = await self.request(RequestMethod.GET, '/api/v3/exchangeInfo', weight=20)
+        if isinstance(data, dict):
+            self.rate_limiter.set_rate_limits(data.get('rateLimits'))
+        return data
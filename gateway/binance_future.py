@@ -22,12 +22,17 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import hmac
 import hashlib
 from enum import Enum
 from threading import Thread, Lock
 from datetime import datetime
+from gateway.rate_limiter import get_rate_limiter
+from gateway.retry_policy import RetryPolicy
+from gateway.decoders import loads, decode_book_tickers, decode_order
+from utils.metrics import metrics
 
 
 class OrderStatus(object):
@@ -84,10 +89,12 @@ class OrderSide(Enum):
 
 class BinanceFutureHttp(object):
 
-    def __init__(self, api_key=None, secret=None, host=None, proxy_host="", proxy_port=0, timeout=5, try_counts=5):
+    def __init__(self, api_key=None, secret=None, host=None, proxy_host="", proxy_port=0, timeout=5, try_counts=5,
+                 stream_host=None, pool_size=10, retry_policy=None, fast_decode=False):
         self.key = api_key
         self.secret = secret
         self.host = host if host else "https://fapi.binance.com"
+        self.stream_host = stream_host if stream_host else "wss://fstream.binance.com"
         self.recv_window = 5000
         self.timeout = timeout
         self.order_count_lock = Lock()
@@ -96,6 +103,22 @@ class BinanceFutureHttp(object):
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
 
+        # keep the connections alive and reuse them, pool_size is the max connections kept for every host.
+        # pool_size=0 means every request opens a new connection.
+        self.session = None
+        if pool_size > 0:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+
+        # the clients of the same host share the request weight limits.
+        self.rate_limiter = get_rate_limiter(self.host)
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy(try_counts=try_counts, timeout=timeout)
+        self.timeout = self.retry_policy.timeout  # the policy's deadline counts on the requests' timeout.
+        # decode the tickers and the orders into typed structures, see gateway/decoders.py.
+        self.fast_decode = fast_decode
+
     @property
     def proxies(self):
         if self.proxy_host and self.proxy_port:
@@ -108,27 +131,101 @@ class BinanceFutureHttp(object):
         keys.sort()
         return '&'.join([f"{key}={params[key]}" for key in params.keys()])
 
-    def request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False):
-        url = self.host + path
+    def request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1, bulk=False):
+        """
+        :param weight: the request weight of the path.
+        :param bulk: the low priority requests (klines), they wait if the weight is needed by the orders.
+        """
+        endpoint = f"{req_method.value} {path}"
+        with metrics.timer('request_seconds', endpoint=endpoint):
+            data = self._request(req_method, path, requery_dict, verify, weight, bulk)
+        metrics.count_request(endpoint, data)
+        return data
 
-        if verify:
-            query_str = self._sign(requery_dict)
-            url += '?' + query_str
-        elif requery_dict:
-            url += '?' + self.build_parameters(requery_dict)
+    def _request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1, bulk=False):
         headers = {"X-MBX-APIKEY": self.key}
-
-        for i in range(0, self.try_counts):
+        orders = 1 if req_method == RequestMethod.POST and path.endswith('/order') else 0
+
+        breaker = self.retry_policy.get_breaker(f"{req_method.value} {path}")
+        deadline = time.monotonic() + self.retry_policy.max_time
+
+        for i in range(0, self.retry_policy.try_counts):
+            if i > 0:
+                metrics.inc('request_retries_total', endpoint=f"{req_method.value} {path}")
+            if not breaker.allow():
+                print(f"请求:{path} 连续失败, 暂停请求{breaker.reset_timeout}秒")
+                return None
+            if not self.rate_limiter.acquire(weight, orders, bulk, timeout=deadline - time.monotonic() - self.timeout):
+                print(f"请求:{path} 超过频率限制, 不能在{self.retry_policy.max_time}秒内发送")
+                return None
+
+            url = self.host + path
+            if verify:
+                # a new timestamp and signature every try, the exchange rejects the ones older than the recvWindow.
+                if 'timestamp' in requery_dict:
+                    requery_dict = dict(requery_dict, timestamp=self._timestamp())
+                url += '?' + self._sign(requery_dict)
+            elif requery_dict:
+                url += '?' + self.build_parameters(requery_dict)
+
+            status_code, retry_after = None, None
             try:
-                response = requests.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
-                                            proxies=self.proxies)
+                if self.session:
+                    response = self.session.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
+                                                    proxies=self.proxies)
+                else:
+                    response = requests.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
+                                                proxies=self.proxies)
+                self.rate_limiter.update(response.status_code, response.headers)
+                status_code, retry_after = response.status_code, response.headers.get('Retry-After')
                 if response.status_code == 200:
-                    return response.json()
+                    breaker.record_success()
+                    return loads(response.content) if self.fast_decode else response.json()
                 else:
-                    print(f"请求没有成功, code: {response.status_code}, text: {response.text} 继续尝试请求")
+                    print(f"请求没有成功, code: {response.status_code}, text: {response.text}")
             except Exception as error:
                 print(f"请求:{path}, 发生了错误: {error}, 时间: {datetime.now()}")
-                time.sleep(3)
+
+            if self.retry_policy.is_failure(status_code):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            delay = self.retry_policy.retry_delay(i, status_code, retry_after, deadline)
+            if delay is None:
+                return None
+            time.sleep(delay)
+        return None
+
+    def decode(self, data, decoder):
+        """
+        decode the payload with the decoder of gateway/decoders.py if the client is created with fast_decode.
+        """
+        if not self.fast_decode or data is None:
+            return data
+        return decoder(data)
+
+    def connection_stats(self):
+        """
+        the requests and the new connections of every host, the connections are reused if requests > connections.
+        :return: {'https://fapi.binance.com:443': {'requests': 100, 'connections': 2}}
+        """
+        stats = {}
+        if not self.session:
+            return stats
+
+        for adapter in set(self.session.adapters.values()):
+            managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+            for manager in managers:
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                    host_stats = stats.setdefault(host, {'requests': 0, 'connections': 0})
+                    host_stats['requests'] += pool.num_requests
+                    host_stats['connections'] += pool.num_connections
+        return stats
 
     def server_time(self):
         path = '/fapi/v1/time'
@@ -155,7 +252,10 @@ class BinanceFutureHttp(object):
         """
 
         path = '/fapi/v1/exchangeInfo'
-        return self.request(req_method=RequestMethod.GET, path=path)
+        data = self.request(req_method=RequestMethod.GET, path=path)
+        if isinstance(data, dict):
+            self.rate_limiter.set_rate_limits(data.get('rateLimits'))
+        return data
 
     def order_book(self, symbol, limit=5):
         limits = [5, 10, 20, 50, 100, 500, 1000]
@@ -167,7 +267,8 @@ class BinanceFutureHttp(object):
                       "limit": limit
                       }
 
-        return self.request(RequestMethod.GET, path, query_dict)
+        weight = 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+        return self.request(RequestMethod.GET, path, query_dict, weight=weight)
 
     def get_kline(self, symbol, interval: Interval, start_time=None, end_time=None, limit=500, max_try_time=10):
         """
@@ -207,10 +308,13 @@ class BinanceFutureHttp(object):
         if end_time:
             query_dict['endTime'] = end_time
 
+        weight = 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
         for i in range(max_try_time):
-            data = self.request(RequestMethod.GET, path, query_dict)
+            data = self.request(RequestMethod.GET, path, query_dict, weight=weight, bulk=True)
             if isinstance(data, list) and len(data):
                 return data
+            if data is None:
+                break  # the request has failed after the retries of the retry policy.
         return []
 
     def get_latest_price(self, symbol):
@@ -225,7 +329,7 @@ class BinanceFutureHttp(object):
 
     def get_all_tickers(self):
         path = "/fapi/v1/ticker/bookTicker"
-        return self.request(RequestMethod.GET, path)
+        return self.decode(self.request(RequestMethod.GET, path, weight=5), decode_book_tickers)
 
     ########################### the following request is for private data ########################
 
@@ -299,7 +403,8 @@ class BinanceFutureHttp(object):
             else:
                 raise ValueError("stopPrice must greater than 0")
 
-        return self.request(RequestMethod.POST, path=path, requery_dict=params, verify=True)
+        return self.decode(self.request(RequestMethod.POST, path=path, requery_dict=params, verify=True),
+                           decode_order)
 
     def get_order(self, symbol, client_order_id: str = ""):
         path = "/fapi/v1/order"
@@ -307,7 +412,7 @@ class BinanceFutureHttp(object):
         if client_order_id:
             params["origClientOrderId"] = client_order_id
 
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.decode(self.request(RequestMethod.GET, path, params, verify=True), decode_order)
 
     def cancel_order(self, symbol, client_order_id: str = ""):
         path = "/fapi/v1/order"
@@ -315,7 +420,7 @@ class BinanceFutureHttp(object):
         if client_order_id:
             params["origClientOrderId"] = client_order_id
 
-        return self.request(RequestMethod.DELETE, path, params, verify=True)
+        return self.decode(self.request(RequestMethod.DELETE, path, params, verify=True), decode_order)
 
     def get_open_orders(self, symbol: str = ""):
         path = "/fapi/v1/openOrders"
@@ -324,7 +429,8 @@ class BinanceFutureHttp(object):
         if symbol:
             params["symbol"] = symbol
 
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.decode(self.request(RequestMethod.GET, path, params, verify=True, weight=1 if symbol else 40),
+                           decode_order)
 
     def cancel_open_orders(self, symbol):
         """
@@ -341,6 +447,22 @@ class BinanceFutureHttp(object):
 
         return self.request(RequestMethod.DELETE, path, params, verify=True)
 
+    def get_listen_key(self):
+        """
+        create the listen key of the user data stream, it expires in 60 minutes without keep alive.
+        :return: {"listenKey": "pqia91ma19a5s61cv6a81va65sdf19v8a65a1a5s61cv6a81va65sdf19v8a65a1"}
+        """
+        path = "/fapi/v1/listenKey"
+        return self.request(RequestMethod.POST, path)
+
+    def keep_alive_listen_key(self, listen_key: str = ""):
+        path = "/fapi/v1/listenKey"
+        return self.request(RequestMethod.PUT, path)
+
+    def close_listen_key(self, listen_key: str = ""):
+        path = "/fapi/v1/listenKey"
+        return self.request(RequestMethod.DELETE, path)
+
     def get_balance(self):
         """
         [{
@@ -359,7 +481,7 @@ class BinanceFutureHttp(object):
         path = "/fapi/v2/balance"
         params = {"timestamp": self._timestamp()}
 
-        return self.request(RequestMethod.GET, path=path, requery_dict=params, verify=True)
+        return self.request(RequestMethod.GET, path=path, requery_dict=params, verify=True, weight=5)
 
     def get_account_info(self):
         """
@@ -374,7 +496,7 @@ class BinanceFutureHttp(object):
         """
         path = "/fapi/v1/account"
         params = {"timestamp": self._timestamp()}
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.request(RequestMethod.GET, path, params, verify=True, weight=5)
 
     def get_position_info(self):
         """
@@ -383,4 +505,4 @@ class BinanceFutureHttp(object):
         """
         path = "/fapi/v2/positionRisk"
         params = {"timestamp": self._timestamp()}
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.request(RequestMethod.GET, path, params, verify=True, weight=5)
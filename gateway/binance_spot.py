@@ -17,12 +17,17 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import hmac
 import hashlib
 from enum import Enum
 from threading import Lock
 from decimal import Decimal
+from gateway.rate_limiter import get_rate_limiter
+from gateway.retry_policy import RetryPolicy
+from gateway.decoders import loads, decode_book_tickers, decode_order
+from utils.metrics import metrics
 
 
 class OrderStatus(Enum):
@@ -79,10 +84,12 @@ class OrderSide(Enum):
 
 class BinanceSpotHttp(object):
 
-    def __init__(self, api_key=None, secret=None, host=None, proxy_host=None, proxy_port=0, timeout=5, try_counts=5):
+    def __init__(self, api_key=None, secret=None, host=None, proxy_host=None, proxy_port=0, timeout=5, try_counts=5,
+                 stream_host=None, pool_size=10, retry_policy=None, fast_decode=False):
         self.api_key = api_key
         self.secret = secret
         self.host = host if host else "https://api.binance.com"
+        self.stream_host = stream_host if stream_host else "wss://stream.binance.com:9443"
         self.recv_window = 10000
         self.timeout = timeout
         self.order_count_lock = Lock()
@@ -91,6 +98,22 @@ class BinanceSpotHttp(object):
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
 
+        # keep the connections alive and reuse them, pool_size is the max connections kept for every host.
+        # pool_size=0 means every request opens a new connection.
+        self.session = None
+        if pool_size > 0:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+
+        # the clients of the same host share the request weight limits.
+        self.rate_limiter = get_rate_limiter(self.host)
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy(try_counts=try_counts, timeout=timeout)
+        self.timeout = self.retry_policy.timeout  # the policy's deadline counts on the requests' timeout.
+        # decode the tickers and the orders into typed structures, see gateway/decoders.py.
+        self.fast_decode = fast_decode
+
     @property
     def proxies(self):
         if self.proxy_host and self.proxy_port:
@@ -104,28 +127,101 @@ class BinanceSpotHttp(object):
         keys.sort()
         return '&'.join([f"{key}={params[key]}" for key in params.keys()])
 
-    def request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False):
-        url = self.host + path
+    def request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1, bulk=False):
+        """
+        :param weight: the request weight of the path.
+        :param bulk: the low priority requests (klines), they wait if the weight is needed by the orders.
+        """
+        endpoint = f"{req_method.value} {path}"
+        with metrics.timer('request_seconds', endpoint=endpoint):
+            data = self._request(req_method, path, requery_dict, verify, weight, bulk)
+        metrics.count_request(endpoint, data)
+        return data
 
-        if verify:
-            query_str = self._sign(requery_dict)
-            url += '?' + query_str
-        elif requery_dict:
-            url += '?' + self.build_parameters(requery_dict)
+    def _request(self, req_method: RequestMethod, path: str, requery_dict=None, verify=False, weight=1, bulk=False):
         headers = {"X-MBX-APIKEY": self.api_key}
-        for i in range(0, self.try_counts):
+        orders = 1 if req_method == RequestMethod.POST and path.endswith('/order') else 0
+        breaker = self.retry_policy.get_breaker(f"{req_method.value} {path}")
+        deadline = time.monotonic() + self.retry_policy.max_time
+
+        for i in range(0, self.retry_policy.try_counts):
+            if i > 0:
+                metrics.inc('request_retries_total', endpoint=f"{req_method.value} {path}")
+            if not breaker.allow():
+                print(f"请求:{path} 连续失败, 暂停请求{breaker.reset_timeout}秒")
+                return None
+            if not self.rate_limiter.acquire(weight, orders, bulk, timeout=deadline - time.monotonic() - self.timeout):
+                print(f"请求:{path} 超过频率限制, 不能在{self.retry_policy.max_time}秒内发送")
+                return None
+
+            url = self.host + path
+            if verify:
+                # a new timestamp and signature every try, the exchange rejects the ones older than the recvWindow.
+                if 'timestamp' in requery_dict:
+                    requery_dict = dict(requery_dict, timestamp=self.get_current_timestamp())
+                url += '?' + self._sign(requery_dict)
+            elif requery_dict:
+                url += '?' + self.build_parameters(requery_dict)
+
+            status_code, retry_after = None, None
             try:
-                response = requests.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
-                                            proxies=self.proxies)
+                if self.session:
+                    response = self.session.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
+                                                    proxies=self.proxies)
+                else:
+                    response = requests.request(req_method.value, url=url, headers=headers, timeout=self.timeout,
+                                                proxies=self.proxies)
+                self.rate_limiter.update(response.status_code, response.headers)
+                status_code, retry_after = response.status_code, response.headers.get('Retry-After')
                 if response.status_code == 200:
-                    return response.json()
+                    breaker.record_success()
+                    return loads(response.content) if self.fast_decode else response.json()
                 else:
-                    print(f"请求没有成功, code: {response.status_code}, text: {response.text} 继续尝试请求")
+                    print(f"请求没有成功, code: {response.status_code}, text: {response.text}")
             except Exception as error:
                 print(f"请求:{path}, 发生了错误: {error}")
-                time.sleep(3)
+
+            if self.retry_policy.is_failure(status_code):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            delay = self.retry_policy.retry_delay(i, status_code, retry_after, deadline)
+            if delay is None:
+                return None
+            time.sleep(delay)
         return None
 
+    def decode(self, data, decoder):
+        """
+        decode the payload with the decoder of gateway/decoders.py if the client is created with fast_decode.
+        """
+        if not self.fast_decode or data is None:
+            return data
+        return decoder(data)
+
+    def connection_stats(self):
+        """
+        the requests and the new connections of every host, the connections are reused if requests > connections.
+        :return: {'https://fapi.binance.com:443': {'requests': 100, 'connections': 2}}
+        """
+        stats = {}
+        if not self.session:
+            return stats
+
+        for adapter in set(self.session.adapters.values()):
+            managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+            for manager in managers:
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                    host_stats = stats.setdefault(host, {'requests': 0, 'connections': 0})
+                    host_stats['requests'] += pool.num_requests
+                    host_stats['connections'] += pool.num_connections
+        return stats
+
     def get_server_time(self):
         path = '/api/v3/time'
         return self.request(req_method=RequestMethod.GET, path=path)
@@ -152,7 +248,10 @@ class BinanceSpotHttp(object):
         """
 
         path = '/api/v3/exchangeInfo'
-        return self.request(req_method=RequestMethod.GET, path=path)
+        data = self.request(req_method=RequestMethod.GET, path=path, weight=20)
+        if isinstance(data, dict):
+            self.rate_limiter.set_rate_limits(data.get('rateLimits'))
+        return data
 
     def get_order_book(self, symbol, limit=5):
         """
@@ -169,7 +268,8 @@ class BinanceSpotHttp(object):
                       "limit": limit
                       }
 
-        return self.request(RequestMethod.GET, path, query_dict)
+        weight = 5 if limit <= 100 else 25 if limit <= 500 else 50
+        return self.request(RequestMethod.GET, path, query_dict, weight=weight)
 
     def get_kline(self, symbol, interval: Interval, start_time=None, end_time=None, limit=500, max_try_time=10):
         """
@@ -197,9 +297,11 @@ class BinanceSpotHttp(object):
             query_dict['endTime'] = end_time
 
         for i in range(max_try_time):
-            data = self.request(RequestMethod.GET, path, query_dict)
+            data = self.request(RequestMethod.GET, path, query_dict, weight=2, bulk=True)
             if isinstance(data, list) and len(data):
                 return data
+            if data is None:
+                break  # the request has failed after the retries of the retry policy.
 
     def get_latest_price(self, symbol):
         """
@@ -222,7 +324,7 @@ class BinanceSpotHttp(object):
         """
         path = "/api/v3/ticker/bookTicker"
         query_dict = {"symbol": symbol}
-        return self.request(RequestMethod.GET, path, query_dict)
+        return self.request(RequestMethod.GET, path, query_dict, weight=2)
 
     def get_all_tickers(self):
         """
@@ -234,7 +336,7 @@ class BinanceSpotHttp(object):
         }
         """
         path = "/api/v3/ticker/bookTicker"
-        return self.request(RequestMethod.GET, path)
+        return self.decode(self.request(RequestMethod.GET, path, weight=4), decode_book_tickers)
 
     def get_client_order_id(self):
         """
@@ -307,7 +409,8 @@ class BinanceSpotHttp(object):
             else:
                 raise ValueError("stopPrice must greater than 0")
 
-        return self.request(RequestMethod.POST, path=path, requery_dict=params, verify=True)
+        return self.decode(self.request(RequestMethod.POST, path=path, requery_dict=params, verify=True),
+                           decode_order)
 
     def get_order(self, symbol: str, client_order_id: str = ""):
         """
@@ -321,13 +424,13 @@ class BinanceSpotHttp(object):
         if client_order_id:
             prams["origClientOrderId"] = client_order_id
 
-        return self.request(RequestMethod.GET, path, prams, verify=True)
+        return self.decode(self.request(RequestMethod.GET, path, prams, verify=True, weight=4), decode_order)
 
     def get_all_orders(self, symbol:str):
         path = "/api/v3/allOrders"
         prams = {"symbol": symbol, "timestamp": self.get_current_timestamp()}
 
-        return self.request(RequestMethod.GET, path, prams, verify=True)
+        return self.request(RequestMethod.GET, path, prams, verify=True, weight=20)
 
     def cancel_order(self, symbol, client_order_id):
         """
@@ -343,7 +446,7 @@ class BinanceSpotHttp(object):
 
         for i in range(0, 3):
             try:
-                order = self.request(RequestMethod.DELETE, path, params, verify=True)
+                order = self.decode(self.request(RequestMethod.DELETE, path, params, verify=True), decode_order)
                 return order
             except Exception as error:
                 print(f'cancel order error:{error}')
@@ -361,7 +464,8 @@ class BinanceSpotHttp(object):
         if symbol:
             params["symbol"] = symbol
 
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.decode(self.request(RequestMethod.GET, path, params, verify=True, weight=6 if symbol else 80),
+                           decode_order)
 
     def cancel_open_orders(self, symbol):
         """
@@ -378,6 +482,22 @@ class BinanceSpotHttp(object):
 
         return self.request(RequestMethod.DELETE, path, params, verify=True)
 
+    def get_listen_key(self):
+        """
+        创建用户数据流的listen key, 60分钟没有延长有效期就会过期.
+        :return: {"listenKey": "pqia91ma19a5s61cv6a81va65sdf19v8a65a1a5s61cv6a81va65sdf19v8a65a1"}
+        """
+        path = "/api/v3/userDataStream"
+        return self.request(RequestMethod.POST, path)
+
+    def keep_alive_listen_key(self, listen_key: str):
+        path = "/api/v3/userDataStream"
+        return self.request(RequestMethod.PUT, path, {"listenKey": listen_key})
+
+    def close_listen_key(self, listen_key: str):
+        path = "/api/v3/userDataStream"
+        return self.request(RequestMethod.DELETE, path, {"listenKey": listen_key})
+
     def get_account_info(self):
         """
         {'feeTier': 2, 'canTrade': True, 'canDeposit': True, 'canWithdraw': True, 'updateTime': 0, 'totalInitialMargin': '0.00000000',
@@ -393,4 +513,4 @@ class BinanceSpotHttp(object):
         params = {"timestamp": self.get_current_timestamp(),
                   "recvWindow": self.recv_window
                   }
-        return self.request(RequestMethod.GET, path, params, verify=True)
+        return self.request(RequestMethod.GET, path, params, verify=True, weight=20)
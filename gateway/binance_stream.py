@@ -0,0 +1,240 @@
+"""
+    Binance websocket streams.
+
+    1. UserDataStream: the order updates (ORDER_TRADE_UPDATE on future, executionReport on spot) are kept in the
+    orders dict by clientOrderId in the same format as get_order's response, so the trader can use them instead of
+    requesting every order. The orders dict is cleared when the stream reconnects, because we may have missed some
+    updates, and the trader falls back to request the orders until the new updates arrive.
+
+    2. TickerStream: the bookTicker of the subscribed symbols, written into the trader's tickers_dict in place. The
+    trader falls back to request all the tickers when the stream is stale or a symbol has no update yet.
+
+    it needs the websocket-client library: pip install websocket-client
+"""
+
+import json
+import time
+from threading import Thread, Lock
+
+import websocket
+
+
+def parse_order_event(data: dict):
+    """
+    convert the order event to the order format of get_order, return None if it's not an order event.
+    """
+    if data.get('e') == 'ORDER_TRADE_UPDATE':
+        item = data.get('o', {})
+    elif data.get('e') == 'executionReport':
+        item = data
+    else:
+        return None
+
+    # the spot canceled order's original client order id is in 'C', and 'c' is the cancel request's id.
+    client_order_id = item.get('c')
+    if item.get('X') == 'CANCELED' and item.get('C'):
+        client_order_id = item.get('C')
+
+    return {'symbol': item.get('s'), 'orderId': item.get('i'), 'clientOrderId': client_order_id,
+            'side': item.get('S'), 'type': item.get('o'), 'status': item.get('X'), 'price': item.get('p'),
+            'origQty': item.get('q'), 'executedQty': item.get('z'), 'lastFilledQty': item.get('l'),
+            'lastFilledPrice': item.get('L'), 'updateTime': item.get('T'), 'eventTime': data.get('E')}
+
+
+class BinanceStream(object):
+    """
+    the websocket connection which reconnects automatically, the subclass provides the url and handles the messages.
+    """
+
+    def __init__(self, http_client, reconnect_interval=3):
+        self.http_client = http_client
+        self.reconnect_interval = reconnect_interval
+        self.connected = False
+        self.running = False
+        self.ws = None
+
+    def start(self):
+        self.running = True
+        Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        if self.ws:
+            self.ws.close()
+
+    def get_url(self):
+        """
+        the url to connect, None means we can't connect now and try later.
+        """
+        raise NotImplementedError
+
+    def on_open(self, ws):
+        pass
+
+    def on_message(self, ws, data):
+        pass
+
+    def _run(self):
+        while self.running:
+            url = self.get_url()
+            if url:
+                self.ws = websocket.WebSocketApp(url, on_open=self._on_open, on_message=self._on_message,
+                                                 on_error=self._on_error, on_close=self._on_close)
+                self.ws.run_forever(ping_interval=60, ping_timeout=10)
+
+            self.connected = False
+            if self.running:
+                time.sleep(self.reconnect_interval)
+
+    def _on_open(self, ws):
+        self.on_open(ws)
+        self.connected = True
+        print(f"{self.__class__.__name__} is connected.")
+
+    def _on_message(self, ws, message):
+        self.on_message(ws, json.loads(message))
+
+    def _on_error(self, ws, error):
+        print(f"{self.__class__.__name__} error: {error}")
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        self.connected = False
+        print(f"{self.__class__.__name__} is closed, code: {close_status_code}, msg: {close_msg}")
+
+
+class UserDataStream(BinanceStream):
+
+    def __init__(self, http_client, on_order_update=None, keep_alive_interval=30 * 60, reconnect_interval=3):
+        """
+        :param http_client: BinanceFutureHttp or BinanceSpotHttp, to create and keep alive the listen key.
+        :param on_order_update: callback with the order (in get_order's format) after every order update.
+        :param keep_alive_interval: the seconds to keep alive the listen key, it expires in 60 minutes.
+        :param reconnect_interval: the seconds to wait before reconnecting.
+        """
+        super().__init__(http_client, reconnect_interval)
+        self.on_order_update = on_order_update
+        self.keep_alive_interval = keep_alive_interval
+
+        self.orders = {}  # the latest order updates {clientOrderId: order}
+        self.lock = Lock()
+        self.listen_key = None
+
+    def start(self):
+        super().start()
+        Thread(target=self._keep_alive, daemon=True).start()
+
+    def get_order(self, client_order_id: str):
+        """
+        the latest update of the order since the stream connected, None if there is no update.
+        """
+        if not self.connected:
+            return None
+        with self.lock:
+            return self.orders.get(client_order_id)
+
+    def prune(self, client_order_ids):
+        """
+        remove the updates of the orders we don't track any more.
+        """
+        with self.lock:
+            for client_order_id in list(self.orders.keys()):
+                if client_order_id not in client_order_ids:
+                    del self.orders[client_order_id]
+
+    def get_url(self):
+        data = self.http_client.get_listen_key()
+        self.listen_key = data.get('listenKey') if isinstance(data, dict) else None
+        if self.listen_key:
+            return f"{self.http_client.stream_host}/ws/{self.listen_key}"
+
+    def _keep_alive(self):
+        while self.running:
+            time.sleep(self.keep_alive_interval)
+            if self.listen_key:
+                self.http_client.keep_alive_listen_key(self.listen_key)
+
+    def on_open(self, ws):
+        with self.lock:
+            self.orders = {}
+
+    def on_message(self, ws, data):
+        if data.get('e') == 'listenKeyExpired':
+            ws.close()
+            return
+
+        order = parse_order_event(data)
+        if order is None:
+            return
+
+        with self.lock:
+            self.orders[order['clientOrderId']] = order
+
+        if self.on_order_update:
+            self.on_order_update(order)
+
+
+class TickerStream(BinanceStream):
+
+    def __init__(self, http_client, tickers_dict: dict, stale_seconds=30, reconnect_interval=3, on_ticker=None):
+        """
+        :param http_client: BinanceFutureHttp or BinanceSpotHttp, for the stream host.
+        :param tickers_dict: the trader's tickers_dict, updated in place {symbol: {'bid_price':, 'ask_price':}}
+        :param stale_seconds: the stream is stale if there is no message in the seconds.
+        :param on_ticker: called with (symbol, bid_price, ask_price) after the tickers_dict is updated.
+        """
+        super().__init__(http_client, reconnect_interval)
+        self.tickers_dict = tickers_dict
+        self.on_ticker = on_ticker
+        self.stale_seconds = stale_seconds
+        self.symbols = set()  # the symbols we want to subscribe.
+        self.subscribed = set()  # the symbols subscribed on the current connection.
+        self.updated = set()  # the symbols received the bookTicker since the stream connected.
+        self.lock = Lock()
+        self.request_id = 0
+        self.last_message_time = 0
+
+    def is_alive(self):
+        return self.connected and time.time() - self.last_message_time < self.stale_seconds
+
+    def subscribe(self, symbols):
+        """
+        subscribe the symbols, and unsubscribe the symbols not in the list.
+        :return: the symbols which have no bookTicker from the stream yet.
+        """
+        with self.lock:
+            self.symbols = set(symbols)
+            if self.connected and self.ws:
+                self._send_subscriptions(self.ws)
+            return [symbol for symbol in self.symbols if symbol not in self.updated]
+
+    def _send_subscriptions(self, ws):
+        new_symbols = self.symbols - self.subscribed
+        old_symbols = self.subscribed - self.symbols
+        for method, symbols in (('UNSUBSCRIBE', old_symbols), ('SUBSCRIBE', new_symbols)):
+            if symbols:
+                self.request_id += 1
+                ws.send(json.dumps({'method': method, 'params': [f"{symbol.lower()}@bookTicker" for symbol in symbols],
+                                    'id': self.request_id}))
+        self.subscribed = set(self.symbols)
+        self.updated &= self.subscribed
+
+    def get_url(self):
+        return f"{self.http_client.stream_host}/ws"
+
+    def on_open(self, ws):
+        with self.lock:
+            self.subscribed = set()
+            self.updated = set()
+            self.last_message_time = time.time()
+            self._send_subscriptions(ws)
+
+    def on_message(self, ws, data):
+        self.last_message_time = time.time()
+        symbol = data.get('s')
+        if symbol and 'b' in data and 'a' in data:
+            bid_price, ask_price = float(data['b']), float(data['a'])
+            self.tickers_dict[symbol] = {"bid_price": bid_price, "ask_price": ask_price}
+            with self.lock:
+                self.updated.add(symbol)
+            if self.on_ticker:
+                self.on_ticker(symbol, bid_price, ask_price)
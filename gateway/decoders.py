@@ -0,0 +1,116 @@
+"""
+    Decode the exchange's payloads into typed structures, for the gateways created with fast_decode=True.
+
+    the generic payloads are lists and dicts of strings, the traders convert them with float() field by field in the
+    loop. The decoders convert them once:
+
+    1. bookTicker of all the symbols -> BookTickers, the bid and ask prices in numpy arrays.
+    2. klines -> a float64 numpy array (klines x 11), the columns are the same as the binance kline without the ignored
+    last one, stack_klines uses it without converting the strings.
+    3. orders -> the same dict with the numbers as floats, so the traders' float() calls are free.
+
+    the responses are parsed with orjson if it's installed (pip install orjson), else with the json module. The
+    exchangeInfo is not decoded, the traders parse it once into the symbols_dict and the quantizers.
+
+        http_client = BinanceFutureHttp(fast_decode=True)
+        tickers = http_client.get_all_tickers()  # BookTickers
+        tickers.get('BTCUSDT')  # {'bid_price': 26000.1, 'ask_price': 26000.2}
+"""
+
+import json
+
+import numpy as np
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+KLINE_FIELDS = 11  # the last field of a binance kline is ignored.
+ORDER_NUMBER_FIELDS = ('price', 'origQty', 'executedQty', 'cumQuote', 'cummulativeQuoteQty', 'avgPrice', 'stopPrice',
+                       'origQuoteOrderQty', 'activatePrice', 'priceRate')
+
+
+class BookTickers(object):
+    """
+    the bid and ask prices of all the symbols, the prices of the symbol at symbols[i] are at index i of the arrays.
+    """
+
+    __slots__ = ('symbols', 'bid_price', 'ask_price', '_index')
+
+    def __init__(self, symbols: list, bid_price: np.ndarray, ask_price: np.ndarray):
+        self.symbols = symbols
+        self.bid_price = bid_price
+        self.ask_price = ask_price
+        self._index = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._index
+
+    def get(self, symbol: str, default=None):
+        """
+        :return: the ticker in the format of the traders' tickers_dict: {'bid_price': 1.0, 'ask_price': 1.1}
+        """
+        i = self.index.get(symbol)
+        if i is None:
+            return default
+        return {"bid_price": float(self.bid_price[i]), "ask_price": float(self.ask_price[i])}
+
+    def to_dict(self):
+        """
+        :return: {symbol: {'bid_price': 1.0, 'ask_price': 1.1}}, the traders' tickers_dict.
+        """
+        return {symbol: {"bid_price": bid_price, "ask_price": ask_price} for symbol, bid_price, ask_price in
+                zip(self.symbols, self.bid_price.tolist(), self.ask_price.tolist())}
+
+
+def decode_book_tickers(data: list) -> BookTickers:
+    """
+    :param data: [{'symbol': 'BTCUSDT', 'bidPrice': '26000.1', 'bidQty': '1.2', 'askPrice': '26000.2', ...}, ...]
+    """
+    # the quantities are not used by the traders, they are not converted.
+    return BookTickers([item['symbol'] for item in data],
+                       np.array([float(item['bidPrice']) for item in data], dtype=np.float64),
+                       np.array([float(item['askPrice']) for item in data], dtype=np.float64))
+
+
+def remove_stale_tickers(tickers_dict: dict, symbols):
+    """
+    remove the tickers of the symbols which are not in the symbols, the tickers_dict is updated in place because the
+    ticker stream and the accounts share it.
+    """
+    for symbol in [symbol for symbol in list(tickers_dict.keys()) if symbol not in symbols]:
+        tickers_dict.pop(symbol, None)
+
+
+def decode_klines(data: list) -> np.ndarray:
+    """
+    :param data: the klines of get_kline.
+    :return: a float64 array of shape (len(data), 11).
+    """
+    if not data:
+        return np.empty((0, KLINE_FIELDS), dtype=np.float64)
+    return np.array([kline[:KLINE_FIELDS] for kline in data], dtype=np.float64)
+
+
+def decode_order(data):
+    """
+    convert the numbers of the order (or the list of orders) to floats, the other fields are the same.
+    """
+    if isinstance(data, list):
+        return [decode_order(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    for key in ORDER_NUMBER_FIELDS:
+        value = data.get(key)
+        if isinstance(value, str):
+            data[key] = float(value)
+    return data
@@ -0,0 +1,236 @@
+"""
+    The request weight limiter shared by all the http clients of the same host in the process.
+
+    binance limits the request weight (and the order count) of every ip in the intervals listed in the rateLimits of
+    exchangeInfo, it answers 429 when we exceed the limit and bans the ip (418) if we keep requesting. The limiter
+    keeps a token bucket for every rate limit and waits before sending a request that would exceed it:
+
+    1. the buckets are seeded from exchangeInfo's rateLimits, before that a conservative 1200 weight per minute is used.
+    2. every response's X-MBX-USED-WEIGHT-* and X-MBX-ORDER-COUNT-* headers correct the buckets, so the weight used by
+    the other clients on the same ip is counted too.
+    3. the bulk requests (klines) leave a reserve of the weight to the orders, so a big scan never delays the orders.
+    4. a 429/418 pauses all the requests of the host until the Retry-After seconds.
+
+        rate_limiter = get_rate_limiter("https://fapi.binance.com")
+        rate_limiter.acquire(weight=5, bulk=True)
+        rate_limiter.budget()  # {'REQUEST_WEIGHT_1M': {'limit': 2400, 'used': 5, 'available': 2395}, 'paused': 0}
+"""
+
+import re
+import time
+import asyncio
+from threading import Lock
+
+INTERVAL_SECONDS = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}
+HEADER_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+HEADER_PATTERN = re.compile(r'x-mbx-(used-weight|order-count)-(\d+)([smhd])$', re.IGNORECASE)
+
+
+class TokenBucket(object):
+    """
+    the bucket is refilled to the limit at the start of every interval, the intervals are aligned to the clock like the
+    windows the exchange counts the weight in.
+    """
+
+    def __init__(self, limit: int, interval: int):
+        self.limit = limit
+        self.interval = interval
+        self.window = 0  # the start time of the current interval.
+        self.used = 0
+
+    @property
+    def tokens(self):
+        return self.limit - self.used
+
+    def refill(self, now: float):
+        window = now - now % self.interval
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def wait_time(self, amount: int, now: float, reserve: float = 0):
+        """
+        the seconds to wait until the bucket has the amount of tokens above the reserve.
+        """
+        if self.used + amount + reserve <= self.limit:
+            return 0
+        return self.window + self.interval - now
+
+    def correct(self, used: int):
+        """
+        the exchange counted the used weight of the ip in the current interval, including the other clients.
+        """
+        self.used = max(self.used, used)
+
+
+class RateLimiter(object):
+
+    def __init__(self, weight_limit=1200, order_reserve=0.2):
+        """
+        :param weight_limit: the request weight per minute before the rateLimits of exchangeInfo are known.
+        :param order_reserve: the share of the weight the bulk requests leave to the other requests.
+        """
+        self.order_reserve = order_reserve
+        self.lock = Lock()
+        self.buckets = {('REQUEST_WEIGHT', 60): TokenBucket(weight_limit, 60)}  # {(rateLimitType, seconds): bucket}
+        self.paused_until = 0
+        self.waiting = 0  # the non-bulk requests waiting for the weight, the bulk requests wait after them.
+
+    def set_rate_limits(self, rate_limits: list):
+        """
+        seed the buckets from the rateLimits of exchangeInfo.
+        [{'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 2400},
+        {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 300}]
+        """
+        buckets = {}
+        for item in rate_limits or []:
+            if item.get('rateLimitType') not in ('REQUEST_WEIGHT', 'ORDERS'):
+                continue
+            seconds = INTERVAL_SECONDS.get(item.get('interval'), 60) * item.get('intervalNum', 1)
+            buckets[(item['rateLimitType'], seconds)] = TokenBucket(int(item['limit']), seconds)
+
+        if not buckets:
+            return
+
+        with self.lock:
+            now = time.time()
+            for key, bucket in buckets.items():
+                # keep what we have used of the old bucket.
+                old_bucket = self.buckets.get(key)
+                bucket.refill(now)
+                if old_bucket and old_bucket.window == bucket.window:
+                    bucket.used = old_bucket.used
+            self.buckets = buckets
+
+    def try_acquire(self, weight=1, orders=0, bulk=False):
+        """
+        take the tokens if all the buckets have them.
+        :return: 0 if the tokens are taken, else the seconds to wait before trying again.
+        """
+        with self.lock:
+            now = time.time()
+            if self.paused_until > now:
+                return self.paused_until - now
+
+            wait_time = 0
+            for (limit_type, seconds), bucket in self.buckets.items():
+                amount = weight if limit_type == 'REQUEST_WEIGHT' else orders
+                if amount <= 0:
+                    continue
+                bucket.refill(now)
+                reserve = bucket.limit * self.order_reserve if bulk else 0
+                wait_time = max(wait_time, bucket.wait_time(amount, now, reserve))
+
+            if bulk and self.waiting > 0:
+                wait_time = max(wait_time, 0.05)
+
+            if wait_time > 0:
+                return wait_time
+
+            for (limit_type, seconds), bucket in self.buckets.items():
+                bucket.used += weight if limit_type == 'REQUEST_WEIGHT' else orders
+            return 0
+
+    def acquire(self, weight=1, orders=0, bulk=False, timeout=None):
+        """
+        wait until the request can be sent without exceeding the rate limits.
+        :param weight: the request weight.
+        :param orders: 1 if the request places an order.
+        :param bulk: the low priority requests like klines, they leave the reserve to the others.
+        :param timeout: the max seconds to wait, None means no limit.
+        :return: False if the request can't be sent in the timeout.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        self._wait(bulk, 1)
+        try:
+            while True:
+                wait_time = self.try_acquire(weight, orders, bulk)
+                if wait_time <= 0:
+                    return True
+                if deadline is not None and time.monotonic() + wait_time > deadline:
+                    return False
+                time.sleep(wait_time)
+        finally:
+            self._wait(bulk, -1)
+
+    async def acquire_async(self, weight=1, orders=0, bulk=False, timeout=None):
+        """
+        the same as acquire for the asyncio clients.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        self._wait(bulk, 1)
+        try:
+            while True:
+                wait_time = self.try_acquire(weight, orders, bulk)
+                if wait_time <= 0:
+                    return True
+                if deadline is not None and time.monotonic() + wait_time > deadline:
+                    return False
+                await asyncio.sleep(wait_time)
+        finally:
+            self._wait(bulk, -1)
+
+    def _wait(self, bulk: bool, count: int):
+        if not bulk:
+            with self.lock:
+                self.waiting += count
+
+    def update(self, status_code: int, headers):
+        """
+        correct the buckets with the response headers, and pause the requests if the exchange rejected them.
+        :param headers: the response headers, case insensitive.
+        """
+        with self.lock:
+            now = time.time()
+            for name, value in headers.items():
+                match = HEADER_PATTERN.match(name)
+                if not match:
+                    continue
+                limit_type = 'REQUEST_WEIGHT' if match.group(1).lower() == 'used-weight' else 'ORDERS'
+                seconds = int(match.group(2)) * HEADER_UNIT_SECONDS[match.group(3).lower()]
+                bucket = self.buckets.get((limit_type, seconds))
+                if bucket:
+                    bucket.refill(now)
+                    bucket.correct(int(value))
+
+            if status_code in (418, 429):
+                retry_after = headers.get('Retry-After')
+                pause = float(retry_after) if retry_after else 60
+                self.paused_until = max(self.paused_until, now + pause)
+                print(f"请求超过频率限制, code: {status_code}, 暂停请求{pause}秒")
+
+    def budget(self):
+        """
+        the current budget of every rate limit, for monitoring.
+        :return: {'REQUEST_WEIGHT_1M': {'limit': 2400, 'used': 100, 'available': 2300}, 'paused': 0}
+        """
+        budget = {}
+        with self.lock:
+            now = time.time()
+            for (limit_type, seconds), bucket in self.buckets.items():
+                bucket.refill(now)
+                budget[f"{limit_type}_{format_interval(seconds)}"] = {
+                    'limit': bucket.limit, 'used': bucket.used, 'available': bucket.tokens}
+            budget['paused'] = round(max(self.paused_until - now, 0), 3)
+        return budget
+
+
+def format_interval(seconds: int):
+    for unit, unit_seconds in (('D', 86400), ('H', 3600), ('M', 60)):
+        if seconds % unit_seconds == 0:
+            return f"{seconds // unit_seconds}{unit}"
+    return f"{seconds}S"
+
+
+rate_limiters = {}
+rate_limiters_lock = Lock()
+
+
+def get_rate_limiter(host: str):
+    """
+    the rate limiter of the host, the clients of the same host share it.
+    """
+    with rate_limiters_lock:
+        if host not in rate_limiters:
+            rate_limiters[host] = RateLimiter()
+        return rate_limiters[host]
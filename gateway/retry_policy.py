@@ -0,0 +1,132 @@
+"""
+    The retry policy of the gateways' requests.
+
+    1. the failed requests (network errors, 5xx, 429) are retried with the exponential backoff and jitter, the other
+    4xx are the request's fault (like the order doesn't exist), retrying them gives the same answer.
+    2. the 429 waits the Retry-After seconds, the 418 (the ip is banned) is not retried.
+    3. a request never blocks more than max_time seconds including all the retries, a new try is only sent if it can
+    finish before the deadline, so a failing exchange can't block the trading loop for minutes.
+    4. every endpoint has a circuit breaker, after failure_threshold failures in a row the endpoint fails fast without
+    requests for reset_timeout seconds, then one request tries it again.
+
+        policy = RetryPolicy(try_counts=5, timeout=5, max_time=30)
+        policy.worst_case_time()  # the max seconds a request can block.
+"""
+
+import time
+import random
+from threading import Lock
+
+
+class CircuitBreaker(object):
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        :param failure_threshold: open the breaker after the failures in a row, 0 means never open.
+        :param reset_timeout: the seconds the open breaker fails fast before trying the endpoint again.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_time = 0
+        self.lock = Lock()
+
+    @property
+    def is_open(self):
+        return 0 < self.failure_threshold <= self.failures
+
+    def allow(self):
+        """
+        whether the request can be sent, only one request is let through after the reset_timeout of the open breaker.
+        """
+        with self.lock:
+            if not self.is_open:
+                return True
+            now = time.monotonic()
+            if now - self.opened_time >= self.reset_timeout:
+                self.opened_time = now
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.is_open:
+                self.opened_time = time.monotonic()
+
+
+class RetryPolicy(object):
+
+    def __init__(self, try_counts=5, timeout=5, max_time=30, base_delay=0.5, max_delay=8, failure_threshold=5,
+                 reset_timeout=30):
+        """
+        :param try_counts: the max tries of a request.
+        :param timeout: the seconds of a request's timeout.
+        :param max_time: the max seconds a request blocks including the retries.
+        :param base_delay: the delay before the first retry, doubled after every retry.
+        :param max_delay: the max delay between the retries.
+        :param failure_threshold: the failures in a row to open the endpoint's circuit breaker, 0 means no breaker.
+        :param reset_timeout: the seconds the open breaker fails fast.
+        """
+        self.try_counts = max(try_counts, 1)
+        self.timeout = timeout
+        self.max_time = max_time
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}  # {endpoint: CircuitBreaker}
+        self.lock = Lock()
+
+    def get_breaker(self, endpoint: str):
+        with self.lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[endpoint]
+
+    def is_failure(self, status_code):
+        """
+        the endpoint failed if the request had no response or a server error, None means no response.
+        """
+        return status_code is None or status_code >= 500
+
+    def backoff(self, attempt: int):
+        """
+        the exponential backoff with the equal jitter, between half and the whole of the exponential delay.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def retry_delay(self, attempt: int, status_code, retry_after, deadline: float):
+        """
+        the seconds to wait before the next try, None means don't retry.
+        :param attempt: the tries already sent minus 1.
+        :param status_code: the response's status code, None means the request had no response.
+        :param retry_after: the response's Retry-After header.
+        :param deadline: the time.monotonic() the request must finish before.
+        """
+        if attempt + 1 >= self.try_counts:
+            return None
+
+        if status_code == 429 and retry_after:
+            delay = float(retry_after)
+        elif status_code is None or status_code >= 500 or status_code == 429:
+            delay = self.backoff(attempt)
+        else:
+            return None  # 418 and the other 4xx.
+
+        if time.monotonic() + delay + self.timeout > deadline:
+            return None
+        return delay
+
+    def worst_case_time(self):
+        """
+        the max seconds a request can block, the tries which can't finish before max_time are not sent.
+        """
+        total = self.try_counts * self.timeout
+        total += sum(min(self.max_delay, self.base_delay * 2 ** attempt) for attempt in range(self.try_counts - 1))
+        return min(total, max(self.max_time, self.timeout))  # the first try is always sent.
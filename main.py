@@ -16,6 +16,7 @@
 """
 
 import time
+import asyncio
 import logging
 from trader.binance_spot_trader import BinanceSpotTrader
 from trader.binance_future_trader import BinanceFutureTrader
@@ -30,79 +31,169 @@ logging.getLogger("apscheduler.executors.default").setLevel(logging.WARNING)
 logger = logging.getLogger('binance')
 from typing import Union
 from gateway.binance_future import Interval
-import numpy as np
-import pandas as pd
 from datetime import datetime
-
-pd.set_option('expand_frame_repr', False)
+from concurrent.futures import ThreadPoolExecutor
 
 from utils.config import signal_data
+from utils.signals import stack_klines, calculate_signals
+from gateway.decoders import decode_klines
+from utils.metrics import metrics
+from utils.tracing import tracer
+from utils.market_bus import market_bus
 
 
-def get_data(trader: Union[BinanceFutureTrader, BinanceSpotTrader]):
+def get_symbols(trader: Union[BinanceFutureTrader, BinanceSpotTrader]):
+    """
+    the symbols we scan for signals, after the allowed_lists and blocked_lists filter.
+    """
     # traders.symbols is a dict data structure.
     symbols = trader.symbols_dict.keys()
 
-    signals = []
-
-    # we calculate the signal here.
     if len(config.allowed_lists) > 0:
         symbols = config.allowed_lists
 
-    for symbol in symbols:
+    return [symbol for symbol in symbols if symbol.upper() not in config.blocked_lists]
 
-        if len(config.blocked_lists) > 0:
-            if symbol.upper() in config.blocked_lists:
-                continue
 
-        klines = trader.get_klines(symbol=symbol.upper(), interval=Interval.HOUR_1, limit=100)
-        if len(klines) > 0:
-            df = pd.DataFrame(klines, dtype=np.float64,
-                              columns=['open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'turnover', 'a2',
-                                       'a3', 'a4', 'a5'])
-            df = df[['open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover']]
-            df.set_index('open_time', inplace=True)
-            df.index = pd.to_datetime(df.index, unit='ms') + pd.Timedelta(hours=8)
+def fetch_klines(trader: Union[BinanceFutureTrader, BinanceSpotTrader], symbols: list, interval=Interval.HOUR_1,
+                 limit=100):
+    """
+    fetch the klines of the symbols, with config.kline_workers requests in flight at the same time.
+    :return: a list of (symbol, klines), in the same order as the symbols.
+    """
+    def fetch(symbol):
+        return trader.get_klines(symbol=symbol.upper(), interval=interval, limit=limit)
 
-            df_4hour = df.resample(rule='4H').agg({'open': 'first',
-                                        'high': 'max',
-                                        'low': 'min',
-                                        'close': 'last',
-                                        'volume': 'sum',
-                                        'turnover': 'sum'
-                                        })
+    workers = max(int(config.kline_workers), 1)
+    if workers == 1 or len(symbols) <= 1:
+        return [(symbol, fetch(symbol)) for symbol in symbols]
 
-            # print(df)
+    with ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as executor:
+        # executor.map keeps the input order, so the signals are the same as the sequential path.
+        return list(zip(symbols, executor.map(fetch, symbols)))
 
-            # calculate the pair's price change is one hour. you can modify the code below.
-            pct = df['close'] / df['open'] - 1
-            pct_4h = df_4hour['close']/df_4hour['open'] - 1
 
-            value = {'pct': pct.iloc[-1], 'pct_4h':pct_4h.iloc[-1] , 'symbol': symbol, 'hour_turnover': df['turnover'].iloc[-1]}
+def update_signals(trader: Union[BinanceFutureTrader, BinanceSpotTrader], symbol_klines: list):
+    # we calculate the signal here, you can modify the code in utils/signals.py
+    symbols, data = stack_klines(symbol_klines)
+    signals = calculate_signals(symbols, data)
+    market_bus.publish_klines(symbols, data)
 
-
-            # calculate your signal here.
-            if value['pct'] >= config.pump_pct or value['pct_4h'] >= config.pump_pct_4h:
-                # the signal 1 mean buy signal.
-                value['signal'] = 1
-            elif value['pct'] <= -config.pump_pct or value['pct_4h'] <= -config.pump_pct_4h:
-                value['signal'] = -1
-            else:
-                value['signal'] = 0
-
-            signals.append(value)
+    if config.kline_cache:
+        trader.kline_cache.save()
 
     signals.sort(key=lambda x: x['pct'], reverse=True)
     signal_data['id'] = signal_data['id'] + 1
     signal_data['time'] = datetime.now()
     signal_data['signals'] = signals
+    tracer.emit(signal_data['id'], signals)
+    trader.scheduler.wake('signal')
     print(signal_data)
 
+
+def get_data(trader: Union[BinanceFutureTrader, BinanceSpotTrader]):
+    timer = metrics.phase_timer('scan_seconds')
+    tracer.mark_scan('scan')
+    symbol_klines = fetch_klines(trader, get_symbols(trader))
+    timer.mark('fetch_klines')
+    tracer.mark_scan('klines')
+    update_signals(trader, symbol_klines)
+    timer.mark('signals')
+
+
+async def async_fetch_klines(trader: Union[BinanceFutureTrader, BinanceSpotTrader], http_client, symbols: list,
+                             interval=Interval.HOUR_1, limit=100):
+    """
+    the same as fetch_klines with the asyncio gateway, config.kline_workers requests are in flight at the same time.
+    """
+    semaphore = asyncio.Semaphore(max(int(config.kline_workers), 1))
+
+    async def fetch(symbol):
+        async with semaphore:
+            if config.kline_cache:
+                klines = await trader.kline_cache.async_get_klines(http_client, symbol=symbol.upper(),
+                                                                   interval=interval, limit=limit)
+            else:
+                klines = await http_client.get_kline(symbol=symbol.upper(), interval=interval, limit=limit)
+            return decode_klines(klines) if config.fast_decode else klines
+
+    return list(zip(symbols, await asyncio.gather(*[fetch(symbol) for symbol in symbols])))
+
+
+async def async_get_data(trader: Union[BinanceFutureTrader, BinanceSpotTrader], http_client):
+    """
+    get_data with the asyncio gateway (AsyncBinanceFutureHttp or AsyncBinanceSpotHttp), and the trader's kline cache.
+    """
+    timer = metrics.phase_timer('scan_seconds')
+    tracer.mark_scan('scan')
+    symbol_klines = await async_fetch_klines(trader, http_client, get_symbols(trader))
+    timer.mark('fetch_klines')
+    tracer.mark_scan('klines')
+    update_signals(trader, symbol_klines)
+    timer.mark('signals')
+
+
+async def async_main(trader: Union[BinanceFutureTrader, BinanceSpotTrader]):
+    """
+    run the hourly scan with the asyncio gateway on the event loop instead of the scheduler thread. Only the scan's
+    kline requests are async, trader.start() still uses the blocking gateway in the default executor, so it doesn't
+    block the scan's requests.
+    """
+    from gateway.binance_async import AsyncBinanceFutureHttp, AsyncBinanceSpotHttp
+    from gateway.retry_policy import RetryPolicy
+
+    http_client_class = AsyncBinanceSpotHttp if config.platform == 'binance_spot' else AsyncBinanceFutureHttp
+    http_client = http_client_class(api_key=config.api_key, secret=config.api_secret, proxy_host=config.proxy_host,
+                                    proxy_port=config.proxy_port, fast_decode=config.fast_decode,
+                                    retry_policy=RetryPolicy(max_time=config.request_max_time,
+                                                             failure_threshold=config.circuit_breaker_failures))
+    loop = asyncio.get_running_loop()
+
+    async def scan_every_hour():
+        while True:
+            try:
+                await async_get_data(trader, http_client)
+            except Exception as error:
+                # like the scheduler's job, a failed scan is logged and the next hour scans again.
+                print(f"扫描信号出错: {error}")
+                logging.exception("async scan error")
+            await asyncio.sleep(3600 - time.time() % 3600)
+
+    scan_task = asyncio.create_task(scan_every_hour())
+
+    while not scan_task.done():
+        # wake up on the order updates, the new signals, the tickers crossing the watched prices or the heartbeat.
+        await loop.run_in_executor(None, trader.scheduler.wait)
+        with metrics.timer('trader_cycle_seconds'):
+            await loop.run_in_executor(None, trader.start)
+        trader.watch_prices()
+
+    await http_client.close()
+    scan_task.result()  # raise the scan's exception.
+
+
 if __name__ == '__main__':
 
     config.loads('./config.json')
     print(config.blocked_lists)
 
+    if config.metrics_port:
+        metrics.enable()
+        metrics.start_server(config.metrics_port)
+
+    if config.trace_file:
+        tracer.enable(config.trace_file)
+
+    if config.accounts:
+        # one process requests the market data once and trades all the accounts.
+        from accounts import AccountHost
+        AccountHost(config.accounts).run()
+
+    if config.shards > 1:
+        # the coordinator scans the signals, the worker processes trade the symbols of their shards.
+        from sharding import Coordinator
+        Coordinator(config.shards).run()
+
     if config.platform == 'binance_spot':
         # if you want to trade spot, set the platform to 'binance_spot',  else will trade Binance Future(USDT Base)
         # 如果你交易的是币安现货，就设置config.platform 为 'binance_spot'，否则就交易的是币安永续合约(USDT)
@@ -112,15 +203,33 @@ if __name__ == '__main__':
 
 
     trader.get_exchange_info()
-    get_data(trader)  # for testing
 
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(get_data, trigger='cron', hour='*/1', args=(trader,))
-    scheduler.start()
+    if config.market_bus:
+        # publish the tickers and the klines into the memory-mapped file for the other processes on the host.
+        market_bus.create(config.market_bus, list(trader.symbols_dict.keys()))
+
+    if config.user_data_stream:
+        trader.start_user_stream()
 
-    while True:
-        time.sleep(10)
-        trader.start()
+    if config.ticker_stream:
+        trader.start_ticker_stream()
+
+    if config.use_asyncio:
+        asyncio.run(async_main(trader))
+    else:
+        get_data(trader)  # for testing
+
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(get_data, trigger='cron', hour='*/1', args=(trader,))
+        scheduler.start()
+
+        while True:
+            # wake up on the order updates, the new signals, the tickers crossing the watched prices or the heartbeat,
+            # see utils/scheduler.py.
+            trader.scheduler.wait()
+            with metrics.timer('trader_cycle_seconds'):
+                trader.start()
+            trader.watch_prices()
 
 """
 策略逻辑: 
@@ -0,0 +1,2 @@
+from .worker import shard_of, shard_file, run_worker
+from .coordinator import Coordinator
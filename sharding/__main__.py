@@ -0,0 +1,82 @@
+"""
+    run the sharded mode:
+
+        # trade with the config, 4 worker processes.
+        python -m sharding --config config.json --shards 4
+
+        # trade the SimulatedExchange of 100 symbols through its local http server for 60 seconds, every symbol is a
+        # signal so the max_pairs budget decides the entries, the prices move 10 simulated seconds every second.
+        python -m sharding --simulated 100 --shards 4 --seconds 60 --scan-interval 10
+"""
+
+import time
+import argparse
+from threading import Thread
+
+from utils.config import config
+from utils.utility import get_file_path
+from sharding.coordinator import Coordinator
+from sharding.worker import shard_file
+
+
+def run_simulated(args):
+    from simulator import SimulatedExchange
+    from simulator.http_server import ExchangeHttpServer
+
+    config.turnover_threshold = 0
+    config.pump_pct = config.pump_pct_4h = -1  # every symbol is a signal.
+    config.platform = 'binance_future' if args.market == 'future' else 'binance_spot'
+    exchange = SimulatedExchange(symbol_count=args.simulated, bars=100, market=args.market, match_orders=True,
+                                 volatility=args.volatility, latency=args.latency)
+    server = ExchangeHttpServer(exchange)
+    server.start()
+
+    running = True
+
+    def move_prices():
+        while running:
+            time.sleep(0.1)
+            exchange.advance(1)
+
+    Thread(target=move_prices, daemon=True).start()
+    positions_file = f"simulated_{args.market}_positions.json"  # don't touch the positions of the real bot.
+    coordinator = Coordinator(args.shards, host=server.url, scan_interval=args.scan_interval,
+                              positions_file=positions_file)
+    try:
+        coordinator.run(args.seconds)
+    finally:
+        running = False
+        server.stop()
+
+    print(f"{'shard':>6} {'cycles':>7} {'busy(s)':>8} {'positions':>10} {'total_profit':>13}")
+    for shard, report in sorted(coordinator.reports.items()):
+        print(f"{shard:>6} {report['cycles']:>7} {report['busy']:>8.2f} {report['positions']:>10} "
+              f"{report['total_profit']:>13.4f}")
+    print(f"max_pairs {config.max_pairs}, the most symbols held {coordinator.max_held}, "
+          f"restarts {coordinator.restarts}, orders {len(exchange.orders)}, requests {exchange.request_count}")
+
+    if not args.keep:
+        get_file_path(positions_file).unlink(missing_ok=True)
+        for shard in range(args.shards):
+            get_file_path(shard_file(positions_file, shard)).unlink(missing_ok=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m sharding')
+    parser.add_argument('--config', default='', help='the config json file.')
+    parser.add_argument('--shards', type=int, default=0, help='the worker processes, default is config.shards.')
+    parser.add_argument('--seconds', type=float, default=0, help='stop after the seconds, 0 means forever.')
+    parser.add_argument('--scan-interval', type=float, default=0, help='the seconds between the scans, 0 is hourly.')
+    parser.add_argument('--simulated', type=int, default=0, help='trade the SimulatedExchange of the symbols.')
+    parser.add_argument('--market', choices=['future', 'spot'], default='future')
+    parser.add_argument('--volatility', type=float, default=0.05)
+    parser.add_argument('--latency', type=float, default=0.0, help='the seconds every simulated request sleeps.')
+    parser.add_argument('--keep', action='store_true', help='keep the positions files of the simulated run.')
+    args = parser.parse_args()
+
+    config.loads(args.config or None)
+    args.shards = args.shards or max(config.shards, 1)
+    if args.simulated:
+        run_simulated(args)
+    else:
+        Coordinator(args.shards, scan_interval=args.scan_interval).run(args.seconds or None)
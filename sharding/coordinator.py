@@ -0,0 +1,177 @@
+"""
+    The coordinator of the sharded mode: the symbols are hash partitioned across the worker processes, so a slow
+    symbol (the retries, the cancels) only stalls the loop of its own shard.
+
+    1. the coordinator scans the signals like main.py, then selects the entries with the global max_pairs budget:
+    the symbols the shards reported holding or entering, and the entries sent but not handled by a shard yet.
+    2. every shard receives the entries of its symbols, the shard places them in its next loop.
+    3. the shards report the symbols they hold after every loop, a dead worker is started again with its positions
+    file.
+
+        coordinator = Coordinator(shards=4)
+        coordinator.run()
+"""
+
+import time
+from threading import Thread, Lock
+import multiprocessing
+
+from utils.config import config, signal_data
+from utils.strategy import select_entries
+from utils.positions import Positions
+from utils.utility import get_file_path, save_json
+from sharding.worker import shard_of, shard_file, positions_file_name, create_trader, run_worker
+
+
+class Coordinator(object):
+
+    def __init__(self, shards: int, host: str = None, scan_interval: float = 0, positions_file: str = None):
+        """
+        :param shards: the worker processes.
+        :param host: the rest host of the workers instead of the exchange's, like the ExchangeHttpServer's url.
+        :param scan_interval: the seconds between the scans, 0 means every hour like main.py.
+        :param positions_file: the positions file of the single process mode, the shards add their number to it.
+        """
+        self.shards = shards
+        self.positions_file = positions_file or positions_file_name()
+        self.host = host
+        self.scan_interval = scan_interval
+        self.context = multiprocessing.get_context('spawn')  # the workers don't inherit the threads.
+        self.workers = {}  # {shard: Process}
+        self.commands = {}  # {shard: Queue}
+        self.reports_queue = self.context.Queue()
+        self.reports = {}  # {shard: the last report}
+        self.assigned = {}  # {shard: (signal_id, [symbols])}, the entries sent to the shard.
+        self.lock = Lock()
+        self.published_id = 0
+        self.max_held = 0  # the most symbols held by all the shards at the same time.
+        self.restarts = 0
+        self.scanner = None
+        self.scheduler = None
+
+    def split_positions(self):
+        """
+        split the positions of the single process mode into the files of the shards, if the shards have no files.
+        """
+        file_name = self.positions_file
+        shard_files = [shard_file(file_name, shard) for shard in range(self.shards)]
+        if not get_file_path(file_name).exists() or any(get_file_path(name).exists() for name in shard_files):
+            return
+
+        positions = Positions(file_name, journal=config.positions_journal)
+        for shard, name in enumerate(shard_files):
+            save_json(name, {'total_profit': positions.total_profit if shard == 0 else 0,
+                             'positions': {symbol: pos for symbol, pos in positions.positions.items() if
+                                           shard_of(symbol, self.shards) == shard}})
+        print(f"split {len(positions.positions)} positions of {file_name} into {self.shards} shards.")
+
+    def start_worker(self, shard: int):
+        self.commands[shard] = self.context.Queue()
+        fields = dict(vars(config))
+        worker = self.context.Process(target=run_worker, name=f"shard-{shard}", daemon=True,
+                                      args=(shard, fields, self.commands[shard], self.reports_queue,
+                                            shard_file(self.positions_file, shard), self.host))
+        worker.start()
+        self.workers[shard] = worker
+
+    def start(self):
+        self.split_positions()
+        # scans the signals, never trades, so it has no positions file and no trade store.
+        self.scanner = create_trader(positions_file=None, trade_store_file='')
+        if self.host:
+            self.scanner.http_client.host = self.host
+            self.scanner.http_client.secret = config.api_secret or 'simulated'
+        self.scanner.get_exchange_info()
+
+        for shard in range(self.shards):
+            self.start_worker(shard)
+        Thread(target=self.read_reports, daemon=True).start()
+
+        from main import get_data
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        self.scheduler = BackgroundScheduler()
+        if self.scan_interval:
+            self.scheduler.add_job(get_data, trigger='interval', seconds=self.scan_interval, args=(self.scanner,))
+        else:
+            self.scheduler.add_job(get_data, trigger='cron', hour='*/1', args=(self.scanner,))
+        self.scheduler.start()
+        Thread(target=get_data, args=(self.scanner,), daemon=True).start()
+
+    def read_reports(self):
+        while True:
+            report = self.reports_queue.get()
+            with self.lock:
+                self.reports[report['shard']] = report
+                held = set()
+                for item in self.reports.values():
+                    held.update(item['symbols'])
+                self.max_held = max(self.max_held, len(held))
+
+    def held_symbols(self):
+        """
+        the symbols the shards hold or enter, and the entries not handled by the shards yet.
+        """
+        with self.lock:
+            symbols = set()
+            for shard in range(self.shards):
+                report = self.reports.get(shard, {})
+                symbols.update(report.get('symbols', []))
+                signal_id, entries = self.assigned.get(shard, (0, []))
+                if signal_id > report.get('signal_id', 0):
+                    symbols.update(entries)
+            return symbols
+
+    def publish(self, signal_id: int, signals: list):
+        """
+        select the entries in the max_pairs budget and send them to their shards.
+        :return: the entries.
+        """
+        held = self.held_symbols()
+        entries = select_entries(signals, held, config.max_pairs - len(held))
+        shard_entries = {shard: [] for shard in range(self.shards)}
+        for signal in entries:
+            shard_entries[shard_of(signal['symbol'], self.shards)].append(signal)
+
+        with self.lock:
+            for shard, signals in shard_entries.items():
+                self.assigned[shard] = (signal_id, [signal['symbol'] for signal in signals])
+        for shard, signals in shard_entries.items():
+            self.commands[shard].put(('signals', signal_id, signals))
+        self.published_id = signal_id
+        print(f"signal {signal_id}: {len(held)} symbols held, send {len(entries)} entries to the shards: "
+              f"{[len(signals) for signals in shard_entries.values()]}")
+        return entries
+
+    def check_workers(self):
+        for shard, worker in list(self.workers.items()):
+            if not worker.is_alive():
+                print(f"shard {shard} 的进程退出了, exitcode: {worker.exitcode}, 重新启动")
+                self.restarts += 1
+                self.start_worker(shard)
+
+    def run(self, seconds: float = None):
+        """
+        publish the entries of every scan, until the seconds pass or forever.
+        """
+        self.start()
+        end_time = time.time() + seconds if seconds else None
+        try:
+            while end_time is None or time.time() < end_time:
+                # woken up by update_signals, or every loop_interval to check the workers.
+                self.scanner.scheduler.wait()
+                if signal_data['id'] != self.published_id:
+                    self.publish(signal_data['id'], signal_data.get('signals', []))
+                self.check_workers()
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10):
+        if self.scheduler:
+            self.scheduler.shutdown(wait=False)
+        for shard, commands in self.commands.items():
+            commands.put(('stop',))
+        for worker in self.workers.values():
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
@@ -0,0 +1,121 @@
+"""
+    The worker process of a shard: a trader owning the positions and the orders of the symbols in its hash partition.
+
+    the worker doesn't scan the signals, the coordinator sends the entries it may place, the worker reports the
+    symbols it holds or enters after every loop, so the coordinator can keep the global max_pairs.
+"""
+
+import time
+import zlib
+from threading import Thread
+from pathlib import Path
+
+from utils.config import config, signal_data
+from utils.metrics import metrics
+from utils.tracing import tracer
+
+
+def shard_of(symbol: str, shards: int):
+    """
+    the shard of the symbol, crc32 is the same in every process, the hash() of str is not.
+    """
+    return zlib.crc32(symbol.upper().encode('utf-8')) % shards
+
+
+def shard_file(file_name: str, shard):
+    """
+    'future_positions.json' -> 'future_positions_2.json'
+    """
+    path = Path(file_name)
+    return f"{path.stem}_{shard}{path.suffix}"
+
+
+def positions_file_name():
+    return 'spot_positions.json' if config.platform == 'binance_spot' else 'future_positions.json'
+
+
+def create_trader(positions_file: str, **kwargs):
+    """
+    the trader of config.platform, kwargs are the other params of the trader.
+    """
+    from trader.binance_spot_trader import BinanceSpotTrader
+    from trader.binance_future_trader import BinanceFutureTrader
+
+    if config.platform == 'binance_spot':
+        return BinanceSpotTrader(positions_file=positions_file, **kwargs)
+    return BinanceFutureTrader(positions_file=positions_file, **kwargs)
+
+
+def receive_commands(trader, commands, state: dict):
+    """
+    update signal_data with the entries from the coordinator, and wake up the loop.
+    """
+    while True:
+        command = commands.get()
+        if command[0] == 'stop':
+            state['running'] = False
+            trader.scheduler.wake('stop')
+            return
+        elif command[0] == 'signals':
+            _, signal_id, signals = command
+            signal_data['signals'] = signals
+            signal_data['id'] = signal_id
+            tracer.emit(signal_id, signals)  # the traces of the shard start when it receives the entries.
+            trader.scheduler.wake('signal')
+
+
+def run_worker(shard: int, fields: dict, commands, reports, positions_file: str, host: str = None):
+    """
+    the target of the worker process.
+    :param fields: the config fields of the coordinator.
+    :param commands: the Queue of ('signals', signal_id, entries) or ('stop',) from the coordinator.
+    :param reports: the Queue of the reports to the coordinator.
+    :param positions_file: the positions file of the shard.
+    :param host: the rest host instead of the exchange's, like the ExchangeHttpServer's url.
+    """
+    config._update(fields)
+    # every shard has its own files, the positions file of the shard is its slice of the positions.
+    for name in ('trade_store_file', 'trace_file'):
+        if getattr(config, name):
+            setattr(config, name, shard_file(getattr(config, name), shard))
+    if config.trace_file:
+        tracer.enable(config.trace_file)
+    if config.metrics_port:
+        metrics.enable()
+        metrics.start_server(config.metrics_port + shard + 1)
+
+    trader = create_trader(positions_file)
+    # the clientOrderId is the prefix, the timestamp and the order count, the shards start their counts apart so the
+    # orders of the shards placed in the same millisecond have different ids.
+    trader.http_client.order_count = (shard + 1) * 1_000_000
+    state = {'running': True}
+    if host:
+        trader.http_client.host = host
+        trader.http_client.secret = config.api_secret or 'simulated'
+
+    trader.get_exchange_info()
+    if config.user_data_stream:
+        trader.start_user_stream()
+    if config.ticker_stream:
+        trader.start_ticker_stream()
+
+    Thread(target=receive_commands, args=(trader, commands, state), daemon=True).start()
+
+    cycles, busy = 0, 0.0
+    while state['running']:
+        trader.scheduler.wait()
+        if not state['running']:
+            break
+        start = time.perf_counter()
+        trader.start()
+        trader.watch_prices()
+        busy += time.perf_counter() - start
+        cycles += 1
+
+        symbols = set(trader.positions.positions.keys())
+        symbols.update(symbol for symbol, orders in trader.buy_orders_dict.items() if orders)
+        reports.put({'shard': shard, 'signal_id': trader.initial_id, 'symbols': sorted(symbols),
+                     'positions': len(trader.positions.positions), 'total_profit': trader.positions.total_profit,
+                     'cycles': cycles, 'busy': busy})
+
+    trader.positions.save_data()
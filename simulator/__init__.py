@@ -0,0 +1 @@
+from .exchange import SimulatedExchange
@@ -0,0 +1,481 @@
+"""
+    A local fake exchange for the benchmarks and for running the bot offline.
+
+    It has the same method names as BinanceFutureHttp/BinanceSpotHttp, so you can set it as the trader's http_client:
+
+        trader = BinanceFutureTrader()
+        trader.http_client = SimulatedExchange(symbol_count=300, latency=0.05)
+
+    the klines are random walks generated from the seed, so the same seed always gives the same data.
+
+    with match_orders=True the exchange fills the orders by itself, so the trader's loop runs without a venue:
+
+        exchange = SimulatedExchange(match_orders=True, fill_ratio=0.5, error_rate=0.01)
+        for _ in range(10000):
+            exchange.advance(10)  # move the prices 10 seconds along the random walk, fill the crossed orders.
+            trader.get_all_tickers()
+            trader.start()
+
+    1. a buy order fills when the ask is not higher than its price, a sell order when the bid is not lower, at the
+    order's price. Every match fills fill_ratio of the left quantity, the rest waits for the next match.
+    2. the fills update the balances (spot) or the positions and the wallet balance (future), with the fee.
+    3. every request sleeps the latency (seconds, or a (low, high) range) and fails with the probability error_rate:
+    the method returns None like a failed request of the gateways, the ExchangeHttpServer sends a 503.
+"""
+
+import time
+import random
+from functools import wraps
+from threading import RLock, local
+from gateway.binance_future import Interval
+from utils.kline_cache import INTERVAL_MS
+
+ACTIVE_STATUS = ('NEW', 'PARTIALLY_FILLED')
+
+
+class SimulatedError(Exception):
+    """
+    an injected error of the request.
+    """
+
+
+def simulated_request(method=None, failed=None):
+    """
+    count the request, sleep the latency and inject the errors.
+    :param failed: the type of the result of a failed request like the gateways, get_kline returns a list.
+    """
+    if method is None:
+        return lambda function: simulated_request(function, failed)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.request_count += 1
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = self.rand.uniform(*latency)
+        if latency > 0:
+            time.sleep(latency)
+
+        if self.error_rate > 0 and self.rand.random() < self.error_rate:
+            self.error_count += 1
+            if getattr(self.local, 'raise_errors', False):
+                raise SimulatedError(f"injected error of {method.__name__}")
+            return failed() if failed else None
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class SimulatedExchange(object):
+
+    def __init__(self, symbol_count=100, bars=500, seed=0, latency=0.0, now=None, market='future', rate_limits=None,
+                 match_orders=False, fill_ratio=1.0, error_rate=0.0, balance=100_000, fee=0.0004, volatility=0.02):
+        """
+        :param symbol_count: how many USDT symbols the exchange lists.
+        :param bars: how many 1h klines of history each symbol has.
+        :param seed: the random seed of the price paths.
+        :param latency: the seconds every request sleeps, to emulate the network round trip.
+        :param now: the timestamp in ms of the newest kline, default is the current time.
+        :param market: 'future' or 'spot', the format of the user data stream events.
+        :param rate_limits: the rateLimits of exchangeInfo, enforced by the ExchangeHttpServer.
+        :param match_orders: fill the orders crossed by the prices, False means only fill_order fills them.
+        :param fill_ratio: how much of the left quantity a match fills, 1 means all.
+        :param error_rate: the probability a request fails.
+        :param balance: the USDT balance at the start.
+        :param fee: the commission rate of the fills.
+        :param volatility: the hourly volatility of the random walk of advance.
+        """
+        self.seed = seed
+        self.latency = latency
+        self.bars = bars
+        self.now = now if now else int(time.time() * 1000)
+        self.symbols = [f"SIM{i}USDT" for i in range(symbol_count)]
+        self.klines = {}  # {(symbol, interval): [kline, kline, ...]}
+        self.prices = {}  # {symbol: the close price of the last 1h kline}
+        self.request_count = 0
+        self.kline_count = 0  # how many klines the exchange has sent.
+        self.orders = {}  # {client_order_id: order}
+        self.active_orders = {}  # {client_order_id: order}, the NEW and PARTIALLY_FILLED orders.
+        self.order_id = 0
+        self.market = market
+        self.stream_server = None
+        self.listen_key = 'simulated'
+        self.rate_limits = rate_limits if rate_limits else [
+            {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 2400}]
+
+        self.match_orders = match_orders
+        self.fill_ratio = fill_ratio
+        self.error_rate = error_rate
+        self.error_count = 0
+        self.fee = fee
+        self.volatility = volatility
+        self.rand = random.Random(f"{seed}-exchange")  # the latency, the errors and the random walk of advance.
+        self.local = local()  # the ExchangeHttpServer's threads raise the injected errors.
+        self.lock = RLock()  # the orders and the balances are changed by the server's threads.
+        self.balances = {'USDT': float(balance)}  # {asset: amount}, the wallet balance of the future.
+        self.position_amounts = {}  # {symbol: (position amount, entry price)} of the future.
+
+    def _symbol_info(self, symbol):
+        return {'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:-4], 'quoteAsset': 'USDT',
+                'filters': [{'filterType': 'PRICE_FILTER', 'minPrice': '0.0001', 'maxPrice': '1000000',
+                             'tickSize': '0.0001'},
+                            {'filterType': 'LOT_SIZE', 'minQty': '0.001', 'maxQty': '1000000', 'stepSize': '0.001'},
+                            {'filterType': 'MIN_NOTIONAL', 'notional': '5', 'minNotional': '5'}]}
+
+    @simulated_request
+    def exchangeInfo(self):
+        return {'timezone': 'UTC', 'serverTime': self.now,
+                'rateLimits': self.rate_limits,
+                'symbols': [self._symbol_info(symbol) for symbol in self.symbols]}
+
+    def get_exchange_info(self):
+        return self.exchangeInfo()
+
+    def generate_klines(self, symbol: str, interval: str):
+        """
+        generate the random walk klines of the symbol, the last kline is the one that contains self.now
+        """
+        step = INTERVAL_MS[interval]
+        last_open_time = self.now - self.now % step
+        rand = random.Random(f"{self.seed}-{symbol}-{interval}")
+        price = rand.uniform(0.1, 1000)
+        klines = []
+        for i in range(self.bars):
+            open_time = last_open_time - (self.bars - 1 - i) * step
+            open_price = price
+            close_price = max(open_price * (1 + rand.gauss(0, 0.02)), 0.0001)
+            high_price = max(open_price, close_price) * (1 + abs(rand.gauss(0, 0.005)))
+            low_price = min(open_price, close_price) * (1 - abs(rand.gauss(0, 0.005)))
+            volume = rand.uniform(1_000, 1_000_000)
+            turnover = volume * (open_price + close_price) / 2
+            klines.append([open_time, f"{open_price:.4f}", f"{high_price:.4f}", f"{low_price:.4f}",
+                           f"{close_price:.4f}", f"{volume:.3f}", open_time + step - 1, f"{turnover:.4f}",
+                           rand.randint(100, 10_000), f"{volume / 2:.3f}", f"{turnover / 2:.4f}", "0"])
+            price = close_price
+        return klines
+
+    @simulated_request(failed=list)
+    def get_kline(self, symbol, interval: Interval, start_time=None, end_time=None, limit=500, max_try_time=10):
+        klines = self._get_kline(symbol, interval, start_time, end_time, limit)
+        self.kline_count += len(klines)
+        return klines
+
+    def _get_kline(self, symbol, interval, start_time, end_time, limit):
+        interval = interval.value if isinstance(interval, Interval) else interval
+        key = (symbol, interval)
+        if key not in self.klines:
+            if symbol not in self.symbols:
+                return []
+            self.klines[key] = self.generate_klines(symbol, interval)
+
+        klines = self.klines[key]
+        if start_time:
+            klines = [kline for kline in klines if kline[0] >= start_time]
+            if end_time:
+                klines = [kline for kline in klines if kline[0] <= end_time]
+            return klines[:limit]
+
+        if end_time:
+            klines = [kline for kline in klines if kline[0] <= end_time]
+        return klines[-limit:]
+
+    def get_price(self, symbol: str):
+        """
+        the latest price of the symbol, the close price of the last 1h kline.
+        """
+        price = self.prices.get(symbol)
+        if price is None:
+            klines = self.klines.get((symbol, '1h'))
+            if klines is None:
+                klines = self.klines[(symbol, '1h')] = self.generate_klines(symbol, '1h')
+            price = self.prices[symbol] = float(klines[-1][4])
+        return price
+
+    def set_price(self, symbol: str, price: float):
+        """
+        move the price of the symbol, update the last 1h kline and publish the bookTicker to the stream.
+        """
+        self.get_price(symbol)
+        kline = self.roll_kline(symbol)
+        self.prices[symbol] = round(price, 4)
+        kline[4] = f"{price:.4f}"
+        kline[2] = f"{max(float(kline[2]), price):.4f}"
+        kline[3] = f"{min(float(kline[3]), price):.4f}"
+
+        if self.match_orders:
+            self.match(symbol)
+
+        if self.stream_server:
+            now = int(time.time() * 1000)
+            ticker = self.book_ticker(symbol)
+            self.stream_server.publish_stream(f"{symbol.lower()}@bookTicker",
+                                              {'e': 'bookTicker', 'u': now, 'E': now, 'T': now, 's': symbol,
+                                               'b': ticker['bidPrice'], 'B': ticker['bidQty'],
+                                               'a': ticker['askPrice'], 'A': ticker['askQty']})
+
+    def roll_kline(self, symbol: str):
+        """
+        the 1h kline containing self.now, a new kline is opened at the last close when self.now is in the next hour.
+        """
+        klines = self.klines[(symbol, '1h')]
+        kline = klines[-1]
+        step = INTERVAL_MS['1h']
+        open_time = self.now - self.now % step
+        if open_time > kline[0]:
+            close = kline[4]
+            kline = [open_time, close, close, close, close, "0.000", open_time + step - 1, "0.0000", 0, "0.000",
+                     "0.0000", "0"]
+            klines.append(kline)
+        return kline
+
+    def advance(self, seconds: float = 10, symbols: list = None):
+        """
+        the price path driver: move self.now and the prices of the symbols along the random walk, then fill the
+        orders crossed by the new prices if match_orders.
+        :param symbols: default is all the symbols.
+        """
+        self.now += int(seconds * 1000)
+        sigma = self.volatility * (seconds / 3600) ** 0.5
+        for symbol in symbols if symbols else self.symbols:
+            self.set_price(symbol, max(self.get_price(symbol) * (1 + self.rand.gauss(0, sigma)), 0.0001))
+
+    @simulated_request
+    def get_all_tickers(self):
+        return [self.book_ticker(symbol) for symbol in self.symbols]
+
+    @simulated_request
+    def get_ticker(self, symbol):
+        return self.book_ticker(symbol)
+
+    def book_ticker(self, symbol):
+        price = self.get_price(symbol)
+        return {'symbol': symbol, 'bidPrice': f"{price:.4f}", 'bidQty': '100.000',
+                'askPrice': f"{price + 0.0001:.4f}", 'askQty': '100.000'}
+
+    ########################### orders ########################
+
+    def get_client_order_id(self):
+        self.order_id += 1
+        return f"sim{self.order_id}"
+
+    @simulated_request
+    def place_order(self, symbol: str, order_side, order_type, quantity, price, time_inforce="GTC",
+                    client_order_id=None, recvWindow=5000, stop_price=0):
+        with self.lock:
+            if client_order_id is None:
+                client_order_id = self.get_client_order_id()
+            else:
+                self.order_id += 1
+
+            order = {'symbol': symbol, 'orderId': self.order_id, 'clientOrderId': client_order_id,
+                     'price': str(price), 'origQty': str(quantity), 'executedQty': '0', 'status': 'NEW',
+                     'timeInForce': time_inforce, 'type': order_type.value, 'side': order_side.value,
+                     'updateTime': int(time.time() * 1000)}
+            self.orders[client_order_id] = order
+            self.active_orders[client_order_id] = order
+            self.publish_order(order)
+            if self.match_orders:
+                self.match(symbol)
+            return dict(order)
+
+    def match(self, symbol: str):
+        """
+        fill the open orders of the symbol crossed by the bid and ask prices.
+        """
+        with self.lock:
+            orders = [order for order in self.active_orders.values() if order['symbol'] == symbol]
+            if not orders:
+                return
+            bid_price = self.get_price(symbol)
+            ask_price = round(bid_price + 0.0001, 4)
+            for order in orders:
+                price = float(order['price'])
+                if order['type'] == 'MARKET' or (order['side'] == 'BUY' and ask_price <= price) or \
+                        (order['side'] == 'SELL' and bid_price >= price):
+                    left_qty = float(order['origQty']) - float(order['executedQty'])
+                    qty = round(left_qty * self.fill_ratio, 8) if self.fill_ratio < 1 else left_qty
+                    self.fill_order(order['clientOrderId'], qty if qty > 0 else left_qty,
+                                    price=ask_price if order['side'] == 'BUY' else bid_price)
+
+    def fill_order(self, client_order_id: str, quantity=None, price=None):
+        """
+        fill the order, partially if the quantity is less than the order's quantity.
+        :param price: the price of the market order, the limit orders fill at their price.
+        """
+        with self.lock:
+            order = self.orders[client_order_id]
+            orig_qty = float(order['origQty'])
+            executed_qty = float(order['executedQty'])
+            filled_qty = min(quantity if quantity else orig_qty, orig_qty - executed_qty)
+            executed_qty = executed_qty + filled_qty
+            order['executedQty'] = str(executed_qty)
+            order['status'] = 'FILLED' if executed_qty >= orig_qty else 'PARTIALLY_FILLED'
+            order['updateTime'] = int(time.time() * 1000)
+            if order['status'] == 'FILLED':
+                self.active_orders.pop(client_order_id, None)
+
+            fill_price = price if order['type'] == 'MARKET' and price else float(order['price'])
+            self.apply_fill(order['symbol'], order['side'], filled_qty, fill_price)
+            self.publish_order(order, last_filled_qty=filled_qty)
+            return dict(order)
+
+    def apply_fill(self, symbol: str, side: str, qty: float, price: float):
+        """
+        update the balances of the spot, or the position and the wallet balance of the future.
+        """
+        value, signed_qty = qty * price, qty if side == 'BUY' else -qty
+        fee = value * self.fee
+        if self.market == 'spot':
+            base_asset = symbol[:-4]
+            self.balances[base_asset] = self.balances.get(base_asset, 0.0) + signed_qty
+            self.balances['USDT'] = self.balances['USDT'] - signed_qty * price - fee
+            return
+
+        amount, entry_price = self.position_amounts.get(symbol, (0.0, 0.0))
+        if amount == 0 or (amount > 0) == (signed_qty > 0):
+            entry_price = (amount * entry_price + signed_qty * price) / (amount + signed_qty)
+        else:
+            closed_qty = min(abs(signed_qty), abs(amount))
+            self.balances['USDT'] += closed_qty * (price - entry_price) * (1 if amount > 0 else -1)
+            if abs(signed_qty) > abs(amount):
+                entry_price = price
+        self.balances['USDT'] -= fee
+        amount = amount + signed_qty
+        self.position_amounts[symbol] = (amount, entry_price if abs(amount) > 1e-12 else 0.0)
+
+    @simulated_request
+    def get_order(self, symbol, client_order_id: str = ""):
+        order = self.orders.get(client_order_id)
+        return dict(order) if order else None
+
+    @simulated_request
+    def cancel_order(self, symbol, client_order_id: str = ""):
+        with self.lock:
+            order = self.orders.get(client_order_id)
+            if not order or order['status'] not in ACTIVE_STATUS:
+                return None
+            order['status'] = 'CANCELED'
+            order['updateTime'] = int(time.time() * 1000)
+            self.active_orders.pop(client_order_id, None)
+            self.publish_order(order)
+            return dict(order)
+
+    @simulated_request
+    def get_open_orders(self, symbol: str = ""):
+        return [dict(order) for order in list(self.active_orders.values()) if not symbol or order['symbol'] == symbol]
+
+    ########################### account ########################
+
+    def locked_balances(self):
+        """
+        the spot balances locked by the open orders: the USDT of the buy orders and the asset of the sell orders.
+        """
+        locked = {}
+        for order in list(self.active_orders.values()):
+            left_qty = float(order['origQty']) - float(order['executedQty'])
+            if order['side'] == 'BUY':
+                locked['USDT'] = locked.get('USDT', 0.0) + left_qty * float(order['price'])
+            else:
+                locked[order['symbol'][:-4]] = locked.get(order['symbol'][:-4], 0.0) + left_qty
+        return locked
+
+    def unrealized_profit(self):
+        return sum(amount * (self.get_price(symbol) - entry_price) for symbol, (amount, entry_price) in
+                   list(self.position_amounts.items()))
+
+    @simulated_request
+    def get_balance(self):
+        """
+        the future's balance of the USDT.
+        """
+        balance, unrealized_profit = self.balances['USDT'], self.unrealized_profit()
+        return [{'accountAlias': 'SIM', 'asset': 'USDT', 'balance': f"{balance:.8f}",
+                 'crossWalletBalance': f"{balance:.8f}", 'crossUnPnl': f"{unrealized_profit:.8f}",
+                 'availableBalance': f"{balance + unrealized_profit:.8f}",
+                 'maxWithdrawAmount': f"{balance:.8f}", 'marginAvailable': True, 'updateTime': self.now}]
+
+    @simulated_request
+    def get_account_info(self):
+        """
+        the spot's balances of all the assets, or the future's wallet balance and positions.
+        """
+        if self.market == 'spot':
+            locked = self.locked_balances()
+            return {'makerCommission': 10, 'takerCommission': 10, 'canTrade': True, 'canWithdraw': True,
+                    'canDeposit': True, 'updateTime': self.now, 'accountType': 'SPOT', 'permissions': ['SPOT'],
+                    'balances': [{'asset': asset, 'free': f"{amount - locked.get(asset, 0.0):.8f}",
+                                  'locked': f"{locked.get(asset, 0.0):.8f}"} for asset, amount in
+                                 list(self.balances.items())]}
+
+        balance, unrealized_profit = self.balances['USDT'], self.unrealized_profit()
+        return {'feeTier': 0, 'canTrade': True, 'canDeposit': True, 'canWithdraw': True, 'updateTime': self.now,
+                'totalWalletBalance': f"{balance:.8f}", 'totalUnrealizedProfit': f"{unrealized_profit:.8f}",
+                'totalMarginBalance': f"{balance + unrealized_profit:.8f}",
+                'maxWithdrawAmount': f"{balance:.8f}",
+                'assets': [{'asset': 'USDT', 'walletBalance': f"{balance:.8f}",
+                            'unrealizedProfit': f"{unrealized_profit:.8f}",
+                            'marginBalance': f"{balance + unrealized_profit:.8f}",
+                            'maxWithdrawAmount': f"{balance:.8f}"}],
+                'positions': self.position_risks()}
+
+    @simulated_request
+    def get_position_info(self):
+        return self.position_risks()
+
+    def position_risks(self):
+        positions = []
+        for symbol, (amount, entry_price) in list(self.position_amounts.items()):
+            mark_price = self.get_price(symbol)
+            positions.append({'symbol': symbol, 'positionAmt': f"{amount:.3f}", 'entryPrice': f"{entry_price:.8f}",
+                              'markPrice': f"{mark_price:.8f}",
+                              'unRealizedProfit': f"{amount * (mark_price - entry_price):.8f}",
+                              'liquidationPrice': '0'})
+        return positions
+
+    ########################### user data stream ########################
+
+    def start_stream_server(self):
+        from simulator.stream_server import StreamServer
+
+        self.stream_server = StreamServer()
+        self.stream_server.start()
+        return self.stream_server
+
+    @property
+    def stream_host(self):
+        return self.stream_server.url if self.stream_server else ""
+
+    @simulated_request
+    def get_listen_key(self):
+        return {'listenKey': self.listen_key}
+
+    @simulated_request
+    def keep_alive_listen_key(self, listen_key: str = ""):
+        return {}
+
+    @simulated_request
+    def close_listen_key(self, listen_key: str = ""):
+        return {}
+
+    def publish_order(self, order: dict, last_filled_qty=0):
+        """
+        send the order update to the user data stream, in the format of the market.
+        """
+        if not self.stream_server:
+            return
+
+        now = int(time.time() * 1000)
+        item = {'s': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+                'f': order['timeInForce'], 'q': order['origQty'], 'p': order['price'], 'x': order['status'],
+                'X': order['status'], 'i': order['orderId'], 'l': str(last_filled_qty), 'z': order['executedQty'],
+                'L': order['price'] if last_filled_qty else '0', 'T': order['updateTime']}
+        if order['status'] == 'FILLED' or order['status'] == 'PARTIALLY_FILLED':
+            item['x'] = 'TRADE'
+
+        if self.market == 'future':
+            event = {'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': item}
+        else:
+            event = dict(item, e='executionReport', E=now, C='')
+            if order['status'] == 'CANCELED':
+                event['c'], event['C'] = f"cancel{now}", order['clientOrderId']
+        self.stream_server.publish(f"/ws/{self.listen_key}", event)
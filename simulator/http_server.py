@@ -0,0 +1,203 @@
+"""
+    Serve the SimulatedExchange with the binance rest paths (future /fapi and spot /api/v3), so the real gateways can
+    talk to it over http or https:
+
+        server = ExchangeHttpServer(SimulatedExchange(), certfile=cert, keyfile=key)
+        server.start()
+        http_client = BinanceFutureHttp(host=server.url)
+
+    the signature of the private requests is not checked, the errors injected by the exchange's error_rate are sent as
+    503 responses. The request weight is counted in the fixed windows of the
+    exchange's REQUEST_WEIGHT rate limits like binance, the used weight is sent in the X-MBX-USED-WEIGHT-* headers and
+    the requests over the limit get 429 with Retry-After.
+"""
+
+import ssl
+import json
+import time
+import subprocess
+from pathlib import Path
+from threading import Thread, Lock
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from gateway.binance_future import Interval, OrderSide, OrderType
+from gateway.rate_limiter import INTERVAL_SECONDS, format_interval
+from simulator.exchange import SimulatedError
+
+
+def create_certificate(folder):
+    """
+    create a self signed certificate for 127.0.0.1 with openssl.
+    :return: (certfile, keyfile)
+    """
+    folder = Path(folder)
+    certfile, keyfile = folder.joinpath('simulator.crt'), folder.joinpath('simulator.key')
+    if not certfile.exists():
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj',
+                        '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', str(keyfile),
+                        '-out', str(certfile)], check=True, capture_output=True)
+    return str(certfile), str(keyfile)
+
+
+class ExchangeHttpServer(object):
+
+    def __init__(self, exchange, host='127.0.0.1', port=0, certfile=None, keyfile=None):
+        """
+        :param exchange: the SimulatedExchange.
+        :param certfile: serve https with the certificate, None means http.
+        """
+        self.exchange = exchange
+        self.https = certfile is not None
+        self.lock = Lock()
+        self.used_weights = {}  # {window seconds: (window start, used weight)}
+        self.rejected_count = 0  # the requests rejected with 429.
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep alive
+            disable_nagle_algorithm = True  # the headers and the body are written separately.
+
+            def do_GET(self):
+                server.handle(self, 'GET')
+
+            def do_POST(self):
+                server.handle(self, 'POST')
+
+            def do_PUT(self):
+                server.handle(self, 'PUT')
+
+            def do_DELETE(self):
+                server.handle(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        if self.https:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.host, self.port = self.server.server_address[:2]
+
+    @property
+    def url(self):
+        return f"{'https' if self.https else 'http'}://{self.host}:{self.port}"
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str):
+        url = urlparse(handler.path)
+        params = dict(parse_qsl(url.query))
+        length = int(handler.headers.get('Content-Length', 0))
+        if length:
+            params.update(parse_qsl(handler.rfile.read(length).decode('utf-8')))
+
+        # the future and spot paths are routed to the same methods.
+        path = url.path.replace('/fapi/v2/', '/').replace('/fapi/v1/', '/').replace('/api/v3/', '/')
+        headers, retry_after = self.count_weight(self.get_weight(method, path, params))
+        if retry_after:
+            status, data = 429, {'code': -1003, 'msg': 'Too many requests.'}
+            headers['Retry-After'] = str(retry_after)
+        else:
+            try:
+                self.exchange.local.raise_errors = True
+                status, data = self.route(method, path, params)
+            except SimulatedError as error:
+                status, data = 503, {'code': -1001, 'msg': str(error)}
+            except Exception as error:
+                status, data = 400, {'code': -1100, 'msg': str(error)}
+
+        body = json.dumps(data).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def get_weight(self, method: str, path: str, params: dict):
+        """
+        the request weight of the future paths.
+        """
+        if path == '/klines':
+            limit = int(params.get('limit', 500))
+            return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        elif path == '/ticker/bookTicker':
+            return 2 if params.get('symbol') else 5
+        elif path == '/openOrders':
+            return 1 if params.get('symbol') else 40
+        elif path in ('/balance', '/account', '/positionRisk'):
+            return 5
+        return 1
+
+    def count_weight(self, weight: int):
+        """
+        add the weight to the current windows of the REQUEST_WEIGHT rate limits.
+        :return: (the used weight headers, the Retry-After seconds if the request is over the limit else 0)
+        """
+        headers, retry_after = {}, 0
+        now = time.time()
+        with self.lock:
+            for item in self.exchange.rate_limits:
+                if item['rateLimitType'] != 'REQUEST_WEIGHT':
+                    continue
+                seconds = INTERVAL_SECONDS[item['interval']] * item.get('intervalNum', 1)
+                start = now - now % seconds
+                window_start, used = self.used_weights.get(seconds, (start, 0))
+                used = used + weight if window_start == start else weight
+                self.used_weights[seconds] = (start, used)
+                headers[f"X-MBX-USED-WEIGHT-{format_interval(seconds)}"] = str(used)
+                if used > item['limit']:
+                    retry_after = max(retry_after, int(start + seconds - now) + 1)
+            if retry_after:
+                self.rejected_count += 1
+        return headers, retry_after
+
+    def route(self, method: str, path: str, params: dict):
+        exchange = self.exchange
+        symbol = params.get('symbol', '')
+        client_order_id = params.get('origClientOrderId', '')
+
+        if path == '/time':
+            return 200, {'serverTime': exchange.now}
+        elif path == '/exchangeInfo':
+            return 200, exchange.exchangeInfo()
+        elif path == '/klines':
+            return 200, exchange.get_kline(symbol, Interval(params['interval']),
+                                           start_time=int(params.get('startTime', 0)) or None,
+                                           end_time=int(params.get('endTime', 0)) or None,
+                                           limit=int(params.get('limit', 500)))
+        elif path == '/ticker/bookTicker':
+            return 200, exchange.get_ticker(symbol) if symbol else exchange.get_all_tickers()
+        elif path == '/order' and method == 'POST':
+            return 200, exchange.place_order(symbol, OrderSide(params['side']), OrderType(params['type']),
+                                             params['quantity'], params.get('price', '0'),
+                                             time_inforce=params.get('timeInForce', 'GTC'),
+                                             client_order_id=params.get('newClientOrderId'))
+        elif path == '/order' and method in ('GET', 'DELETE'):
+            order = exchange.get_order(symbol, client_order_id) if method == 'GET' else \
+                exchange.cancel_order(symbol, client_order_id)
+            if order is None:
+                return 400, {'code': -2013, 'msg': 'Order does not exist.'}
+            return 200, order
+        elif path == '/openOrders' and method == 'GET':
+            return 200, exchange.get_open_orders(symbol)
+        elif path == '/balance':
+            return 200, exchange.get_balance()
+        elif path == '/account':
+            return 200, exchange.get_account_info()
+        elif path == '/positionRisk':
+            return 200, exchange.get_position_info()
+        elif path in ('/listenKey', '/userDataStream'):
+            if method == 'POST':
+                return 200, exchange.get_listen_key()
+            return 200, {}
+
+        return 404, {'code': -1, 'msg': f'unknown path {method} {path}'}
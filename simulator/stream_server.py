@@ -0,0 +1,223 @@
+"""
+    A local websocket server standing in for the binance streams, so the stream consumers can run offline.
+
+    it only implements what the streams need: the handshake, text frames, ping/pong and close.
+
+        server = StreamServer()
+        server.start()
+        server.url  # ws://127.0.0.1:port, the clients connect to url + '/ws/<listenKey or stream name>'
+        server.publish('/ws/listen_key', {'e': 'ORDER_TRADE_UPDATE', ...})
+        server.publish_stream('btcusdt@bookTicker', {'s': 'BTCUSDT', 'b': '100', ...})  # to the subscribed clients
+"""
+
+import json
+import socket
+import base64
+import struct
+import hashlib
+import socketserver
+from threading import Thread, Lock
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class Connection(object):
+
+    def __init__(self, sock: socket.socket, path: str):
+        self.sock = sock
+        self.path = path
+        self.subscriptions = set()  # the streams subscribed by the SUBSCRIBE messages.
+        self.lock = Lock()
+
+    def send(self, message: str, opcode=0x1):
+        payload = message.encode('utf-8') if isinstance(message, str) else message
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        with self.lock:
+            self.sock.sendall(header + payload)
+
+    def close(self):
+        try:
+            self.send(b'', opcode=0x8)
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class StreamServer(object):
+
+    def __init__(self, host='127.0.0.1', port=0, on_message=None):
+        """
+        :param on_message: called with (connection, message) when a client sends a text message.
+        """
+        self.on_message = on_message
+        self.connections = []
+        self.lock = Lock()
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+
+            def handle(self):
+                server.handle(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.close_connections()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def publish(self, path: str, message):
+        """
+        send the message to all the clients connected to the path.
+        """
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        with self.lock:
+            connections = [connection for connection in self.connections if connection.path == path]
+        for connection in connections:
+            try:
+                connection.send(message)
+            except OSError:
+                self.remove(connection)
+
+    def publish_stream(self, stream: str, message):
+        """
+        send the message to the clients connected to /ws/<stream> or subscribed the stream.
+        """
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        path = f"/ws/{stream}"
+        with self.lock:
+            connections = [connection for connection in self.connections
+                           if connection.path == path or stream in connection.subscriptions]
+        for connection in connections:
+            try:
+                connection.send(message)
+            except OSError:
+                self.remove(connection)
+
+    def subscribe(self, connection: Connection, message: str):
+        """
+        handle the SUBSCRIBE/UNSUBSCRIBE messages like binance, return False if it's not a subscription message.
+        """
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return False
+
+        if not isinstance(data, dict) or data.get('method') not in ('SUBSCRIBE', 'UNSUBSCRIBE'):
+            return False
+
+        with self.lock:
+            if data['method'] == 'SUBSCRIBE':
+                connection.subscriptions.update(data.get('params', []))
+            else:
+                connection.subscriptions.difference_update(data.get('params', []))
+        connection.send(json.dumps({'result': None, 'id': data.get('id')}))
+        return True
+
+    def close_connections(self, path: str = None):
+        """
+        close the connections of the path (all the connections if path is None), to test the reconnection.
+        """
+        with self.lock:
+            connections = [connection for connection in self.connections if path is None or connection.path == path]
+        for connection in connections:
+            connection.close()
+            self.remove(connection)
+
+    def remove(self, connection: Connection):
+        with self.lock:
+            if connection in self.connections:
+                self.connections.remove(connection)
+
+    def handle(self, sock: socket.socket):
+        connection = self.handshake(sock)
+        if connection is None:
+            return
+
+        with self.lock:
+            self.connections.append(connection)
+
+        try:
+            while True:
+                opcode, payload = self.read_frame(sock)
+                if opcode is None or opcode == 0x8:
+                    break
+                elif opcode == 0x9:
+                    connection.send(payload, opcode=0xA)
+                elif opcode == 0x1:
+                    message = payload.decode('utf-8')
+                    if not self.subscribe(connection, message) and self.on_message:
+                        self.on_message(connection, message)
+        except OSError:
+            pass
+        finally:
+            self.remove(connection)
+
+    def handshake(self, sock: socket.socket):
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return None
+            data += chunk
+
+        lines = data.split(b'\r\n\r\n')[0].decode('utf-8').split('\r\n')
+        path = lines[0].split(' ')[1]
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        accept = base64.b64encode(hashlib.sha1((headers.get('sec-websocket-key', '') + WEBSOCKET_GUID)
+                                               .encode('utf-8')).digest()).decode('utf-8')
+        sock.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('utf-8'))
+        return Connection(sock, path)
+
+    def read_frame(self, sock: socket.socket):
+        header = self.read_exactly(sock, 2)
+        if header is None:
+            return None, None
+
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self.read_exactly(sock, 2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self.read_exactly(sock, 8))[0]
+
+        mask = self.read_exactly(sock, 4) if masked else None
+        payload = self.read_exactly(sock, length) if length else b''
+        if payload is None:
+            return None, None
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def read_exactly(self, sock: socket.socket, size: int):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
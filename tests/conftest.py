@@ -0,0 +1,39 @@
+"""
+    the fixtures of the tests, they run against the SimulatedExchange, no api key or network needed.
+"""
+
+import pytest
+
+from utils import config
+from utils.config import signal_data
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer
+
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    """
+    the tests change the global config and signal_data, restore them after every test.
+    """
+    fields, signals = dict(vars(config)), dict(signal_data)
+    yield
+    vars(config).clear()
+    vars(config).update(fields)
+    signal_data.clear()
+    signal_data.update(signals)
+
+
+@pytest.fixture
+def exchange():
+    return SimulatedExchange(symbol_count=20, bars=100)
+
+
+@pytest.fixture
+def server(exchange):
+    """
+    the ExchangeHttpServer of the exchange fixture, for the tests of the real gateways.
+    """
+    server = ExchangeHttpServer(exchange)
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,85 @@
+import io
+import asyncio
+from contextlib import redirect_stdout
+
+import main
+from gateway import BinanceFutureHttp
+from gateway.binance_future import Interval, OrderSide, OrderType
+from gateway.binance_async import AsyncBinanceFutureHttp
+from trader.binance_future_trader import BinanceFutureTrader
+from utils import config
+from utils.config import signal_data
+
+
+def test_same_data_as_the_gateway(server):
+    http_client = BinanceFutureHttp(host=server.url, api_key='key', secret='secret')
+
+    async def check():
+        async_client = AsyncBinanceFutureHttp(host=server.url, api_key='key', secret='secret')
+        try:
+            assert await async_client.exchangeInfo() == http_client.exchangeInfo()
+            assert await async_client.get_kline('SIM1USDT', Interval.HOUR_1, limit=100) == \
+                   http_client.get_kline('SIM1USDT', Interval.HOUR_1, limit=100)
+            assert await async_client.get_all_tickers() == http_client.get_all_tickers()
+
+            order = await async_client.place_order('SIM1USDT', OrderSide.BUY, OrderType.LIMIT, quantity=1, price=1)
+            assert order['status'] == 'NEW'
+            assert await async_client.get_order('SIM1USDT', order['clientOrderId']) == \
+                   http_client.get_order('SIM1USDT', order['clientOrderId'])
+            assert await async_client.get_open_orders() == http_client.get_open_orders()
+            assert (await async_client.cancel_order('SIM1USDT', order['clientOrderId']))['status'] == 'CANCELED'
+            assert await async_client.get_open_orders('SIM1USDT') == []
+        finally:
+            await async_client.close()
+
+    asyncio.run(check())
+
+
+def create_trader(server):
+    trader = BinanceFutureTrader(positions_file=None, trade_store_file='')
+    trader.http_client = BinanceFutureHttp(host=server.url, api_key='key', secret='secret')
+    with redirect_stdout(io.StringIO()):
+        trader.get_exchange_info()
+    return trader
+
+
+def scan(trader):
+    with redirect_stdout(io.StringIO()):
+        main.get_data(trader)
+    return list(signal_data['signals'])
+
+
+def async_scan(trader):
+    async def run():
+        async_client = AsyncBinanceFutureHttp(host=trader.http_client.host, api_key='key', secret='secret')
+        try:
+            await main.async_get_data(trader, async_client)
+        finally:
+            await async_client.close()
+
+    with redirect_stdout(io.StringIO()):
+        asyncio.run(run())
+    return list(signal_data['signals'])
+
+
+def test_async_scan_equals_the_scan(server):
+    config.kline_cache = False
+    expected = scan(create_trader(server))
+    assert expected
+    assert async_scan(create_trader(server)) == expected
+
+
+def test_async_scan_uses_the_kline_cache(server, exchange):
+    config.kline_cache = False
+    expected = scan(create_trader(server))
+
+    config.kline_cache = True
+    trader = create_trader(server)
+    count = exchange.kline_count
+    assert async_scan(trader) == expected
+    full_count = exchange.kline_count - count
+
+    # the second scan only requests the newest klines of the cache.
+    count = exchange.kline_count
+    assert async_scan(trader) == expected
+    assert exchange.kline_count - count < full_count
@@ -0,0 +1,101 @@
+import time
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from utils.market_bus import MarketBus, MarketBusReader, H_TICKERS_SEQ
+
+SYMBOLS = ['SIM0USDT', 'SIM1USDT', 'SIM2USDT']
+
+
+@pytest.fixture
+def bus(tmp_path):
+    bus = MarketBus()
+    bus.create(str(tmp_path / 'market_bus.bin'), SYMBOLS, bars=4)
+    return bus
+
+
+def test_publish_and_read_tickers(bus):
+    reader = MarketBusReader(str(bus.path))
+    assert reader.symbols == SYMBOLS
+    assert reader.tickers_dict() == {} and reader.tickers_time == 0
+
+    bus.publish_tickers({'SIM1USDT': {'bid_price': 1.5, 'ask_price': 1.6}, 'OTHERUSDT': {'bid_price': 9}})
+    assert reader.tickers_dict() == {'SIM1USDT': {'bid_price': 1.5, 'ask_price': 1.6}}
+    assert reader.tickers_time > 0
+
+
+def test_publish_and_read_klines(bus):
+    reader = MarketBusReader(str(bus.path))
+    data = np.arange(2 * 6 * 7, dtype=np.float64).reshape((2, 6, 7))
+    bus.publish_klines(['SIM2USDT', 'OTHERUSDT'], data)
+
+    _, klines = reader.read_klines()
+    assert klines.shape == (3, 4, 7)
+    assert np.array_equal(klines[2], data[0, -4:])  # the last bars of the symbol.
+    assert np.isnan(klines[:2]).all()
+
+
+def test_seqlock(bus):
+    reader = MarketBusReader(str(bus.path))
+    seq, view = reader.view_tickers()
+    assert not view.flags.writeable
+    bus.publish_tickers({'SIM0USDT': {'bid_price': 1, 'ask_price': 2}})
+    assert not reader.valid_tickers(seq)  # the view changed while it was used.
+
+    seq, _ = reader.view_tickers()
+    assert reader.valid_tickers(seq)
+
+    bus.header[H_TICKERS_SEQ] += 1  # the publisher is writing.
+    assert not reader.valid_tickers(seq)
+    bus.header[H_TICKERS_SEQ] += 1
+    seq, _ = reader.view_tickers()
+    assert seq % 2 == 0 and reader.valid_tickers(seq)
+
+
+def test_is_replaced(bus):
+    reader = MarketBusReader(str(bus.path))
+    assert not reader.is_replaced()
+    MarketBus().create(str(bus.path), SYMBOLS)
+    assert reader.is_replaced()
+
+
+def test_not_a_bus_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 1024)
+    with pytest.raises(ValueError):
+        MarketBusReader(str(path))
+
+
+def read_loop(file_name: str, seconds: float, results):
+    reader = MarketBusReader(file_name)
+    reads, torn = 0, 0
+    end_time = time.perf_counter() + seconds
+    while time.perf_counter() < end_time:
+        _, tickers = reader.read_tickers()
+        reads += 1
+        # every update writes bid = n and ask = n + 1 for all the symbols.
+        if not np.isnan(tickers[0, 0]) and (tickers[:, 0].min() != tickers[:, 0].max() or
+                                            not np.all(tickers[:, 1] - tickers[:, 0] == 1)):
+            torn += 1
+    results.put((reads, torn))
+
+
+def test_no_torn_read_across_processes(tmp_path):
+    names = [f"SIM{i}USDT" for i in range(500)]
+    bus = MarketBus()
+    bus.create(str(tmp_path / 'market_bus.bin'), names)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=read_loop, args=(str(bus.path), 2, results))
+    process.start()
+
+    n = 0
+    while process.is_alive():
+        bus.publish_tickers({name: {'bid_price': float(n), 'ask_price': float(n + 1)} for name in names})
+        n += 1
+    reads, torn = results.get(timeout=10)
+    process.join()
+    assert reads > 0 and torn == 0
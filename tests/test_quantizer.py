@@ -0,0 +1,106 @@
+"""
+    the SymbolQuantizer against the Decimal implementation of the exchange's filters:
+
+    1. the filters are random: the power of 10 ticks like 0.01 and the others like 0.05 or 5, with a minimum on the grid
+    or off the grid.
+    2. the values are random prices of every magnitude, the values on the grid, the half ticks and the floats 1 ulp
+    around them.
+    3. with a tick like 0.01 or 1 and the minimum on the grid the results must equal round_to and floor_to.
+"""
+
+import random
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_FLOOR
+
+import numpy as np
+
+from utils.utility import round_to, floor_to
+from utils.quantizer import SymbolQuantizer
+
+FILTER_COUNT = 100
+VALUE_COUNT = 200
+TICKS = ['0.00000001', '0.000001', '0.0001', '0.001', '0.01', '0.1', '1', '10',
+         '0.00005', '0.0025', '0.05', '0.5', '5', '0.00000500', '0.10000000']
+
+
+def decimal_quantize(value: float, tick: str, minimum: str, rounding: str):
+    """
+    the exchange's rule with the Decimals: minimum + k * tick, k rounded from the value's str.
+    """
+    tick, minimum = Decimal(tick), Decimal(minimum)
+    offset = minimum % tick
+    ticks = ((Decimal(str(value)) - offset) / tick).to_integral_value(rounding=rounding)
+    return offset + ticks * tick
+
+
+def is_decimal_tick(tick: str, minimum: str):
+    """
+    round_to and floor_to quantize to the decimals of the tick, it's the exchange's grid for the ticks like 0.01 or 1
+    with the minimum on the grid, but not for 0.05 or 10.
+    """
+    tick = Decimal(tick).normalize()
+    return tick.as_tuple().digits == (1,) and tick.as_tuple().exponent <= 0 and Decimal(minimum) % tick == 0
+
+
+def random_filter(rand: random.Random):
+    tick = rand.choice(TICKS)
+    minimum = rand.choice(['0', tick, str(Decimal(tick) * rand.randint(1, 10)), str(Decimal(tick) / 10)])
+    return tick, minimum
+
+
+def random_values(rand: random.Random, tick: str, count: int):
+    tick_value = float(tick)
+    values = []
+    for _ in range(count):
+        kind = rand.random()
+        if kind < 0.4:
+            value = 10 ** rand.uniform(-6, 5)
+        else:
+            # on the grid or a half tick, the float computation puts some of them 1 ulp off.
+            value = rand.randint(1, 10 ** 6) * tick_value + (tick_value / 2 if kind < 0.7 else 0)
+            if rand.random() < 0.5:
+                value = float(np.nextafter(value, value * 2 if rand.random() < 0.5 else 0))
+        values.append(value)
+    return values
+
+
+def test_equals_the_decimals():
+    """
+    random filters and values, the quantizer must give the same string as the Decimals for every value.
+    """
+    rand = random.Random(0)
+    for _ in range(FILTER_COUNT):
+        price_tick, min_price = random_filter(rand)
+        qty_tick, min_qty = random_filter(rand)
+        quantizer = SymbolQuantizer(tick_size=price_tick, step_size=qty_tick, min_price=min_price, min_qty=min_qty)
+        values = random_values(rand, price_tick, VALUE_COUNT) + random_values(rand, qty_tick, VALUE_COUNT)
+
+        prices = quantizer.round_prices(np.array(values))
+        qtys = quantizer.floor_qtys(np.array(values))
+        for index, value in enumerate(values):
+            price = decimal_quantize(value, price_tick, min_price, ROUND_HALF_EVEN)
+            qty = decimal_quantize(value, qty_tick, min_qty, ROUND_FLOOR)
+            assert Decimal(quantizer.round_price(value)) == price, (value, price_tick, min_price, price)
+            assert Decimal(quantizer.floor_qty(value)) == qty, (value, qty_tick, min_qty, qty)
+            assert prices[index] == float(price) and qtys[index] == float(qty), (value, price, qty)
+
+            if price >= Decimal(min_price):
+                assert quantizer.is_valid_price(quantizer.round_price(value)), (value, price_tick, min_price)
+            if qty >= Decimal(min_qty):
+                assert quantizer.is_valid_qty(quantizer.floor_qty(value)), (value, qty_tick, min_qty)
+
+            if is_decimal_tick(price_tick, min_price):
+                assert Decimal(quantizer.round_price(value)) == round_to(value, float(price_tick)), (value, price_tick)
+            if is_decimal_tick(qty_tick, min_qty):
+                assert Decimal(quantizer.floor_qty(value)) == floor_to(value, float(qty_tick)), (value, qty_tick)
+
+
+def test_examples():
+    quantizer = SymbolQuantizer(tick_size='0.01', step_size='0.001')
+    assert quantizer.round_price(26123.456) == '26123.46'
+    assert quantizer.floor_qty(0.01239) == '0.012'
+    assert quantizer.round_prices(np.array([1.005, 2.015])).tolist() == [1.0, 2.02]
+
+    quantizer = SymbolQuantizer(tick_size='0.05', step_size='5', min_price='0.01', min_qty='1')
+    assert quantizer.round_price(1.04) == '1.06'
+    assert quantizer.floor_qty(10.9) == '6'
+    assert quantizer.is_valid_price('1.06') and not quantizer.is_valid_price('1.05')
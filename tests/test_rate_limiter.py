@@ -0,0 +1,65 @@
+import io
+import time
+from contextlib import redirect_stdout
+
+import main
+from gateway import BinanceFutureHttp
+from gateway.rate_limiter import RateLimiter
+from simulator import SimulatedExchange
+from simulator.http_server import ExchangeHttpServer
+from trader.binance_future_trader import BinanceFutureTrader
+from utils import config
+
+
+def test_seeded_from_the_rate_limits():
+    rate_limiter = RateLimiter()
+    rate_limiter.set_rate_limits([
+        {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 2400},
+        {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 300},
+        {'rateLimitType': 'RAW_REQUESTS', 'interval': 'MINUTE', 'intervalNum': 5, 'limit': 6100}])
+    budget = rate_limiter.budget()
+    assert budget['REQUEST_WEIGHT_1M'] == {'limit': 2400, 'used': 0, 'available': 2400}
+    assert budget['ORDERS_10S']['limit'] == 300
+    assert len(budget) == 3  # the two buckets and paused.
+
+
+def test_bulk_requests_leave_the_reserve():
+    rate_limiter = RateLimiter(weight_limit=100, order_reserve=0.2)
+    assert rate_limiter.try_acquire(weight=80, bulk=True) == 0
+    assert rate_limiter.try_acquire(weight=1, bulk=True) > 0
+    assert rate_limiter.try_acquire(weight=20) == 0  # the orders use the reserve.
+    assert rate_limiter.try_acquire(weight=1) > 0
+
+
+def test_headers_and_429():
+    rate_limiter = RateLimiter(weight_limit=100)
+    with redirect_stdout(io.StringIO()):
+        rate_limiter.update(200, {'X-MBX-USED-WEIGHT-1M': '90'})
+        assert rate_limiter.budget()['REQUEST_WEIGHT_1M']['used'] == 90  # used by the other clients on the ip.
+
+        rate_limiter.update(429, {'Retry-After': '2'})
+    assert 1 < rate_limiter.try_acquire(weight=1) <= 2
+    assert rate_limiter.acquire(weight=1, timeout=0.5) is False
+
+
+def test_scan_stays_in_the_limit():
+    # 20 klines of weight 2 in windows of 30 weight per second, the exchange rejects the requests over the limit.
+    exchange = SimulatedExchange(symbol_count=20, bars=100, rate_limits=[
+        {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'SECOND', 'intervalNum': 1, 'limit': 30}])
+    server = ExchangeHttpServer(exchange)
+    server.start()
+    try:
+        config.kline_workers = 10
+        config.kline_cache = False
+        trader = BinanceFutureTrader(positions_file=None, trade_store_file='')
+        trader.http_client = BinanceFutureHttp(host=server.url, api_key='key', secret='secret', pool_size=11)
+        with redirect_stdout(io.StringIO()):
+            trader.get_exchange_info()
+            assert trader.http_client.rate_limiter.budget()['REQUEST_WEIGHT_1S']['limit'] == 30
+
+            time.sleep(1 - time.time() % 1)  # start in a new window of the exchange.
+            main.get_data(trader)
+        assert server.rejected_count == 0
+        assert exchange.kline_count == 20 * 100
+    finally:
+        server.stop()
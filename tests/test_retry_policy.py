@@ -0,0 +1,91 @@
+import time
+from threading import Thread
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from gateway import BinanceFutureHttp
+from gateway.retry_policy import RetryPolicy
+
+
+class StatusServer(object):
+    """
+    answers every request with self.status, and records the query of the requests.
+    """
+
+    def __init__(self):
+        self.status = 503
+        self.queries = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.queries.append(parse_qs(urlparse(self.path).query))
+                body = b'{}' if server.status == 200 else b'{"code": -1, "msg": "error"}'
+                self.send_response(server.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture
+def status_server():
+    server = StatusServer()
+    yield server
+    server.stop()
+
+
+def test_signed_request_retries(status_server):
+    policy = RetryPolicy(try_counts=4, timeout=1, max_time=10, base_delay=0.1, max_delay=0.3, failure_threshold=0)
+    http_client = BinanceFutureHttp(api_key='test', secret='test', host=status_server.url, retry_policy=policy)
+    start = time.monotonic()
+    assert http_client.get_order('SIM0USDT', client_order_id='test') is None
+    seconds = time.monotonic() - start
+
+    queries = status_server.queries
+    assert len(queries) == policy.try_counts
+    # every try is signed again with a new timestamp.
+    assert len({query['timestamp'][0] for query in queries}) == len(queries)
+    assert len({query['signature'][0] for query in queries}) == len(queries)
+    assert seconds <= policy.worst_case_time()
+
+
+def test_client_error_is_not_retried(status_server):
+    policy = RetryPolicy(try_counts=4, timeout=1, max_time=10, base_delay=0.1, failure_threshold=0)
+    http_client = BinanceFutureHttp(api_key='test', secret='test', host=status_server.url, retry_policy=policy)
+    status_server.status = 400
+    http_client.get_order('SIM0USDT', client_order_id='test')
+    assert len(status_server.queries) == 1
+
+
+def test_circuit_breaker(status_server):
+    policy = RetryPolicy(try_counts=1, timeout=1, max_time=5, failure_threshold=3, reset_timeout=0.5)
+    http_client = BinanceFutureHttp(api_key='test', secret='test', host=status_server.url, retry_policy=policy)
+    breaker = policy.get_breaker('GET /fapi/v1/order')
+    for _ in range(policy.failure_threshold):
+        http_client.get_order('SIM0USDT', client_order_id='test')
+    assert breaker.is_open
+
+    # fails fast without a request while it's open.
+    status_server.queries = []
+    assert http_client.get_order('SIM0USDT', client_order_id='test') is None
+    assert status_server.queries == []
+
+    # lets one request through after reset_timeout, and closes after it succeeds.
+    time.sleep(policy.reset_timeout + 0.1)
+    status_server.status = 200
+    assert http_client.get_order('SIM0USDT', client_order_id='test') == {}
+    assert len(status_server.queries) == 1
+    assert not breaker.is_open
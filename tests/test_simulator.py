@@ -0,0 +1,101 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+import main
+from gateway.binance_future import Interval, OrderSide, OrderType
+from simulator import SimulatedExchange
+from trader.binance_future_trader import BinanceFutureTrader
+from trader.binance_spot_trader import BinanceSpotTrader
+from utils import config
+
+
+def place_order(exchange, side, quantity, price, symbol='SIM0USDT'):
+    return exchange.place_order(symbol, side, OrderType.LIMIT, quantity=quantity, price=price)
+
+
+def test_match_the_crossed_orders():
+    exchange = SimulatedExchange(symbol_count=2, bars=100, match_orders=True)
+    exchange.set_price('SIM0USDT', 100)
+    buy_order = place_order(exchange, OrderSide.BUY, 1, 99)
+    assert buy_order['status'] == 'NEW'
+    assert place_order(exchange, OrderSide.BUY, 1, 101)['status'] == 'FILLED'  # crossed at once.
+
+    exchange.set_price('SIM0USDT', 98.5)
+    order = exchange.get_order('SIM0USDT', buy_order['clientOrderId'])
+    assert order['status'] == 'FILLED' and float(order['executedQty']) == 1
+    assert exchange.get_open_orders() == []
+
+
+def test_partial_fills():
+    exchange = SimulatedExchange(symbol_count=2, bars=100, match_orders=True, fill_ratio=0.5)
+    exchange.set_price('SIM0USDT', 100)
+    order = place_order(exchange, OrderSide.BUY, 2, 101)
+    assert order['status'] == 'PARTIALLY_FILLED' and float(order['executedQty']) == 1
+    assert [open_order['clientOrderId'] for open_order in exchange.get_open_orders()] == [order['clientOrderId']]
+
+    order = exchange.cancel_order('SIM0USDT', order['clientOrderId'])
+    assert order['status'] == 'CANCELED' and float(order['executedQty']) == 1
+    assert exchange.cancel_order('SIM0USDT', order['clientOrderId']) is None
+
+
+def test_future_balances():
+    exchange = SimulatedExchange(symbol_count=2, bars=100, balance=1000, fee=0.001)
+    exchange.set_price('SIM0USDT', 100)
+    exchange.fill_order(place_order(exchange, OrderSide.BUY, 2, 100)['clientOrderId'])
+    assert exchange.position_amounts['SIM0USDT'] == (2, 100)
+
+    exchange.fill_order(place_order(exchange, OrderSide.SELL, 2, 110)['clientOrderId'])
+    assert exchange.position_amounts['SIM0USDT'][0] == 0
+    assert exchange.balances['USDT'] == pytest.approx(1000 + 20 - 200 * 0.001 - 220 * 0.001)
+
+
+def test_spot_balances():
+    exchange = SimulatedExchange(symbol_count=2, bars=100, market='spot', balance=1000, fee=0)
+    exchange.set_price('SIM0USDT', 100)
+    buy_order = place_order(exchange, OrderSide.BUY, 2, 100)
+    assert exchange.locked_balances() == {'USDT': 200}
+
+    exchange.fill_order(buy_order['clientOrderId'], quantity=1)
+    assert exchange.balances['SIM0'] == 1 and exchange.balances['USDT'] == 900
+    assert exchange.locked_balances() == {'USDT': 100}  # the left quantity.
+
+
+def test_error_injection():
+    exchange = SimulatedExchange(symbol_count=2, bars=100, error_rate=1)
+    assert exchange.get_order('SIM0USDT', 'missing') is None
+    assert exchange.get_kline('SIM0USDT', Interval.HOUR_1, limit=10) == []  # the failed type of the gateway.
+    assert exchange.error_count == 2 and exchange.request_count == 2
+
+
+@pytest.mark.parametrize('market', ['future', 'spot'])
+def test_trader_loop(market):
+    """
+    the trader's loop against the exchange matching the orders, like benchmark/bench_trader_loop.py.
+    """
+    config.max_pairs = 5
+    config.turnover_threshold = 0
+    config.pump_pct = config.pump_pct_4h = -1  # enter all the symbols.
+    exchange = SimulatedExchange(symbol_count=10, bars=100, market=market, match_orders=True)
+    trader_class = BinanceSpotTrader if market == 'spot' else BinanceFutureTrader
+    trader = trader_class(positions_file=None, trade_store_file='')
+    trader.http_client = exchange
+
+    with redirect_stdout(io.StringIO()):
+        trader.get_exchange_info()
+        main.get_data(trader)
+        for _ in range(200):
+            exchange.advance(60)
+            trader.get_all_tickers()
+            trader.start()
+
+    assert len(exchange.orders) >= config.max_pairs
+    assert 0 < len(trader.positions.positions) <= config.max_pairs
+    # the filled orders of every position, no order is lost or counted twice.
+    for symbol, pos_data in trader.positions.positions.items():
+        bought = sum(float(order['executedQty']) for order in exchange.orders.values() if
+                     order['symbol'] == symbol and order['side'] == 'BUY')
+        sold = sum(float(order['executedQty']) for order in exchange.orders.values() if
+                   order['symbol'] == symbol and order['side'] == 'SELL')
+        assert pos_data['pos'] == pytest.approx(bought - sold)
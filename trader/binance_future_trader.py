@@ -16,16 +16,28 @@
 
 from gateway import BinanceFutureHttp, OrderStatus, OrderType, OrderSide
 from utils import config
-from utils import round_to, floor_to
+from utils.quantizer import SymbolQuantizer
 import logging
 from datetime import datetime
 from utils.config import signal_data
 from utils.positions import Positions
+from utils.strategy import select_entries, position_action, increase_value, trigger_prices, EXIT, STOP_LOSS, \
+    INCREASE
+from utils.trade_store import TradeStore
+from utils.kline_cache import KlineCache
+from utils.exchange_info import ExchangeInfoCache
+from gateway.retry_policy import RetryPolicy
+from gateway.decoders import BookTickers, decode_klines, remove_stale_tickers
+from utils.metrics import metrics
+from utils.tracing import tracer
+from utils.scheduler import LoopScheduler
+from utils.market_bus import market_bus
 
 
 class BinanceFutureTrader(object):
 
-    def __init__(self):
+    def __init__(self, positions_file: str = 'future_positions.json', trade_store_file: str = None, api_key: str = None,
+                 api_secret: str = None):
         """
         免责声明:
         the binance future trader, 币安合约马丁格尔策略.
@@ -34,53 +46,212 @@ class BinanceFutureTrader(object):
         马丁策略在合约上会有很大的风险，请注意风险, 使用前请熟知该代码，可能会有bugs或者其他未知的风险。
         """
 
-        self.http_client = BinanceFutureHttp(api_key=config.api_key, secret=config.api_secret,
-                                             proxy_host=config.proxy_host, proxy_port=config.proxy_port)
+        self.http_client = BinanceFutureHttp(api_key=api_key or config.api_key, secret=api_secret or config.api_secret,
+                                             proxy_host=config.proxy_host, proxy_port=config.proxy_port,
+                                             pool_size=config.http_pool_size, fast_decode=config.fast_decode,
+                                             retry_policy=RetryPolicy(max_time=config.request_max_time,
+                                                                      failure_threshold=config.circuit_breaker_failures))
 
         self.symbols_dict = {}  # 全市场的交易对. all symbols dicts {'BTCUSDT': value}
         self.tickers_dict = {}  # 全市场的tickers数据.
 
         self.buy_orders_dict = {}  # 买单字典 buy orders {'symbol': [], 'symbol1': []}
         self.sell_orders_dict = {}  # 卖单字典. sell orders  {'symbol': [], 'symbol1': []}
-        self.positions = Positions('future_positions.json')
+        # the history of the fills, orders and positions in sqlite, None means only the positions json file.
+        trade_store_file = config.trade_store_file if trade_store_file is None else trade_store_file
+        self.trade_store = TradeStore(trade_store_file) if trade_store_file else None
+        self.positions = Positions(positions_file, journal=config.positions_journal,
+                                   compact_count=config.positions_compact_count, store=self.trade_store)
+        self.kline_cache = KlineCache(file_name=config.kline_cache_file)
+        self.exchange_info = ExchangeInfoCache(config.exchange_info_file, ttl=config.exchange_info_ttl)
+        self.keep_symbols = None  # returns the held symbols the exchangeInfo refresh keeps, None is get_held_symbols.
         self.initial_id = 0
+        self.user_stream = None  # the user data stream, None means we check the orders by requests.
+        # wakes up the trading loop on the order updates, the new signals and the tickers crossing the watched prices.
+        self.scheduler = LoopScheduler(heartbeat=config.loop_interval, event_driven=config.event_loop)
+        self.shared_tickers = False  # the tickers_dict is refreshed by the AccountHost for all the accounts.
+        self.account_name = ''  # the account of the AccountHost, every account has its own traces.
+        self.ticker_stream = None  # the bookTicker stream, None means we request all the tickers every loop.
+
+    def parse_symbols(self, items: list):
+        """
+        :param items: the symbols of the exchangeInfo.
+        :return: {symbol: symbol_data} of the USDT symbols trading.
+        """
+        symbols = {}
+        for item in items:
+            symbol = item['symbol']
+            if item.get('quoteAsset') == 'USDT' and item.get('status') == "TRADING":
+
+                symbol_data = {"symbol": symbol}
+                for filters in item['filters']:
+                    if filters['filterType'] == 'PRICE_FILTER':
+                        symbol_data['min_price'] = float(filters['tickSize'])
+                    elif filters['filterType'] == 'LOT_SIZE':
+                        symbol_data['min_qty'] = float(filters['stepSize'])
+                    elif filters['filterType'] == 'MIN_NOTIONAL':
+                        symbol_data['min_notional'] = float(filters['notional'])
+
+                # the integer tick and step of the filters, compiled once for the orders.
+                symbol_data['quantizer'] = SymbolQuantizer.from_filters(item['filters'])
+                symbols[symbol] = symbol_data
+        return symbols
 
     def get_exchange_info(self):
-        data = self.http_client.exchangeInfo()
-
-        if isinstance(data, dict):
+        """
+        the symbols_dict from the exchangeInfo, or from the snapshot of config.exchange_info_file, then it's refreshed
+        in the background.
+        """
+        items = self.exchange_info.load() if config.exchange_info_file else None
+        if items is None:
+            data = self.http_client.exchangeInfo()
+            if not isinstance(data, dict):
+                return
             items = data.get('symbols', [])
-            for item in items:
-                if item.get('quoteAsset') == 'USDT' and item.get('status') == "TRADING":
-
-                    symbol = item['symbol']
-                    symbol_data = {"symbol": symbol}
-
-                    for filters in item['filters']:
-                        if filters['filterType'] == 'PRICE_FILTER':
-                            symbol_data['min_price'] = float(filters['tickSize'])
-                        elif filters['filterType'] == 'LOT_SIZE':
-                            symbol_data['min_qty'] = float(filters['stepSize'])
-                        elif filters['filterType'] == 'MIN_NOTIONAL':
-                            symbol_data['min_notional'] = float(filters['notional'])
+            symbols = self.parse_symbols(items)
+            if config.exchange_info_file:
+                self.exchange_info.save([item for item in items if item['symbol'] in symbols])
+        else:
+            symbols = self.parse_symbols(items)
 
-                    self.symbols_dict[symbol] = symbol_data
+        self.symbols_dict.update(symbols)
+        if config.exchange_info_file:
+            self.exchange_info.start(self.refresh_exchange_info)
 
         # print(len(self.symbols),self.symbols)  # 129 个交易对.
 
+    def refresh_exchange_info(self):
+        """
+        apply the changes of the exchangeInfo, called in the background thread of the exchange_info cache.
+        :return: False if the request failed.
+        """
+        data = self.http_client.exchangeInfo()
+        if not isinstance(data, dict):
+            return False
+
+        # the delisted symbols of the positions and the orders are kept until they are closed.
+        keep = self.keep_symbols() if self.keep_symbols else self.get_held_symbols()
+        self.symbols_dict, changes = self.exchange_info.apply(self.symbols_dict, data.get('symbols', []),
+                                                              self.parse_symbols, keep=keep)
+        if any(changes.values()):
+            print(f"交易对信息更新: 新增{changes['added']}, 下架{changes['removed']}, 暂停{changes['halted']}, "
+                  f"规则变化{changes['changed']}")
+        return True
+
     def get_klines(self, symbol: str, interval, limit):
-        return self.http_client.get_kline(symbol=symbol, interval=interval, limit=limit)
+        if config.kline_cache:
+            klines = self.kline_cache.get_klines(self.http_client, symbol=symbol, interval=interval, limit=limit)
+        else:
+            klines = self.http_client.get_kline(symbol=symbol, interval=interval, limit=limit)
+        # the cache keeps the lists, the signals get the float array.
+        return decode_klines(klines) if config.fast_decode else klines
+
+    def get_held_symbols(self):
+        """
+        the symbols of the positions and the open orders.
+        """
+        symbols = set(list(self.positions.positions.keys()))
+        symbols.update([symbol for symbol, orders in list(self.buy_orders_dict.items()) if orders])
+        symbols.update([symbol for symbol, orders in list(self.sell_orders_dict.items()) if orders])
+        return symbols
+
+    def get_ticker_symbols(self):
+        """
+        the symbols we need the tickers: the positions, the orders and the buy signals we may enter.
+        """
+        symbols = self.get_held_symbols()
+        # the same entries as start(), with the allowed_lists and the blocked_lists.
+        pos_symbols = self.positions.positions.keys()
+        entries = select_entries(signal_data.get('signals', []), pos_symbols, config.max_pairs - len(pos_symbols))
+        symbols.update([signal['symbol'] for signal in entries])
+        return symbols
+
+    def start_ticker_stream(self):
+        """
+        update the tickers_dict from the bookTicker stream of the symbols we need, instead of requesting all the
+        tickers every loop.
+        """
+        from gateway.binance_stream import TickerStream
+
+        self.ticker_stream = TickerStream(self.http_client, self.tickers_dict, on_ticker=self.scheduler.on_ticker)
+        self.ticker_stream.subscribe(self.get_ticker_symbols())
+        self.ticker_stream.start()
 
     def get_all_tickers(self):
+        if self.shared_tickers:
+            return
+
+        if self.ticker_stream:
+            # resubscribe when the positions or the signals change, request all the tickers if the stream is stale.
+            # no symbol means no ticker message, the empty stream is not stale.
+            symbols = self.get_ticker_symbols()
+            missing_symbols = self.ticker_stream.subscribe(symbols)
+            if len(symbols) == 0 or (self.ticker_stream.is_alive() and len(missing_symbols) == 0):
+                remove_stale_tickers(self.tickers_dict, symbols)  # the unsubscribed symbols are not updated any more.
+                return
 
         tickers = self.http_client.get_all_tickers()
-        if isinstance(tickers, list):
-            for tick in tickers:
-                symbol = tick['symbol']
-                ticker = {"bid_price": float(tick['bidPrice']), "ask_price": float(tick["askPrice"])}
-                self.tickers_dict[symbol] = ticker
+        if isinstance(tickers, BookTickers):
+            tickers = tickers.to_dict()
+        elif isinstance(tickers, list):
+            tickers = {tick['symbol']: {"bid_price": float(tick['bidPrice']), "ask_price": float(tick["askPrice"])}
+                       for tick in tickers}
         else:
-            self.tickers_dict = {}
+            self.tickers_dict.clear()
+            return
+
+        # the symbols not in the snapshot (delisted or halted) keep no old price for the orders.
+        remove_stale_tickers(self.tickers_dict, tickers)
+        self.tickers_dict.update(tickers)
+
+    def start_user_stream(self):
+        """
+        receive the order updates from the user data stream, the orders without updates are still checked by requests.
+        """
+        from gateway.binance_stream import UserDataStream
+
+        self.user_stream = UserDataStream(self.http_client, on_order_update=self.on_order_update)
+        self.user_stream.start()
+
+    def on_order_update(self, order: dict):
+        if order.get('status') != OrderStatus.NEW.value:
+            self.scheduler.wake('order', order.get('symbol'))
+
+    def get_open_orders(self):
+        """
+        get all the open orders in one request when config.batch_order_check is true.
+        :return: the open orders dict {clientOrderId: order}, or None if we need to check the orders one by one.
+        """
+        if not config.batch_order_check:
+            return None
+
+        if not any(self.buy_orders_dict.values()) and not any(self.sell_orders_dict.values()):
+            return None
+
+        orders = self.http_client.get_open_orders()
+        if not isinstance(orders, list):
+            return None
+
+        return {order.get('clientOrderId'): order for order in orders}
+
+    def check_order(self, order: dict, open_orders: dict = None):
+        """
+        the order is still open if it's in the open orders, otherwise request the order to get its final status and
+        executedQty.
+        """
+        check_order = None
+        if self.user_stream:
+            check_order = self.user_stream.get_order(order.get('clientOrderId'))
+
+        if check_order is None and open_orders is not None and order.get('clientOrderId') in open_orders:
+            check_order = open_orders[order.get('clientOrderId')]
+
+        if check_order is None:
+            check_order = self.http_client.get_order(order.get('symbol'), client_order_id=order.get('clientOrderId'))
+
+        if check_order and self.trade_store:
+            self.trade_store.record_order(check_order)
+        return check_order
 
     def start(self):
         """
@@ -92,13 +263,19 @@ class BinanceFutureTrader(object):
 
         delete_buy_orders = []  # the buy orders need to remove from buy_orders[] list
         delete_sell_orders = []  # the sell orders need to remove from sell_orders[] list
+        timer = metrics.phase_timer('trader_phase_seconds')  # the seconds of every phase, see utils/metrics.py.
+        open_orders = self.get_open_orders()  # None means we check the orders one by one.
+
+        if self.user_stream:
+            self.user_stream.prune([order.get('clientOrderId') for orders in
+                                    list(self.buy_orders_dict.values()) + list(self.sell_orders_dict.values())
+                                    for order in orders])
 
         # 买单逻辑,检查成交的情况.
 
         for key in self.buy_orders_dict.keys():
             for buy_order in self.buy_orders_dict.get(key, []):
-                check_order = self.http_client.get_order(buy_order.get('symbol'),
-                                                         client_order_id=buy_order.get('clientOrderId'))
+                check_order = self.check_order(buy_order, open_orders)
 
                 if check_order:
                     if check_order.get('status') == OrderStatus.CANCELED.value:
@@ -106,28 +283,34 @@ class BinanceFutureTrader(object):
 
                         symbol = buy_order.get('symbol')
                         print(f"{symbol}: buy order was canceled, time: {datetime.now()}")
+                        tracer.finish_order(check_order.get('clientOrderId'), 'canceled', account=self.account_name)
 
                         price = float(check_order.get('price'))
                         qty = float(check_order.get('executedQty', 0))
-                        min_qty = self.symbols_dict.get(symbol).get('min_qty', 0)
+                        # the final status of the order, a canceled order with executedQty is partially filled.
+                        metrics.inc('orders_total', event='partially_filled' if qty > 0 else 'canceled')
+                        min_qty = self.symbols_dict.get(symbol, {}).get('min_qty', 0)
 
                         if qty > 0:
                             self.positions.update(symbol=symbol, trade_price=price, trade_amount=qty, min_qty=min_qty,
-                                                  is_buy=True)
+                                                  is_buy=True, client_order_id=check_order.get('clientOrderId'))
 
                             logging.info(
                                 f"{symbol}: buy order was partially filled, price: {price}, qty: {qty}, time: {datetime.now()}")
 
                     elif check_order.get('status') == OrderStatus.FILLED.value:
                         delete_buy_orders.append(buy_order)
+                        metrics.inc('orders_total', event='filled')
+                        tracer.finish_order(check_order.get('clientOrderId'), 'filled', check_order,
+                                            account=self.account_name)
                         # 买单成交，挂卖单.
                         symbol = buy_order.get('symbol')
                         price = float(check_order.get('price'))
                         qty = float(check_order.get('origQty'))
-                        min_qty = self.symbols_dict.get(symbol).get('min_qty', 0)
+                        min_qty = self.symbols_dict.get(symbol, {}).get('min_qty', 0)
 
                         self.positions.update(symbol=symbol, trade_price=price, trade_amount=qty, min_qty=min_qty,
-                                              is_buy=True)
+                                              is_buy=True, client_order_id=check_order.get('clientOrderId'))
 
                         logging.info(
                             f"{symbol}: buy order was filled, price: {price}, qty: {qty}, time: {datetime.now()}")
@@ -150,8 +333,7 @@ class BinanceFutureTrader(object):
         # 卖单逻辑, 检查卖单成交情况.
         for key in self.sell_orders_dict.keys():
             for sell_order in self.sell_orders_dict.get(key, []):
-                check_order = self.http_client.get_order(sell_order.get('symbol'),
-                                                         client_order_id=sell_order.get('clientOrderId'))
+                check_order = self.check_order(sell_order, open_orders)
                 if check_order:
                     if check_order.get('status') == OrderStatus.CANCELED.value:
                         delete_sell_orders.append(sell_order)
@@ -161,25 +343,28 @@ class BinanceFutureTrader(object):
 
                         price = float(check_order.get('price'))
                         qty = float(check_order.get('executedQty', 0))
-                        min_qty = self.symbols_dict.get(symbol).get('min_qty', 0)
+                        # the final status of the order, a canceled order with executedQty is partially filled.
+                        metrics.inc('orders_total', event='partially_filled' if qty > 0 else 'canceled')
+                        min_qty = self.symbols_dict.get(symbol, {}).get('min_qty', 0)
 
                         if qty > 0:
                             self.positions.update(symbol=symbol, trade_price=price, trade_amount=qty, min_qty=min_qty,
-                                                  is_buy=False)
+                                                  is_buy=False, client_order_id=check_order.get('clientOrderId'))
 
                             logging.info(
                                 f"{symbol}: sell order was partially filled, price: {price}, qty: {qty}, total_profit: {self.positions.total_profit}, time: {datetime.now()}")
 
                     elif check_order.get('status') == OrderStatus.FILLED.value:
                         delete_sell_orders.append(sell_order)
+                        metrics.inc('orders_total', event='filled')
 
                         symbol = check_order.get('symbol')
                         price = float(check_order.get('price'))
                         qty = float(check_order.get('origQty'))
 
-                        min_qty = self.symbols_dict.get(symbol).get('min_qty', 0)
+                        min_qty = self.symbols_dict.get(symbol, {}).get('min_qty', 0)
                         self.positions.update(symbol=symbol, trade_price=price, trade_amount=qty, min_qty=min_qty,
-                                              is_buy=False)
+                                              is_buy=False, client_order_id=check_order.get('clientOrderId'))
 
                         logging.info(
                             f"{symbol}: sell order was filled, price: {price}, qty: {qty}, total_profit: {self.positions.total_profit}, time: {datetime.now()}")
@@ -203,7 +388,10 @@ class BinanceFutureTrader(object):
         check about the current position and order status.
         """
 
+        timer.mark('check_orders')
         self.get_all_tickers()
+        market_bus.publish_tickers(self.tickers_dict)  # for the other processes on the host, off by default.
+        timer.mark('tickers')
         if len(self.tickers_dict.keys()) == 0:
             return
 
@@ -215,8 +403,11 @@ class BinanceFutureTrader(object):
             bid_price = self.tickers_dict.get(s, {}).get('bid_price', 0)  # bid price
             ask_price = self.tickers_dict.get(s, {}).get('ask_price', 0)  # ask price
 
-            min_qty = self.symbols_dict.get(s, {}).get('min_qty')
-            min_price = self.symbols_dict.get(s, {}).get('min_price')
+            quantizer = self.symbols_dict.get(s, {}).get('quantizer')
+            if quantizer is None:
+                # delisted or halted, we can't place the orders of the position.
+                print(f"{s} 不在交易对信息里(下架或暂停交易), 跳过该仓位.")
+                continue
 
             if bid_price > 0 and ask_price > 0:
                 value = pos * bid_price
@@ -227,20 +418,13 @@ class BinanceFutureTrader(object):
 
                 else:
 
-                    avg_price = pos_data.get('avg_price')
                     self.positions.update_profit_max_price(s, bid_price)
-                    # calculate the profit here.
-                    profit_pct = bid_price / avg_price - 1
-                    drawdown_pct = pos_data.get('profit_max_price', 0) / bid_price - 1
-
-                    dump_pct = pos_data.get('last_entry_price', 0) / bid_price - 1
-                    current_increase_pos_count = pos_data.get('current_increase_pos_count', 1)
-
-                    loss_pct = avg_price / bid_price - 1
+                    # the exit, stop loss and increase rules are in utils/strategy.py, shared with the backtest.
+                    action = position_action(pos_data, bid_price, buy_orders=len(self.buy_orders_dict.get(s, [])),
+                                             sell_orders=len(self.sell_orders_dict.get(s, [])))
 
                     # there is profit here, consider whether exit this position.
-                    if profit_pct >= config.exit_profit_pct and drawdown_pct >= config.profit_drawdown_pct and len(
-                            self.sell_orders_dict.get(s, [])) <= 0:
+                    if action == EXIT:
                         """
                         the position is profitable and drawdown meets requirements.
                         """
@@ -253,8 +437,8 @@ class BinanceFutureTrader(object):
                             self.http_client.cancel_order(s, buy_order.get('clientOrderId'))
                         # price tick and quantity precision
                         price = ask_price * (1 - config.taker_price_pct)
-                        price = round_to(price, min_price)
-                        qty = floor_to(abs(pos), min_qty)
+                        price = quantizer.round_price(price)
+                        qty = quantizer.floor_qty(abs(pos))
 
                         sell_order = self.http_client.place_order(symbol=s, order_side=OrderSide.SELL,
                                                                   order_type=OrderType.LIMIT, quantity=qty,
@@ -266,7 +450,7 @@ class BinanceFutureTrader(object):
                             orders.append(sell_order)
                             self.sell_orders_dict[s] = orders
 
-                    elif loss_pct >= config.stop_loss_pct > 0 and len(self.sell_orders_dict.get(s, [])) <= 0:
+                    elif action == STOP_LOSS:
                         # cancel the buy orders. when we want to place sell orders, we need to cancel the buy orders.
                         buy_orders = self.buy_orders_dict.get(s, [])
                         for buy_order in buy_orders:
@@ -275,8 +459,8 @@ class BinanceFutureTrader(object):
                             self.http_client.cancel_order(s, buy_order.get('clientOrderId'))
                         # price tick and quantity precision
                         price = ask_price * (1-config.taker_price_pct)
-                        price = round_to(price, min_price)
-                        qty = floor_to(abs(pos), min_qty)
+                        price = quantizer.round_price(price)
+                        qty = quantizer.floor_qty(abs(pos))
 
                         sell_order = self.http_client.place_order(symbol=s, order_side=OrderSide.SELL,
                                                                   order_type=OrderType.LIMIT, quantity=qty,
@@ -289,8 +473,7 @@ class BinanceFutureTrader(object):
                             self.sell_orders_dict[s] = orders
 
 
-                    elif dump_pct >= config.increase_pos_when_drop_down and len(self.buy_orders_dict.get(s,
-                                                                                                         [])) <= 0 and current_increase_pos_count <= config.max_increase_pos_count:
+                    elif action == INCREASE:
 
                         # if the market price continue drop down you can increase your positions.
                         # cancel the sell orders, when we want to place buy orders, we need to cancel the sell orders.
@@ -300,11 +483,11 @@ class BinanceFutureTrader(object):
                                 "cancel the sell orders, when we want to place buy orders, we need to cancel the sell orders")
                             self.http_client.cancel_order(s, sell_order.get('clientOrderId'))
 
-                        buy_value = config.initial_trade_value * config.trade_value_multiplier ** current_increase_pos_count
+                        buy_value = increase_value(pos_data.get('current_increase_pos_count', 1))
 
                         price = bid_price * (1 + config.taker_price_pct)
-                        price = round_to(price, min_price)
-                        qty = floor_to(float(buy_value) / float(price), min_qty)
+                        price = quantizer.round_price(price)
+                        qty = quantizer.floor_qty(float(buy_value) / float(price))
 
                         buy_order = self.http_client.place_order(symbol=s, order_side=OrderSide.BUY,
                                                                  order_type=OrderType.LIMIT, quantity=qty,
@@ -320,9 +503,11 @@ class BinanceFutureTrader(object):
                 print(f"{s}: bid_price: {bid_price}, ask_price: {bid_price}")
 
         for s in deleted_positions:
-            del self.positions.positions[s]  # delete the position data if the position notional is very small.
+            self.positions.remove(s)  # delete the position data if the position notional is very small.
 
+        timer.mark('positions')
         self.positions.save_data()
+        timer.mark('save')
 
         pos_symbols = self.positions.positions.keys()  # the position's symbols, if there is {"symbol": postiondata}, you get the symbols here.
         pos_count = len(pos_symbols)  # position count
@@ -335,37 +520,47 @@ class BinanceFutureTrader(object):
             return
 
         self.initial_id = signal_data.get('id', self.initial_id)
+        tracer.pickup(self.initial_id, self.account_name)
 
-        index = 0
-        for signal in signal_data.get('signals', []):
-            s = signal['symbol']
-
-            if signal['signal'] == 1 and index < left_times and signal['symbol'] not in pos_symbols and signal[
-                'hour_turnover'] >= config.turnover_threshold:
-
-                # the last one hour's the symbol jump over some percent.
-                if len(config.allowed_lists) > 0 and s in config.allowed_lists:
+        # the entry rules are in utils/strategy.py, shared with the backtest.
+        for signal in select_entries(signal_data.get('signals', []), pos_symbols, left_times):
+            # the last one hour's the symbol jump over some percent.
+            self.place_order(signal['symbol'], signal['pct'], signal['pct_4h'])
+        tracer.close_signal(self.initial_id, self.account_name)
+        timer.mark('entries')
 
-                    index += 1
-                    # the last one hour's the symbol jump over some percent.
-                    self.place_order(s, signal['pct'], signal['pct_4h'])
-
-                elif s not in config.blocked_lists and len(config.allowed_lists) == 0:
-                    index += 1
-                    self.place_order(s, signal['pct'], signal['pct_4h'])
+    def watch_prices(self):
+        """
+        let the scheduler wake up the loop when the bid crosses the watched prices.
+        """
+        self.scheduler.watch(self.get_watch_prices(), self.tickers_dict)
 
-                elif len(config.allowed_lists) == 0 and config.blocked_lists == 0:
-                    index += 1
-                    self.place_order(s, signal['pct'], signal['pct_4h'])
+    def get_watch_prices(self):
+        """
+        the trigger prices of the positions, the min notional of the positions and the prices of the open orders.
+        :return: {symbol: [prices]}
+        """
+        symbol_levels = {}
+        for symbol, orders in list(self.buy_orders_dict.items()) + list(self.sell_orders_dict.items()):
+            symbol_levels.setdefault(symbol, []).extend(float(order.get('price', 0)) for order in orders)
 
+        for symbol, pos_data in self.positions.positions.items():
+            levels = symbol_levels.setdefault(symbol, [])
+            levels.extend(trigger_prices(pos_data, buy_orders=len(self.buy_orders_dict.get(symbol, [])),
+                                         sell_orders=len(self.sell_orders_dict.get(symbol, []))))
+            if pos_data.get('pos', 0) > 0:
+                levels.append(self.symbols_dict.get(symbol, {}).get('min_notional', 0) / pos_data['pos'])
 
+        return {symbol: [price for price in levels if price > 0] for symbol, levels in symbol_levels.items()}
 
     def place_order(self, symbol: str, hour_change: float, four_hour_change: float):
 
         buy_value = config.initial_trade_value
 
-        min_price = self.symbols_dict.get(symbol, {}).get('min_price')
-        min_qty = self.symbols_dict.get(symbol, {}).get('min_qty')
+        quantizer = self.symbols_dict.get(symbol, {}).get('quantizer')
+        if quantizer is None:
+            print(f"{symbol} 不在交易对信息里(下架或暂停交易), 不下单.")
+            return
 
         bid_price = self.tickers_dict.get(symbol, {}).get('bid_price', 0)  # bid price
         if bid_price <= 0:
@@ -373,13 +568,15 @@ class BinanceFutureTrader(object):
             return
 
         price = bid_price * (1 + config.taker_price_pct)
-        price = round_to(price, min_price)
+        price = quantizer.round_price(price)
 
-        qty = floor_to(float(buy_value) / float(price), min_qty)
+        qty = quantizer.floor_qty(float(buy_value) / float(price))
 
+        tracer.order_request(self.initial_id, symbol, self.account_name)
         buy_order = self.http_client.place_order(symbol=symbol, order_side=OrderSide.BUY,
                                                  order_type=OrderType.LIMIT, quantity=qty,
                                                  price=price)
+        tracer.order_ack(self.initial_id, symbol, buy_order, self.account_name)
 
         print(f"{symbol} hour change: {hour_change}, 4hour change: {four_hour_change}, place buy order: {buy_order}")
         if buy_order:
@@ -42,11 +42,35 @@ class Config:
         self.proxy_port = 0  # proxy port
         self.blocked_lists = []  # symbols ['BTCUSDT', 'ETHUSDT', ... ], the symbols in here will not trade.
         self.allowed_lists = []  # symbols ['BTCUSDT', 'ETHUSDT', ... ], if the list contains value(not empty), it will only trade the symbol in this lists
-        self.turnover_threshold = 100,000  # 100k usdt, the trading value should be higher than 100k usdt in an hour.
+        self.turnover_threshold = 100_000  # 100k usdt, the trading value should be higher than 100k usdt in an hour.
         self.stop_loss_pct = 0  # stop loss percent, zero means not stop loss. 止损百分比, 设置为零表示不用设置百分比。
 
         self.taker_price_pct = 0.005 # taker price.
 
+        self.kline_workers = 1  # how many kline requests are in flight when scanning the signals, 1 means one by one.
+        self.kline_cache = False  # only request the newest klines since the last scan.
+        self.kline_cache_file = ""  # save the kline cache in the trader folder, like 'klines.json', empty means memory only.
+        self.batch_order_check = False  # get all the open orders in one request, then only request the closed orders.
+        self.user_data_stream = False  # receive the order updates from the user data stream, need websocket-client.
+        self.ticker_stream = False  # update the tickers of the positions and signals from the bookTicker stream.
+        self.http_pool_size = 10  # the keep-alive connections for every host, 0 means a new connection for every request.
+        self.use_asyncio = False  # request the klines of the signal scan on an asyncio event loop, need aiohttp.
+        self.request_max_time = 30  # the max seconds a request blocks including the retries.
+        self.circuit_breaker_failures = 5  # an endpoint fails fast for 30s after the failures in a row, 0 means never.
+        self.positions_journal = False  # append the position changes to a journal instead of rewriting the file.
+        self.positions_compact_count = 1000  # rewrite the positions file and clear the journal after the changes.
+        self.trade_store_file = ""  # record the fills, orders and positions in the sqlite file in the trader folder.
+        self.fast_decode = False  # decode the tickers, klines and orders into floats and numpy arrays, faster with orjson.
+        self.metrics_port = 0  # serve the latency histograms and counters on http://127.0.0.1:port/metrics, 0 means off.
+        self.trace_file = ""  # append the signal to order latency traces to the jsonl file in the trader folder.
+        self.loop_interval = 10  # the seconds to wait after a trading loop when nothing happens.
+        self.event_loop = False  # run the loop on the order updates, the new signals and the ticker stream's prices.
+        self.shards = 1  # the worker processes trading the hash partitions of the symbols, see sharding/.
+        self.accounts = []  # [{'name': 'sub1', 'api_key': '', 'api_secret': ''}], trade them in one process.
+        self.market_bus = ""  # publish the tickers and klines into the memory-mapped file, like 'market_bus.bin'.
+        self.exchange_info_file = ""  # start from the exchangeInfo snapshot file, like 'exchange_info.json'.
+        self.exchange_info_ttl = 3600  # refresh the exchangeInfo snapshot in the background every seconds.
+
     def loads(self, config_file=None):
         """ Load config file.
 
@@ -0,0 +1,129 @@
+"""
+    The exchangeInfo cache: the symbols of the last exchangeInfo are saved in a snapshot file, the trader starts from
+    the snapshot without downloading the whole exchangeInfo, then refreshes it in a background thread every ttl
+    seconds (at once if the snapshot is older than the ttl).
+
+    binance has no delta of the exchangeInfo, so the refresh downloads it and only applies the changes: the new
+    symbols, the removed or halted symbols and the symbols whose filters changed get new symbol data, the others keep
+    their symbol data and quantizer. The new symbols_dict is built aside and swapped in with one assignment, the
+    trading loop and the signal scan never see a half updated dict. The removed symbols we still hold positions or
+    orders of are kept until they are closed.
+
+        cache = ExchangeInfoCache('exchange_info.json', ttl=3600)
+        items = cache.load()  # None means no snapshot, request the exchangeInfo.
+        symbols_dict, changes = cache.apply(symbols_dict, new_items, parse_symbols, keep={'BTCUSDT'})
+"""
+
+import os
+import json
+import time
+from threading import Thread, Event
+from utils.utility import get_file_path
+
+
+class ExchangeInfoCache(object):
+
+    def __init__(self, file_name: str, ttl: float = 3600, retry_interval: float = 60):
+        """
+        :param file_name: the snapshot json file in the trader folder.
+        :param ttl: the seconds between the refreshes.
+        :param retry_interval: the seconds to retry a failed refresh.
+        """
+        self.file_name = file_name
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.items = {}  # {symbol: the exchangeInfo item of the symbol}
+        self.update_time = 0  # the time of the items.
+        self.refresh_count = 0
+        self.stop_event = Event()
+        self.thread = None
+
+    def load(self):
+        """
+        :return: the items of the snapshot, None if there is no snapshot.
+        """
+        filepath = get_file_path(self.file_name)
+        if not filepath.exists():
+            return None
+        try:
+            with open(filepath, mode="r", encoding="UTF-8") as f:
+                data = json.load(f)
+        except ValueError as error:
+            print(f"exchangeInfo快照文件损坏: {error}")
+            return None
+
+        self.update_time = data.get('time', 0)
+        self.items = {item['symbol']: item for item in data.get('symbols', [])}
+        return list(self.items.values())
+
+    def save(self, items: list):
+        """
+        save the items of the symbols we trade, the others are never used.
+        """
+        self.items = {item['symbol']: item for item in items}
+        self.update_time = time.time()
+        filepath = get_file_path(self.file_name)
+        temp_path = filepath.with_name(f"{filepath.name}.{os.getpid()}.tmp")  # the shard workers save it too.
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump({'time': self.update_time, 'symbols': items}, f, separators=(',', ':'))
+        temp_path.replace(filepath)
+
+    @property
+    def age(self):
+        return time.time() - self.update_time
+
+    def apply(self, symbols_dict: dict, items: list, parse_symbols, keep=()):
+        """
+        :param symbols_dict: the current symbols_dict.
+        :param items: the symbol items of the new exchangeInfo.
+        :param parse_symbols: the trader's function from the items to the {symbol: symbol_data} of the tradable ones.
+        :param keep: the symbols we hold positions or orders of, not removed.
+        :return: (the new symbols_dict, {'added': [], 'removed': [], 'halted': [], 'changed': []})
+        """
+        new_items = {item['symbol']: item for item in items}
+        changed = {symbol for symbol, item in new_items.items() if
+                   symbol not in symbols_dict or self.items.get(symbol) != item}
+        parsed = parse_symbols([new_items[symbol] for symbol in changed])
+
+        changes = {'added': [], 'removed': [], 'halted': [], 'changed': []}
+        result = {}
+        for symbol, data in symbols_dict.items():
+            if symbol in parsed:
+                result[symbol] = parsed[symbol]
+                changes['changed'].append(symbol)
+            elif symbol in new_items and symbol not in changed:
+                result[symbol] = data  # not changed.
+            else:
+                # delisted, or not trading or filtered out any more.
+                changes['halted' if symbol in new_items else 'removed'].append(symbol)
+                if symbol in keep:
+                    result[symbol] = data
+
+        for symbol, data in parsed.items():
+            if symbol not in symbols_dict:
+                result[symbol] = data
+                changes['added'].append(symbol)
+
+        # the snapshot keeps the items of the tradable symbols.
+        self.save([new_items[symbol] for symbol in result if symbol in new_items])
+        return result, changes
+
+    def start(self, refresh):
+        """
+        call refresh() in the background every ttl seconds, refresh returns False if the request failed.
+        """
+        if self.thread or self.ttl <= 0:
+            return
+
+        def run():
+            delay = max(self.ttl - self.age, 0)
+            while not self.stop_event.wait(delay):
+                ok = refresh()
+                self.refresh_count += 1
+                delay = self.ttl if ok else self.retry_interval
+
+        self.thread = Thread(target=run, daemon=True, name='exchange_info')
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
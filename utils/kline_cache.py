@@ -0,0 +1,135 @@
+"""
+    Rolling kline cache for the hourly signal scan.
+
+    The first request of a symbol downloads the full limit of klines, after that we only request the klines from the
+    last cached open_time (the last kline may not be closed the last time we fetched it), merge them into the cache
+    and backfill the gaps if there is any. So every hourly scan only downloads the newest one or two klines of a symbol.
+"""
+
+import json
+import time
+from threading import Lock
+from gateway.binance_future import Interval
+from utils.utility import get_file_path
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000, '8h': 28_800_000,
+    '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000
+}
+
+
+class KlineCache(object):
+
+    def __init__(self, max_bars=500, file_name=""):
+        """
+        :param max_bars: how many klines we keep for every symbol/interval.
+        :param file_name: the json file in the trader folder to save the cache, empty means memory only.
+        """
+        self.max_bars = max_bars
+        self.file_name = file_name
+        self.klines = {}  # {'BTCUSDT_1h': [kline, kline, ...]}
+        self.lock = Lock()
+        self.full_requests = 0  # the requests downloading the whole limit of klines.
+        self.incremental_requests = 0  # the requests only downloading the newest klines.
+        self.backfill_requests = 0  # the requests filling the gaps.
+        if self.file_name:
+            self.load()
+
+    def load(self):
+        filepath = get_file_path(self.file_name)
+        if filepath.exists():
+            with open(filepath, mode="r", encoding="UTF-8") as f:
+                self.klines = json.load(f)
+
+    def save(self):
+        if not self.file_name:
+            return
+        with self.lock:
+            data = dict(self.klines)
+        filepath = get_file_path(self.file_name)
+        temp_path = filepath.with_suffix('.tmp')
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(data, f, separators=(',', ':'))
+        temp_path.replace(filepath)
+
+    def get_klines(self, http_client, symbol: str, interval: Interval, limit: int):
+        """
+        return the latest limit klines of the symbol, the same as http_client.get_kline(symbol, interval, limit=limit)
+        """
+        steps = self.fetch(symbol, interval, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(http_client.get_kline(**request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def async_get_klines(self, http_client, symbol: str, interval: Interval, limit: int):
+        """
+        get_klines with the asyncio gateway, the same requests are awaited.
+        """
+        steps = self.fetch(symbol, interval, limit)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await http_client.get_kline(**request))
+        except StopIteration as stop:
+            return stop.value
+
+    def fetch(self, symbol: str, interval: Interval, limit: int):
+        """
+        the generator of the kline requests, it yields the get_kline arguments and receives the klines, so the sync
+        and the asyncio gateways share it. It returns the latest limit klines.
+        """
+        key = f"{symbol}_{interval.value}"
+        step = INTERVAL_MS[interval.value]
+        cached = self.klines.get(key, [])
+
+        missing = 0
+        if cached:
+            missing = (int(time.time() * 1000) - cached[-1][0]) // step + 1
+
+        if not cached or len(cached) < limit or missing >= limit:
+            klines = yield dict(symbol=symbol, interval=interval, limit=limit)
+            self.full_requests += 1
+            if not klines:
+                return []
+        else:
+            new_klines = yield dict(symbol=symbol, interval=interval, start_time=cached[-1][0], limit=missing + 1)
+            self.incremental_requests += 1
+            if not new_klines:
+                return []  # the same as the request failed without cache.
+
+            # our clock may be behind the exchange, the full response means there may be newer klines.
+            data = new_klines
+            while len(data) == missing + 1 and len(new_klines) < limit:
+                data = yield dict(symbol=symbol, interval=interval, start_time=new_klines[-1][0] + step,
+                                  limit=missing + 1, max_try_time=1)
+                self.backfill_requests += 1
+                new_klines = new_klines + data
+            klines = [kline for kline in cached if kline[0] < new_klines[0][0]]
+            klines = yield from self.backfill(symbol, interval, klines + new_klines, len(klines), step)
+
+        klines = klines[-self.max_bars:]
+        with self.lock:
+            self.klines[key] = klines
+        return klines[-limit:]
+
+    def backfill(self, symbol: str, interval: Interval, klines: list, index: int, step: int):
+        """
+        request the missing klines after the index (where the new klines start), the symbol may have no klines if it
+        was halted, so we only try once for every gap.
+        """
+        index = max(index, 1)
+        while index < len(klines):
+            gap = (klines[index][0] - klines[index - 1][0]) // step - 1
+            if gap > 0:
+                data = yield dict(symbol=symbol, interval=interval, start_time=klines[index - 1][0] + step,
+                                  end_time=klines[index][0] - 1, limit=min(gap, 1000), max_try_time=1)
+                self.backfill_requests += 1
+                data = [kline for kline in data if klines[index - 1][0] < kline[0] < klines[index][0]]
+                klines = klines[:index] + data + klines[index:]
+                index += len(data)
+            index += 1
+        return klines
@@ -0,0 +1,229 @@
+"""
+    The market data bus: the bot publishes its tickers and klines into a memory-mapped file, the other processes on
+    the host (a monitor, a backtest warmup, another bot) read them with numpy views, without requests or copies.
+
+    the file layout is fixed when it's created with the symbols of the exchangeInfo:
+
+    1. header: int64[16], the magic, the layout version, the symbols, the bars, the fields and the sequence and the
+    time of the tickers and of the klines.
+    2. symbols: S32[symbols]
+    3. tickers: float64[symbols, 2], the bid and the ask price, nan means no ticker.
+    4. klines: float64[symbols, bars, 7], the array of utils.signals.stack_klines, the last kline at the last bar.
+
+    the writer is a seqlock: the sequence of a table is odd while it's written and even after, the reader doesn't
+    lock, it reads the sequence, uses the view, then checks the sequence is the same:
+
+        reader = MarketBusReader('market_bus.bin')
+        while True:
+            seq, tickers = reader.view_tickers()  # read only view of the shared pages, no copy.
+            bid = tickers[reader.index['BTCUSDT'], 0]
+            if reader.valid_tickers(seq):
+                break
+
+        version, data = reader.read_klines()  # a consistent copy, calculate_signals(reader.symbols, data)
+
+    the publisher writes a new file and renames it when it starts, the readers of the old file see is_replaced().
+"""
+
+import os
+import time
+import numpy as np
+from utils.utility import get_file_path
+
+MAGIC = 0x4D41524B4554  # 'MARKET'
+LAYOUT_VERSION = 1
+HEADER_SIZE = 16
+SYMBOL_DTYPE = 'S32'
+KLINE_FIELDS = 7
+
+# the fields of the header.
+H_MAGIC, H_LAYOUT, H_SYMBOLS, H_BARS, H_FIELDS, H_TICKERS_SEQ, H_TICKERS_TIME, H_KLINES_SEQ, H_KLINES_TIME = range(9)
+
+
+def layout(symbol_count: int, bars: int):
+    """
+    :return: the offsets of the symbols, the tickers, the klines and the file size in bytes.
+    """
+    symbols_offset = HEADER_SIZE * 8
+    tickers_offset = symbols_offset + symbol_count * np.dtype(SYMBOL_DTYPE).itemsize
+    klines_offset = tickers_offset + symbol_count * 2 * 8
+    size = klines_offset + symbol_count * bars * KLINE_FIELDS * 8
+    return symbols_offset, tickers_offset, klines_offset, size
+
+
+def map_tables(buffer, symbol_count: int, bars: int):
+    """
+    :return: (header, symbols, tickers, klines) numpy views of the buffer.
+    """
+    symbols_offset, tickers_offset, klines_offset, _ = layout(symbol_count, bars)
+    header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=buffer)
+    symbols = np.ndarray((symbol_count,), dtype=SYMBOL_DTYPE, buffer=buffer, offset=symbols_offset)
+    tickers = np.ndarray((symbol_count, 2), dtype=np.float64, buffer=buffer, offset=tickers_offset)
+    klines = np.ndarray((symbol_count, bars, KLINE_FIELDS), dtype=np.float64, buffer=buffer, offset=klines_offset)
+    return header, symbols, tickers, klines
+
+
+class MarketBus(object):
+    """
+    the publisher, off until create() is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.memmap = None
+        self.header = self.tickers = self.klines = None
+        self.index = {}  # {symbol: row}
+        self.bars = 0
+
+    def create(self, file_name: str, symbols: list, bars: int = 100):
+        """
+        :param file_name: the file in the trader folder, or an absolute path like '/dev/shm/market_bus.bin'.
+        :param symbols: the symbols of the rows, like the keys of the trader's symbols_dict.
+        :param bars: the klines kept for every symbol.
+        """
+        self.path = get_file_path(file_name)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        size = layout(len(symbols), bars)[3]
+        memmap = np.memmap(temp_path, dtype=np.uint8, mode='w+', shape=(size,))
+        header, symbol_table, tickers, klines = map_tables(memmap, len(symbols), bars)
+        symbol_table[:] = [symbol.encode('utf-8') for symbol in symbols]
+        tickers[:] = np.nan
+        klines[:] = np.nan
+        header[[H_LAYOUT, H_SYMBOLS, H_BARS, H_FIELDS]] = [LAYOUT_VERSION, len(symbols), bars, KLINE_FIELDS]
+        header[H_MAGIC] = MAGIC  # the last, a reader never sees a half written layout.
+        memmap.flush()
+        os.replace(temp_path, self.path)  # the mapping still points to the renamed file.
+
+        self.memmap = memmap
+        self.header, self.tickers, self.klines = header, tickers, klines
+        self.index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.bars = bars
+        self.enabled = True
+
+    def publish_tickers(self, tickers_dict: dict):
+        """
+        :param tickers_dict: {symbol: {'bid_price':, 'ask_price':}}, the symbols not in the file are skipped.
+        """
+        if not self.enabled:
+            return
+        header, tickers, index = self.header, self.tickers, self.index
+        header[H_TICKERS_SEQ] += 1  # odd, the readers retry.
+        for symbol, ticker in list(tickers_dict.items()):
+            i = index.get(symbol)
+            if i is not None:
+                tickers[i, 0] = ticker.get('bid_price', np.nan)
+                tickers[i, 1] = ticker.get('ask_price', np.nan)
+        header[H_TICKERS_TIME] = int(time.time() * 1000)
+        header[H_TICKERS_SEQ] += 1
+
+    def publish_klines(self, symbols: list, data: np.ndarray):
+        """
+        :param symbols: the symbols of the data rows.
+        :param data: the array of stack_klines, (len(symbols), bars, 7), the rows of the other symbols are nan.
+        """
+        if not self.enabled:
+            return
+        rows = [self.index.get(symbol) for symbol in symbols]
+        mask = np.array([row is not None for row in rows], dtype=bool)
+        rows = np.array([row for row in rows if row is not None], dtype=np.int64)
+        data = data[mask][:, -self.bars:] if len(data) else data
+
+        klines = np.full(self.klines.shape, np.nan)
+        if len(rows):
+            klines[rows, self.bars - data.shape[1]:] = data
+
+        self.header[H_KLINES_SEQ] += 1
+        self.klines[:] = klines
+        self.header[H_KLINES_TIME] = int(time.time() * 1000)
+        self.header[H_KLINES_SEQ] += 1
+
+
+class MarketBusReader(object):
+
+    def __init__(self, file_name: str):
+        """
+        attach to the file of the publisher read only.
+        """
+        self.path = get_file_path(file_name)
+        self.inode = os.stat(self.path).st_ino
+        self.memmap = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.memmap)
+        if header[H_MAGIC] != MAGIC or header[H_LAYOUT] != LAYOUT_VERSION:
+            raise ValueError(f"{self.path} 不是market bus文件, 或者版本不对")
+
+        symbol_count, bars = int(header[H_SYMBOLS]), int(header[H_BARS])
+        self.header, symbols, self.tickers, self.klines = map_tables(self.memmap, symbol_count, bars)
+        self.symbols = [symbol.decode('utf-8') for symbol in symbols]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def is_replaced(self):
+        """
+        the publisher restarted with a new file, attach again to read it.
+        """
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def view_tickers(self):
+        """
+        :return: (the sequence, the read only view of the tickers), check the sequence with valid_tickers after use.
+        """
+        while True:
+            seq = int(self.header[H_TICKERS_SEQ])
+            if seq % 2 == 0:
+                return seq, self.tickers
+            time.sleep(0)
+
+    def valid_tickers(self, seq: int):
+        return int(self.header[H_TICKERS_SEQ]) == seq
+
+    def view_klines(self):
+        while True:
+            seq = int(self.header[H_KLINES_SEQ])
+            if seq % 2 == 0:
+                return seq, self.klines
+            time.sleep(0)
+
+    def valid_klines(self, seq: int):
+        return int(self.header[H_KLINES_SEQ]) == seq
+
+    def read_tickers(self):
+        """
+        :return: (the sequence, a consistent copy of the tickers).
+        """
+        while True:
+            seq, view = self.view_tickers()
+            tickers = view.copy()
+            if self.valid_tickers(seq):
+                return seq, tickers
+
+    def read_klines(self):
+        while True:
+            seq, view = self.view_klines()
+            klines = view.copy()
+            if self.valid_klines(seq):
+                return seq, klines
+
+    def tickers_dict(self):
+        """
+        :return: the tickers like the trader's tickers_dict, the symbols without tickers are skipped.
+        """
+        _, tickers = self.read_tickers()
+        return {symbol: {'bid_price': float(tickers[i, 0]), 'ask_price': float(tickers[i, 1])} for i, symbol in
+                enumerate(self.symbols) if not np.isnan(tickers[i, 0])}
+
+    @property
+    def tickers_time(self):
+        """
+        the milliseconds timestamp of the last tickers, 0 means never published.
+        """
+        return int(self.header[H_TICKERS_TIME])
+
+    @property
+    def klines_time(self):
+        return int(self.header[H_KLINES_TIME])
+
+
+market_bus = MarketBus()
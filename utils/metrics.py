@@ -0,0 +1,225 @@
+"""
+    The latency histograms and the counters of the bot, served in the Prometheus text format.
+
+    the metrics are off by default, every call returns at once (the timers are a shared no-op object), turn them on
+    with config.metrics_port:
+
+        metrics.enable()
+        metrics.start_server(9100)  # curl http://127.0.0.1:9100/metrics
+
+        with metrics.timer('request_seconds', endpoint='GET /fapi/v1/order'):
+            ...
+
+        timer = metrics.phase_timer('trader_phase_seconds')
+        ...  # check the orders
+        timer.mark('check_orders')  # the seconds since the timer was created or the last mark.
+
+        metrics.inc('orders_total', event='placed')
+
+    1. trader_phase_seconds{phase}: check_orders, tickers, positions, save and entries of start().
+    2. trader_cycle_seconds: the whole start() of the main loop.
+    3. scan_seconds{phase}: fetch_klines and signals of get_data.
+    4. request_seconds{endpoint}: the gateway requests including the retries.
+    5. request_retries_total{endpoint}, request_failures_total{endpoint}, orders_total{event}: placed by the requests,
+    and filled, canceled and partially_filled (canceled with executedQty) from the final status of the orders.
+"""
+
+import time
+from bisect import bisect_left
+from threading import Lock, Thread
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PREFIX = 'martingle_'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf.
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Timer(object):
+
+    def __init__(self, metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class PhaseTimer(object):
+
+    def __init__(self, metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.last = time.perf_counter()
+
+    def mark(self, phase: str):
+        """
+        observe the seconds since the last mark as the phase.
+        """
+        now = time.perf_counter()
+        self.metrics.observe(self.name, now - self.last, phase=phase, **self.labels)
+        self.last = now
+
+
+class NullTimer(object):
+    """
+    the timer of the disabled metrics.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+    def mark(self, phase: str):
+        return None
+
+
+NULL_TIMER = NullTimer()
+
+
+class Metrics(object):
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = Lock()
+        self.histograms = {}  # {(name, labels): Histogram}
+        self.counters = {}  # {(name, labels): value}
+        self.server = None
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def count_request(self, endpoint: str, data):
+        """
+        count the failed request, or the order placed by the request. The canceled orders are counted from their
+        final status, a cancel request may be too late for a filled order.
+        :param endpoint: 'POST /fapi/v1/order'
+        :param data: the result of the request, None means failed.
+        """
+        if not self.enabled:
+            return
+        if data is None:
+            self.inc('request_failures_total', endpoint=endpoint)
+        elif endpoint.endswith('/order'):
+            if endpoint.startswith('POST'):
+                self.inc('orders_total', event='placed')
+
+    def timer(self, name: str, **labels):
+        """
+        :return: the context manager observing the seconds of the block.
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name, labels)
+
+    def phase_timer(self, name: str, **labels):
+        if not self.enabled:
+            return NULL_TIMER
+        return PhaseTimer(self, name, labels)
+
+    def render(self):
+        """
+        :return: the metrics in the Prometheus text format.
+        """
+        with self.lock:
+            histograms = {key: (list(item.counts), item.sum, item.count) for key, item in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines, types = [], set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            name = PREFIX + name
+            if name not in types:
+                types.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bucket, bucket_count in zip(list(DEFAULT_BUCKETS) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', bucket),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(counters.items()):
+            name = PREFIX + name
+            if name not in types:
+                types.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self, port: int, host: str = '127.0.0.1'):
+        """
+        serve the metrics on http://host:port/metrics in a daemon thread.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+
+def format_labels(labels: tuple):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
@@ -17,19 +17,44 @@
 
     服务器购买地址: https://www.ucloud.cn/site/global.html?invitation_code=C1x2EA81CD79B8C#dongjing
 """
-from utils.config import config
+import json
+from utils.strategy import new_position, apply_trade
 from utils.utility import get_file_path, load_json, save_json
 
 
 class Positions:
+    """
+    the positions and the total profit, saved in the json file of the trader folder.
 
-    def __init__(self, file_name):
+    save_data only writes the file when the data has changed since the last save. In the journal mode every change is
+    appended to the journal file as one compact line instead, the journal is replayed after the json file when loading,
+    and compacted into the json file after compact_count lines, so the cost of a change doesn't grow with the positions.
+    """
+
+    def __init__(self, file_name, journal=False, compact_count=1000, store=None):
+        """
+        :param file_name: the json file name in the trader folder, None means in memory only, never saved.
+        :param journal: append the changes to the journal file, the json file name + '.journal'.
+        :param compact_count: write the json file and clear the journal after the lines.
+        :param store: the TradeStore to record the fills and the position changes, None means no history.
+        """
         self.file_name = file_name
         self.positions = {}
         self.total_profit = 0
+        self.dirty = False  # changed since the last save.
+        self.journal = journal and bool(file_name)
+        self.compact_count = compact_count
+        self.journal_count = 0  # the lines in the journal file.
+        self.journal_file = None
+        self.store = store
         self.read_data()  # read the saved data
+        if self.store:
+            self.store.sync_positions(self.positions, self.total_profit)
 
     def read_data(self):
+        if not self.file_name:
+            return
+
         filepath = get_file_path(self.file_name)
         data = load_json(filepath)
         if not bool(data):
@@ -39,35 +64,93 @@ class Positions:
             self.total_profit = float(data.get('total_profit', 0))
             self.positions = data.get('positions', {})
 
+        self.read_journal()
+
+    def read_journal(self):
+        """
+        replay the changes after the json file was saved, every line is the whole position after the change.
+        """
+        journal_path = get_file_path(self.file_name + '.journal')
+        if not journal_path.exists():
+            return
+
+        cut = False
+        with open(journal_path, mode="r", encoding="UTF-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    cut = True  # the last line was cut by a crash.
+                    break
+                self.journal_count += 1
+                self.total_profit = record['total_profit']
+                if record['pos'] is None:
+                    self.positions.pop(record['symbol'], None)
+                else:
+                    self.positions[record['symbol']] = record['pos']
+
+        self.dirty = True
+        if cut or not self.journal:
+            # don't append after a cut line, and keep the changes in the json file if the journal mode is turned off.
+            self.compact()
+
     def save_data(self):
-        filename = get_file_path(self.file_name)
-        save_json(filename, {'total_profit': self.total_profit, 'positions': self.positions})
+        if not self.dirty or not self.file_name:
+            return
+
+        if self.journal:
+            if self.journal_count >= self.compact_count:
+                self.compact()
+        else:
+            save_json(get_file_path(self.file_name), {'total_profit': self.total_profit, 'positions': self.positions})
+            self.dirty = False
 
-    def update(self, symbol: str, trade_amount: float, trade_price: float, min_qty: float, is_buy: bool = False):
+    def compact(self):
+        """
+        write the json file, then clear the journal.
+        """
+        save_json(get_file_path(self.file_name), {'total_profit': self.total_profit, 'positions': self.positions})
+        if self.journal_file:
+            self.journal_file.close()
+            self.journal_file = None
+        get_file_path(self.file_name + '.journal').unlink(missing_ok=True)
+        self.journal_count = 0
+        self.dirty = False
+
+    def changed(self, symbol: str):
+        """
+        mark the data changed, and append the position of the symbol to the journal in the journal mode.
+        """
+        self.dirty = True
+        if not self.journal:
+            return
+
+        if self.journal_file is None:
+            self.journal_file = open(get_file_path(self.file_name + '.journal'), mode="a", encoding="UTF-8")
+        record = {'symbol': symbol, 'pos': self.positions.get(symbol), 'total_profit': self.total_profit}
+        self.journal_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.journal_file.flush()
+        self.journal_count += 1
+
+    def update(self, symbol: str, trade_amount: float, trade_price: float, min_qty: float, is_buy: bool = False,
+               client_order_id: str = ''):
         """
         :param symbol:
         :param trade_amount:
         :param trade_price:
         :param is_buy:
+        :param client_order_id: the filled order, recorded in the store.
         :return:
         """
+        total_profit = self.total_profit
         pos = self.positions.get(symbol, None)
         if pos is None:
-            #
-            pos = {'symbol': symbol, 'pos': 0, 'avg_price': 0, 'last_entry_price': 0, 'current_increase_pos_count': 0,
-                   'profit_max_price': 0}
-
-        if is_buy:
-            pos['current_increase_pos_count'] = pos['current_increase_pos_count'] + 1
-            pos['avg_price'] = (trade_amount * trade_price + pos['avg_price'] * pos['pos']) / (
-                    trade_amount + pos['pos'])
-            pos['pos'] = trade_amount + pos['pos']
-            pos['last_entry_price'] = trade_price
+            pos = new_position(symbol)
 
-        else:
-            self.total_profit += (trade_price - pos[
-                'avg_price']) * trade_amount - 2 * trade_amount * trade_price * config.trading_fee
-            pos['pos'] = pos['pos'] - trade_amount
+        # the same math as the backtest, see utils/strategy.py
+        profit = apply_trade(pos, trade_amount, trade_price, is_buy)
+        if not is_buy:
+            self.total_profit += profit
 
         if pos['pos'] < min_qty:
             if self.positions.get(symbol, None):
@@ -75,6 +158,13 @@ class Positions:
         else:
             self.positions[symbol] = pos
 
+        self.changed(symbol)
+        if self.store:
+            self.store.record_position(symbol, self.positions.get(symbol), self.total_profit,
+                                       fill={'side': 'BUY' if is_buy else 'SELL', 'price': trade_price,
+                                             'qty': trade_amount, 'realized_pnl': self.total_profit - total_profit,
+                                             'client_order_id': client_order_id})
+
     def update_profit_max_price(self, symbol: str, price: float):
         """
         :param symbol:
@@ -82,4 +172,15 @@ class Positions:
         :return:
         """
         if self.positions.get(symbol, None):
-            self.positions[symbol]['profit_max_price'] = max(price, self.positions[symbol]['profit_max_price'])
+            if price > self.positions[symbol]['profit_max_price']:
+                self.positions[symbol]['profit_max_price'] = price
+                self.changed(symbol)
+
+    def remove(self, symbol: str):
+        """
+        delete the position data, like the position notional is very small.
+        """
+        if self.positions.pop(symbol, None) is not None:
+            self.changed(symbol)
+            if self.store:
+                self.store.record_position(symbol, None, self.total_profit)
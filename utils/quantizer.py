@@ -0,0 +1,171 @@
+"""
+    The price and quantity quantizers of the symbols, compiled once from the PRICE_FILTER and LOT_SIZE of exchangeInfo.
+
+    the exchange accepts a price if (price - minPrice) % tickSize == 0 and a quantity if (quantity - minQty) % stepSize
+    == 0. round_to and floor_to build the Decimals from the strings on every call, the quantizer keeps the tick as an
+    integer of 10 ** -decimals units, so a quantization is a float multiply and a round in the most cases:
+
+    1. the value is scaled to the ticks with floats, the result is exact unless it's very close to a rounding boundary
+    (a half tick for the prices, a whole tick for the quantities), these few values are quantized with the Decimals of
+    their str like round_to and floor_to.
+    2. the price is rounded to the nearest tick (the half to even like round_to), the quantity is rounded down.
+    3. the scalar methods return the string to send in the order, in the plain notation with the tick's decimals, the
+    array methods return the floats.
+
+        quantizer = SymbolQuantizer(tick_size='0.01', step_size='0.001')
+        quantizer.round_price(26123.456)  # '26123.46'
+        quantizer.floor_qty(0.01239)  # '0.012'
+        quantizer.round_prices(np.array([1.005, 2.015]))  # array([1.0, 2.02])
+"""
+
+import math
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_FLOOR
+
+import numpy as np
+
+# the relative error of the float scaling is a few ulp, the values closer than this to a boundary use the Decimals.
+BOUNDARY_TOLERANCE = 1e-9
+
+
+class TickRule(object):
+    """
+    the grid of a filter: minimum + k * tick, the values are integers of 10 ** -decimals units.
+    """
+
+    def __init__(self, tick: str, minimum: str = '0', maximum: str = '0'):
+        """
+        :param tick: the tickSize or the stepSize string of the filter.
+        :param minimum: the minPrice or the minQty string.
+        :param maximum: the maxPrice or the maxQty string, 0 means no limit.
+        """
+        tick, minimum, maximum = Decimal(str(tick)), Decimal(str(minimum or 0)), Decimal(str(maximum or 0))
+        if tick <= 0:
+            raise ValueError(f"tick必须大于0: {tick}")
+
+        self.decimals = max(-tick.normalize().as_tuple().exponent, -minimum.normalize().as_tuple().exponent, 0)
+        self.scale = 10 ** self.decimals
+        self.tick = int(tick * self.scale)
+        self.offset = int(minimum * self.scale) % self.tick  # the grid starts at the minimum.
+        self.minimum = int(minimum * self.scale)
+        self.maximum = int(maximum * self.scale)
+        self.decimal_tick = tick
+        self.decimal_offset = Decimal(self.offset) / self.scale
+        self.template = f"%d.%0{self.decimals}d" if self.decimals else "%d"
+
+    def to_ticks(self, value: float):
+        return (value * self.scale - self.offset) / self.tick
+
+    def round(self, value: float) -> int:
+        """
+        the nearest value on the grid, in units.
+        """
+        x = (value * self.scale - self.offset) / self.tick
+        k = round(x)  # the half to even.
+        if abs(abs(x - k) - 0.5) <= BOUNDARY_TOLERANCE * (abs(x) + 1):
+            k = self.exact_ticks(value, ROUND_HALF_EVEN)
+        return self.offset + k * self.tick
+
+    def floor(self, value: float) -> int:
+        """
+        the largest value on the grid not greater than the value, in units.
+        """
+        x = (value * self.scale - self.offset) / self.tick
+        k = math.floor(x)
+        tolerance = BOUNDARY_TOLERANCE * (abs(x) + 1)
+        if x - k <= tolerance or k + 1 - x <= tolerance:
+            k = self.exact_ticks(value, ROUND_FLOOR)
+        return self.offset + k * self.tick
+
+    def exact_ticks(self, value: float, rounding: str) -> int:
+        """
+        the ticks of the value's str with the Decimals, for the values close to a boundary.
+        """
+        ticks = (Decimal(str(value)) - self.decimal_offset) / self.decimal_tick
+        return int(ticks.to_integral_value(rounding=rounding))
+
+    def round_array(self, values: np.ndarray) -> np.ndarray:
+        x = self.to_ticks(np.asarray(values, dtype=np.float64))
+        k = np.rint(x)  # the half to even.
+        near = np.abs(np.abs(x - k) - 0.5) <= BOUNDARY_TOLERANCE * (np.abs(x) + 1)
+        return self.from_ticks(k, near, values, ROUND_HALF_EVEN)
+
+    def floor_array(self, values: np.ndarray) -> np.ndarray:
+        x = self.to_ticks(np.asarray(values, dtype=np.float64))
+        k = np.floor(x)
+        tolerance = BOUNDARY_TOLERANCE * (np.abs(x) + 1)
+        near = (x - k <= tolerance) | (k + 1 - x <= tolerance)
+        return self.from_ticks(k, near, values, ROUND_FLOOR)
+
+    def from_ticks(self, ticks: np.ndarray, near: np.ndarray, values, rounding: str) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        for index in np.flatnonzero(near):
+            ticks.flat[index] = self.exact_ticks(float(values.flat[index]), rounding)
+        return (self.offset + ticks * self.tick) / self.scale
+
+    def format(self, units: int) -> str:
+        """
+        the units in the plain notation with the decimals, like '0.0100'.
+        """
+        if units < 0:
+            return '-' + self.format(-units)
+        return self.template % (divmod(units, self.scale) if self.decimals else units)
+
+    def is_valid(self, value) -> bool:
+        """
+        whether the exchange accepts the value: on the grid and between the minimum and the maximum.
+        """
+        units = Decimal(str(value)) * self.scale
+        if units != units.to_integral_value() or (int(units) - self.offset) % self.tick:
+            return False
+        return int(units) >= self.minimum and (self.maximum <= 0 or int(units) <= self.maximum)
+
+
+class SymbolQuantizer(object):
+
+    def __init__(self, tick_size='0.01', step_size='0.001', min_price='0', max_price='0', min_qty='0', max_qty='0'):
+        """
+        the strings of the symbol's PRICE_FILTER and LOT_SIZE filters.
+        """
+        self.price_rule = TickRule(tick_size, min_price, max_price)
+        self.qty_rule = TickRule(step_size, min_qty, max_qty)
+
+    @classmethod
+    def from_filters(cls, filters: list):
+        """
+        :param filters: the filters of the symbol in exchangeInfo.
+        """
+        kwargs = {}
+        for item in filters:
+            if item['filterType'] == 'PRICE_FILTER':
+                kwargs.update(tick_size=item['tickSize'], min_price=item.get('minPrice', '0'),
+                              max_price=item.get('maxPrice', '0'))
+            elif item['filterType'] == 'LOT_SIZE':
+                kwargs.update(step_size=item['stepSize'], min_qty=item.get('minQty', '0'),
+                              max_qty=item.get('maxQty', '0'))
+        return cls(**kwargs)
+
+    def round_price(self, price: float) -> str:
+        """
+        round the price to the nearest tick.
+        :return: the price string for the order.
+        """
+        return self.price_rule.format(self.price_rule.round(price))
+
+    def floor_qty(self, qty: float) -> str:
+        """
+        round the quantity down to the step.
+        :return: the quantity string for the order.
+        """
+        return self.qty_rule.format(self.qty_rule.floor(qty))
+
+    def round_prices(self, prices: np.ndarray) -> np.ndarray:
+        return self.price_rule.round_array(prices)
+
+    def floor_qtys(self, qtys: np.ndarray) -> np.ndarray:
+        return self.qty_rule.floor_array(qtys)
+
+    def is_valid_price(self, price) -> bool:
+        return self.price_rule.is_valid(price)
+
+    def is_valid_qty(self, qty) -> bool:
+        return self.qty_rule.is_valid(qty)
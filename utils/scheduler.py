@@ -0,0 +1,111 @@
+"""
+    The scheduler of the trading loop: start() runs when something may need an action, or heartbeat seconds after the
+    last loop finished, like the old loop sleeping between the loops.
+
+    the loop wakes up on:
+    1. order: the user data stream receives an order is filled or canceled.
+    2. signal: update_signals publishes a new signal_data.
+    3. ticker: a bookTicker from the ticker stream crosses a price where the rules of a position may change (the exit,
+    the stop loss, the increase, a new profit_max_price) or an open order's price. The trader sets the prices of
+    every symbol after start() with watch(), the ticker wakes up the loop only when the bid moves into another
+    range, not on every ticker.
+    4. heartbeat: nothing happened in the heartbeat seconds since the last loop finished, like the loop without the
+    streams.
+
+    the reaction latency (the seconds from the first event to the start of the next loop) is kept for every reason,
+    with event_driven=False the events are still recorded but only the heartbeat and the order updates wake up the
+    loop like the old loop did, so the latency of the fixed interval loop can be compared.
+
+        scheduler = LoopScheduler(heartbeat=10)
+        while True:
+            reasons, symbols = scheduler.wait()  # {'ticker'}, {'BTCUSDT'}
+            trader.start()
+            trader.watch_prices()
+"""
+
+import time
+from bisect import bisect_right
+from collections import deque
+from threading import Event, Lock
+from utils.metrics import metrics
+
+HEARTBEAT = 'heartbeat'
+ALWAYS_WAKE = {'order', 'stop'}  # the order updates woke up the old loop too, and the stop can't wait.
+
+
+class LoopScheduler(object):
+
+    def __init__(self, heartbeat: float = 10, event_driven: bool = True, min_interval: float = 0.1):
+        """
+        :param heartbeat: the seconds to wait after a loop when nothing happens.
+        :param event_driven: wake up on the events, false means only the heartbeat and the orders like the old loop.
+        :param min_interval: the min seconds between the loops, the events in the interval are handled together.
+        """
+        self.heartbeat = heartbeat
+        self.event_driven = event_driven
+        self.min_interval = min_interval
+        self.event = Event()
+        self.lock = Lock()
+        self.pending = {}  # {reason: the time of the first event since the last loop}
+        self.symbols = set()  # the symbols of the events since the last loop.
+        self.levels = {}  # {symbol: [the sorted prices]}
+        self.zones = {}  # {symbol: the index of the bid in the prices at the last loop}
+        self.last_run = 0.0
+        self.latencies = {}  # {reason: deque of the reaction seconds}
+
+    def wake(self, reason: str, symbol: str = None):
+        now = time.perf_counter()
+        with self.lock:
+            self.pending.setdefault(reason, now)
+            if symbol:
+                self.symbols.add(symbol)
+        if self.event_driven or reason in ALWAYS_WAKE:
+            self.event.set()
+
+    def on_ticker(self, symbol: str, bid_price: float, ask_price: float = None):
+        """
+        wake up the loop if the bid moves into another range of the symbol's prices.
+        """
+        levels = self.levels.get(symbol)
+        if levels and bisect_right(levels, bid_price) != self.zones.get(symbol):
+            self.wake('ticker', symbol)
+
+    def watch(self, symbol_levels: dict, tickers_dict: dict):
+        """
+        :param symbol_levels: {symbol: [prices]} where the actions of the symbol may change.
+        :param tickers_dict: the tickers start() used, the ranges are of the bid prices in them.
+        """
+        levels, zones = {}, {}
+        for symbol, prices in symbol_levels.items():
+            bid_price = tickers_dict.get(symbol, {}).get('bid_price', 0)
+            if prices and bid_price > 0:
+                levels[symbol] = sorted(prices)
+                zones[symbol] = bisect_right(levels[symbol], bid_price)
+        self.zones, self.levels = zones, levels
+
+    def wait(self):
+        """
+        block until an event or the heartbeat, call it after the loop finishes.
+        :return: (the reasons, the symbols) of the wakeup.
+        """
+        finish_time = time.perf_counter()
+        delay = self.last_run + self.min_interval - finish_time
+        if delay > 0:
+            time.sleep(delay)
+
+        timeout = max(finish_time + self.heartbeat - time.perf_counter(), 0)
+        self.event.wait(timeout)
+        self.event.clear()
+
+        now = time.perf_counter()
+        with self.lock:
+            pending, symbols = self.pending, self.symbols
+            self.pending, self.symbols = {}, set()
+        self.last_run = now
+
+        mode = 'event' if self.event_driven else 'interval'
+        for reason, first_time in pending.items():
+            latency = now - first_time
+            self.latencies.setdefault(reason, deque(maxlen=10000)).append(latency)
+            metrics.observe('reaction_seconds', latency, reason=reason, mode=mode)
+        return set(pending.keys()) or {HEARTBEAT}, symbols
@@ -0,0 +1,82 @@
+"""
+    Calculate the signals of all the symbols in one pass.
+
+    the klines of all the symbols are stacked into one numpy array (symbols x bars x fields), the last kline of a
+    symbol is always at the last bar, the symbols with less klines are padded with nan at the beginning.
+
+    the results are the same as resampling every symbol's 1h klines to 4h klines (in UTC+8) with pandas and reading
+    the last row.
+"""
+
+import numpy as np
+from utils.config import config
+
+# the fields of the stacked array.
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, TURNOVER = range(7)
+KLINE_COLUMNS = [0, 1, 2, 3, 4, 5, 7]  # the columns of a binance kline for the fields above.
+
+HOUR_MS = 3_600_000
+TIMEZONE_OFFSET_MS = 8 * HOUR_MS  # the 4h klines are resampled in UTC+8.
+
+
+def stack_klines(symbol_klines: list, bars: int = None):
+    """
+    :param symbol_klines: [(symbol, klines), ...], the klines are lists or float arrays, the symbols without klines
+    are skipped.
+    :param bars: how many klines we use for every symbol, default is the max length of the klines.
+    :return: (symbols, data), data is a numpy array of shape (len(symbols), bars, 7)
+    """
+    symbol_klines = [(symbol, klines) for symbol, klines in symbol_klines if len(klines) > 0]
+    if bars is None:
+        bars = max([len(klines) for _, klines in symbol_klines], default=0)
+
+    data = np.full((len(symbol_klines), bars, len(KLINE_COLUMNS)), np.nan, dtype=np.float64)
+    for i, (_, klines) in enumerate(symbol_klines):
+        klines = klines[-bars:]
+        if isinstance(klines, np.ndarray):
+            data[i, bars - len(klines):] = klines[:, KLINE_COLUMNS]  # decoded by gateway.decoders.decode_klines.
+        else:
+            data[i, bars - len(klines):] = np.array([[kline[c] for c in KLINE_COLUMNS] for kline in klines],
+                                                    dtype=np.float64)
+
+    return [symbol for symbol, _ in symbol_klines], data
+
+
+def calculate_signals(symbols: list, data: np.ndarray, rule_hours: int = 4):
+    """
+    calculate the pct, pct_4h, hour_turnover and the signal of every symbol.
+
+    :param symbols: the symbols of the data rows.
+    :param data: the array from stack_klines.
+    :param rule_hours: the hours of the resampled klines for pct_4h.
+    :return: the signals list, in the same order as the symbols.
+    """
+    if len(symbols) == 0:
+        return []
+
+    pct, pct_4h, turnover, signal = signal_arrays(data, rule_hours)
+    return [{'pct': pct[i], 'pct_4h': pct_4h[i], 'symbol': symbol, 'hour_turnover': turnover[i],
+             'signal': int(signal[i])} for i, symbol in enumerate(symbols)]
+
+
+def signal_arrays(data: np.ndarray, rule_hours: int = 4):
+    """
+    the signals of the last bar as arrays, the backtest calls it for every bar.
+    :return: (pct, pct_4h, hour_turnover, signal), the arrays in the order of the data rows.
+    """
+    last = data[:, -1]
+    pct = last[:, CLOSE] / last[:, OPEN] - 1
+
+    # the resampled kline containing the last kline starts at the first kline after the bucket start.
+    rule_ms = rule_hours * HOUR_MS
+    local_open_time = last[:, OPEN_TIME] + TIMEZONE_OFFSET_MS
+    bucket_start = local_open_time - local_open_time % rule_ms - TIMEZONE_OFFSET_MS
+    first_index = np.argmax(data[:, :, OPEN_TIME] >= bucket_start[:, None], axis=1)
+    bucket_open = data[np.arange(len(data)), first_index, OPEN]
+    pct_4h = last[:, CLOSE] / bucket_open - 1
+
+    # calculate your signal here, the signal 1 mean buy signal.
+    signal = np.where((pct >= config.pump_pct) | (pct_4h >= config.pump_pct_4h), 1,
+                      np.where((pct <= -config.pump_pct) | (pct_4h <= -config.pump_pct_4h), -1, 0))
+
+    return pct, pct_4h, last[:, TURNOVER], signal
@@ -0,0 +1,113 @@
+"""
+    The martingale rules shared by the traders and the backtest, so the backtest replays exactly what the traders do:
+
+    1. select_entries: which buy signals we enter, after the positions count and the allowed/blocked lists.
+    2. position_action: whether a position exits with profit, stops the loss or increases after the price drops,
+    trigger_prices: the bid prices where the action may change, the loop scheduler wakes up on them.
+    3. apply_trade: how a fill changes the position and the realized profit.
+"""
+
+from utils.config import config
+
+EXIT = 'exit'
+STOP_LOSS = 'stop_loss'
+INCREASE = 'increase'
+
+
+def select_entries(signals: list, pos_symbols, left_times: int):
+    """
+    :param signals: the signals sorted by pct, like signal_data['signals'].
+    :param pos_symbols: the symbols we have positions.
+    :param left_times: how many positions we can open.
+    :return: the signals we place the buy orders for.
+    """
+    entries = []
+    for signal in signals:
+        s = signal['symbol']
+        if len(entries) >= left_times:
+            break
+
+        if signal['signal'] == 1 and s not in pos_symbols and signal['hour_turnover'] >= config.turnover_threshold:
+            # allowed_lists and blocked_lists cannot be satisfied at the same time.
+            if len(config.allowed_lists) > 0:
+                if s in config.allowed_lists:
+                    entries.append(signal)
+            elif s not in config.blocked_lists:
+                entries.append(signal)
+    return entries
+
+
+def position_action(pos_data: dict, bid_price: float, buy_orders: int = 0, sell_orders: int = 0):
+    """
+    the action of the position at the bid price, after the profit_max_price is updated.
+    :param buy_orders: the open buy orders of the symbol.
+    :param sell_orders: the open sell orders of the symbol.
+    :return: EXIT, STOP_LOSS, INCREASE or None.
+    """
+    avg_price = pos_data.get('avg_price')
+    profit_pct = bid_price / avg_price - 1
+    drawdown_pct = pos_data.get('profit_max_price', 0) / bid_price - 1
+    dump_pct = pos_data.get('last_entry_price', 0) / bid_price - 1
+    current_increase_pos_count = pos_data.get('current_increase_pos_count', 1)
+    loss_pct = avg_price / bid_price - 1
+
+    # there is profit here, consider whether exit this position.
+    if profit_pct >= config.exit_profit_pct and drawdown_pct >= config.profit_drawdown_pct and sell_orders <= 0:
+        return EXIT
+    elif loss_pct >= config.stop_loss_pct > 0 and sell_orders <= 0:
+        return STOP_LOSS
+    elif dump_pct >= config.increase_pos_when_drop_down and buy_orders <= 0 and \
+            current_increase_pos_count <= config.max_increase_pos_count:
+        return INCREASE
+    return None
+
+
+def trigger_prices(pos_data: dict, buy_orders: int = 0, sell_orders: int = 0):
+    """
+    the bid prices where position_action of the position may change, the action is the same between two prices.
+    a new profit_max_price only matters over the exit price, the drawdown of a lower one never exits.
+    :return: the sorted prices.
+    """
+    avg_price = pos_data.get('avg_price', 0)
+    profit_max_price = pos_data.get('profit_max_price', 0)
+    prices = []
+    if avg_price > 0 and sell_orders <= 0:
+        exit_price = avg_price * (1 + config.exit_profit_pct)
+        prices.append(exit_price)
+        if profit_max_price >= exit_price:
+            prices.extend([profit_max_price, profit_max_price / (1 + config.profit_drawdown_pct)])
+        if config.stop_loss_pct > 0:
+            prices.append(avg_price / (1 + config.stop_loss_pct))
+    if buy_orders <= 0 and pos_data.get('current_increase_pos_count', 1) <= config.max_increase_pos_count:
+        prices.append(pos_data.get('last_entry_price', 0) / (1 + config.increase_pos_when_drop_down))
+    return sorted(price for price in prices if price > 0)
+
+
+def increase_value(current_increase_pos_count: int):
+    """
+    the value of the buy order when we increase the position.
+    """
+    return config.initial_trade_value * config.trade_value_multiplier ** current_increase_pos_count
+
+
+def new_position(symbol: str):
+    return {'symbol': symbol, 'pos': 0, 'avg_price': 0, 'last_entry_price': 0, 'current_increase_pos_count': 0,
+            'profit_max_price': 0}
+
+
+def apply_trade(pos: dict, trade_amount: float, trade_price: float, is_buy: bool):
+    """
+    update the position with the fill, the fee of both the buy and the sell is charged when selling.
+    :return: the realized profit.
+    """
+    if is_buy:
+        pos['current_increase_pos_count'] = pos['current_increase_pos_count'] + 1
+        pos['avg_price'] = (trade_amount * trade_price + pos['avg_price'] * pos['pos']) / (
+                trade_amount + pos['pos'])
+        pos['pos'] = trade_amount + pos['pos']
+        pos['last_entry_price'] = trade_price
+        return 0
+
+    profit = (trade_price - pos['avg_price']) * trade_amount - 2 * trade_amount * trade_price * config.trading_fee
+    pos['pos'] = pos['pos'] - trade_amount
+    return profit
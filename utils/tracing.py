@@ -0,0 +1,239 @@
+"""
+    The signal to order traces: how long a signal takes from the kline fetch to the fill of its entry order.
+
+    every entry signal (signal == 1) of a scan is a trace with the id '{signal id}-{symbol}', the events are stamped
+    with time.time() by the threads they happen in:
+
+    1. scan: get_data starts to fetch the klines.
+    2. klines: all the klines are fetched.
+    3. signal: update_signals publishes the signals in signal_data.
+    4. pickup: start() sees the new signal_data['id'].
+    5. order_request: place_order sends the buy order.
+    6. ack: the exchange returns the order, exchange_ack is the order's updateTime on the exchange.
+    7. fill: start() finds the order filled, exchange_fill is the order's updateTime on the exchange.
+
+    a trace ends as filled, canceled, order_failed, skipped (picked up but not entered, like max_pairs is reached)
+    or missed (the next scan comes before start() picks it up), then it's appended to the jsonl file with the
+    seconds of every stage. The tracer is off by default, turn it on with config.trace_file.
+
+    with the AccountHost every account has its own trace of a signal, the id is '{account}:{signal id}-{symbol}'.
+
+        tracer.enable('traces.jsonl')
+        python -m utils.tracing trader/traces.jsonl  # the latency percentiles of every stage.
+"""
+
+import sys
+import json
+import time
+from threading import Lock
+from utils.utility import get_file_path
+
+EVENTS = ['scan', 'klines', 'signal', 'pickup', 'order_request', 'ack', 'fill']
+
+# the stage: (from event, to event)
+STAGES = {
+    'fetch_klines': ('scan', 'klines'),
+    'signals': ('klines', 'signal'),
+    'pickup': ('signal', 'pickup'),
+    'order_request': ('pickup', 'order_request'),
+    'ack': ('order_request', 'ack'),
+    'fill': ('ack', 'fill'),
+    'entry': ('signal', 'ack'),  # the signal to the order on the exchange.
+    'total': ('scan', 'fill'),
+}
+
+
+class Tracer(object):
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.lock = Lock()
+        self.scan_events = {}  # the events of the running scan, {'scan': t, 'klines': t}
+        self.traces = {}  # {trace_id: trace}
+        self.orders = {}  # {(account, clientOrderId): trace_id}
+        self.accounts = ['']  # the names of the AccountHost's accounts, '' is the single account.
+
+    def enable(self, file_name: str):
+        """
+        :param file_name: the jsonl file in the trader folder.
+        """
+        self.path = get_file_path(file_name)
+        self.enabled = True
+
+    @staticmethod
+    def trace_id(signal_id: int, symbol: str, account: str = ''):
+        return f"{account}:{signal_id}-{symbol}" if account else f"{signal_id}-{symbol}"
+
+    def mark_scan(self, event: str):
+        if self.enabled:
+            self.scan_events[event] = time.time()
+
+    def emit(self, signal_id: int, signals: list):
+        """
+        start the traces of the entry signals, the traces of the older signals never picked up are missed.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock:
+            for trace_id, trace in list(self.traces.items()):
+                if trace['signal_id'] < signal_id and 'pickup' not in trace['events']:
+                    self.finish(trace_id, 'missed')
+
+            for signal in signals:
+                if signal.get('signal') != 1:
+                    continue
+                for account in self.accounts:
+                    trace_id = self.trace_id(signal_id, signal['symbol'], account)
+                    events = dict(self.scan_events, signal=now)
+                    self.traces[trace_id] = {'trace_id': trace_id, 'signal_id': signal_id, 'symbol': signal['symbol'],
+                                             'pct': signal.get('pct'), 'pct_4h': signal.get('pct_4h'),
+                                             'events': events}
+                    if account:
+                        self.traces[trace_id]['account'] = account
+        self.scan_events = {}
+
+    def pickup(self, signal_id: int, account: str = ''):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock:
+            for trace in self.traces.values():
+                if trace['signal_id'] == signal_id and trace.get('account', '') == account:
+                    trace['events'].setdefault('pickup', now)
+
+    def order_request(self, signal_id: int, symbol: str, account: str = ''):
+        if not self.enabled:
+            return
+        with self.lock:
+            trace = self.traces.get(self.trace_id(signal_id, symbol, account))
+            if trace:
+                trace['events']['order_request'] = time.time()
+
+    def order_ack(self, signal_id: int, symbol: str, order: dict, account: str = ''):
+        """
+        :param order: the result of place_order, None means failed.
+        :param account: the account name of the trader, '' is the single account.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        trace_id = self.trace_id(signal_id, symbol, account)
+        with self.lock:
+            trace = self.traces.get(trace_id)
+            if trace is None:
+                return
+            if not order:
+                self.finish(trace_id, 'order_failed')
+                return
+
+            trace['events']['ack'] = now
+            trace['client_order_id'] = order.get('clientOrderId')
+            if order.get('updateTime'):
+                trace['exchange_ack'] = order['updateTime'] / 1000
+            self.orders[(account, order.get('clientOrderId'))] = trace_id
+
+    def close_signal(self, signal_id: int, account: str = ''):
+        """
+        the entries of the signal are placed by the account, its traces without an order are skipped.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            for trace_id, trace in list(self.traces.items()):
+                if trace['signal_id'] == signal_id and trace.get('account', '') == account and \
+                        'order_request' not in trace['events']:
+                    self.finish(trace_id, 'skipped')
+
+    def finish_order(self, client_order_id: str, outcome: str, order: dict = None, account: str = ''):
+        """
+        end the trace of the entry order, the other orders are ignored.
+        :param outcome: 'filled' or 'canceled'.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock:
+            trace_id = self.orders.pop((account, client_order_id), None)
+            trace = self.traces.get(trace_id)
+            if trace is None:
+                return
+            if outcome == 'filled':
+                trace['events']['fill'] = now
+                if order and order.get('updateTime'):
+                    trace['exchange_fill'] = order['updateTime'] / 1000
+            self.finish(trace_id, outcome)
+
+    def finish(self, trace_id: str, outcome: str):
+        """
+        append the trace to the file, call it with the lock.
+        """
+        trace = self.traces.pop(trace_id)
+        self.orders.pop((trace.get('account', ''), trace.get('client_order_id')), None)
+        trace['outcome'] = outcome
+        trace['stages'] = stage_seconds(trace['events'])
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trace) + '\n')
+        except OSError as error:
+            print(f"保存trace失败: {error}")
+
+
+def stage_seconds(events: dict):
+    """
+    :return: {stage: seconds} of the stages whose both events happened.
+    """
+    return {stage: round(events[end] - events[start], 6) for stage, (start, end) in STAGES.items() if
+            start in events and end in events}
+
+
+def load_traces(path):
+    traces = []
+    with open(path) as f:
+        for line in f:
+            try:
+                traces.append(json.loads(line))
+            except ValueError:
+                continue  # the last line may be cut.
+    return traces
+
+
+def percentile(values: list, pct: float):
+    values = sorted(values)
+    return values[min(int(len(values) * pct), len(values) - 1)]
+
+
+def summary(traces: list):
+    """
+    :return: {stage: {'count', 'p50', 'p90', 'p99', 'max'}} and {outcome: count}.
+    """
+    stages, outcomes = {}, {}
+    for trace in traces:
+        outcomes[trace['outcome']] = outcomes.get(trace['outcome'], 0) + 1
+        for stage, seconds in trace.get('stages', {}).items():
+            stages.setdefault(stage, []).append(seconds)
+
+    result = {}
+    for stage in STAGES:
+        values = stages.get(stage)
+        if values:
+            result[stage] = {'count': len(values), 'p50': percentile(values, 0.5), 'p90': percentile(values, 0.9),
+                             'p99': percentile(values, 0.99), 'max': max(values)}
+    return result, outcomes
+
+
+tracer = Tracer()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("usage: python -m utils.tracing trader/traces.jsonl")
+        sys.exit(1)
+
+    stages, outcomes = summary(load_traces(sys.argv[1]))
+    print(', '.join(f"{outcome}: {count}" for outcome, count in outcomes.items()))
+    print(f"{'stage':<15} {'count':>7} {'p50(s)':>10} {'p90(s)':>10} {'p99(s)':>10} {'max(s)':>10}")
+    for stage, item in stages.items():
+        print(f"{stage:<15} {item['count']:>7} {item['p50']:>10.4f} {item['p90']:>10.4f} {item['p99']:>10.4f} "
+              f"{item['max']:>10.4f}")
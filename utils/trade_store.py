@@ -0,0 +1,250 @@
+"""
+    The trade history in a sqlite database in the trader folder, next to the positions json file.
+
+    the positions json file only keeps the current positions and the total profit, the store keeps:
+    1. fills: every fill with its realized pnl.
+    2. orders: the latest status of every order.
+    3. position_snapshots: the position after every change.
+    4. cycles: a position from the first buy to the last sell, with its holding time, realized pnl and the max
+    increase_pos_count (the martingale depth) reached.
+
+    the trading loop only puts the records in a queue, a writer thread writes them in one transaction every
+    flush_interval seconds. The queries open their own connection, the database is in the WAL mode so they don't
+    block the writer.
+
+        store = TradeStore('future_trades.db')
+        positions = Positions('future_positions.json', store=store)
+        store.flush()
+        store.realized_pnl()  # {'BTCUSDT': 12.3, ...}
+"""
+
+import time
+import atexit
+import sqlite3
+from queue import Queue, Empty
+from threading import Thread, Lock
+from utils.utility import get_file_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles (
+    id INTEGER PRIMARY KEY, symbol TEXT NOT NULL, open_time REAL NOT NULL, close_time REAL,
+    max_increase_pos_count INTEGER NOT NULL DEFAULT 0, realized_pnl REAL NOT NULL DEFAULT 0);
+CREATE INDEX IF NOT EXISTS cycles_symbol ON cycles (symbol, close_time);
+
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY, time REAL NOT NULL, symbol TEXT NOT NULL, side TEXT NOT NULL, price REAL NOT NULL,
+    qty REAL NOT NULL, realized_pnl REAL NOT NULL, client_order_id TEXT, cycle_id INTEGER);
+CREATE INDEX IF NOT EXISTS fills_symbol ON fills (symbol, time, realized_pnl);
+
+CREATE TABLE IF NOT EXISTS orders (
+    client_order_id TEXT PRIMARY KEY, symbol TEXT NOT NULL, side TEXT, type TEXT, price REAL, orig_qty REAL,
+    executed_qty REAL, status TEXT, update_time INTEGER);
+CREATE INDEX IF NOT EXISTS orders_symbol ON orders (symbol, update_time);
+
+CREATE TABLE IF NOT EXISTS position_snapshots (
+    id INTEGER PRIMARY KEY, time REAL NOT NULL, symbol TEXT NOT NULL, pos REAL NOT NULL, avg_price REAL NOT NULL,
+    current_increase_pos_count INTEGER NOT NULL, total_profit REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS position_snapshots_symbol ON position_snapshots (symbol, time);
+"""
+
+FINAL_STATUS = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED')
+
+
+class TradeStore(object):
+
+    def __init__(self, file_name='trades.db', flush_interval=1.0):
+        """
+        :param file_name: the database file name in the trader folder.
+        :param flush_interval: the seconds the writer thread collects the records before writing them.
+        """
+        self.file_path = str(get_file_path(file_name))
+        self.flush_interval = flush_interval
+        self.queue = Queue()
+        self.order_status = {}  # {client_order_id: (status, executedQty)} the orders recorded and not final yet.
+        self.lock = Lock()
+
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self.running = True
+        self.writer = Thread(target=self._write, daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)  # write the records in the queue before the process exits.
+
+    def connect(self):
+        return sqlite3.connect(self.file_path, timeout=30)
+
+    ########################### the records, called by the trading loop ########################
+
+    def record_position(self, symbol: str, pos, total_profit: float, fill: dict = None):
+        """
+        record the position after a change.
+        :param pos: the position dict of Positions, None means the position is closed.
+        :param fill: {'side': 'BUY', 'price': 1.0, 'qty': 1.0, 'realized_pnl': 0, 'client_order_id': ''}, None if the
+        position changed without a fill.
+        """
+        self.queue.put(('position', time.time(), symbol, dict(pos) if pos else None, total_profit, fill))
+
+    def record_order(self, order: dict):
+        """
+        record the order if its status or executed quantity changed since the last record.
+        :param order: the order in the format of get_order.
+        """
+        client_order_id = order.get('clientOrderId')
+        if not client_order_id or not order.get('symbol'):
+            return
+
+        state = (order.get('status'), order.get('executedQty'))
+        with self.lock:
+            if self.order_status.get(client_order_id) == state:
+                return
+            if state[0] in FINAL_STATUS:
+                self.order_status.pop(client_order_id, None)
+            else:
+                self.order_status[client_order_id] = state
+        self.queue.put(('order', dict(order)))
+
+    def sync_positions(self, positions: dict, total_profit: float):
+        """
+        open a cycle for the positions of the json file which have no open cycle, and close the open cycles of the
+        symbols without position, to start the store with an existing positions file.
+        """
+        self.queue.put(('sync', time.time(), {symbol: dict(pos) for symbol, pos in positions.items()}, total_profit))
+
+    def flush(self):
+        """
+        wait until all the records are written.
+        """
+        self.queue.join()
+
+    def close(self):
+        self.flush()
+        self.running = False
+        self.writer.join()
+        atexit.unregister(self.flush)
+
+    ########################### the writer thread ########################
+
+    def _write(self):
+        connection = self.connect()
+        open_cycles = dict(connection.execute("SELECT symbol, id FROM cycles WHERE close_time IS NULL").fetchall())
+
+        while self.running:
+            try:
+                records = [self.queue.get(timeout=0.1)]
+            except Empty:
+                continue
+
+            # collect the records of flush_interval seconds and write them in one transaction.
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                try:
+                    records.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except Empty:
+                    break
+
+            try:
+                with connection:
+                    for record in records:
+                        if record[0] == 'position':
+                            self._write_position(connection, open_cycles, *record[1:])
+                        elif record[0] == 'order':
+                            self._write_order(connection, record[1])
+                        else:
+                            self._write_sync(connection, open_cycles, *record[1:])
+            except Exception as error:
+                print(f"写入交易记录发生了错误: {error}")
+                open_cycles = dict(connection.execute(
+                    "SELECT symbol, id FROM cycles WHERE close_time IS NULL").fetchall())
+            finally:
+                for _ in records:
+                    self.queue.task_done()
+
+        connection.close()
+
+    def _write_position(self, connection, open_cycles: dict, record_time: float, symbol: str, pos, total_profit: float,
+                        fill: dict):
+        cycle_id = open_cycles.get(symbol)
+        depth = pos['current_increase_pos_count'] if pos else 0
+        if cycle_id is None and pos:
+            cycle_id = connection.execute("INSERT INTO cycles (symbol, open_time) VALUES (?, ?)",
+                                          (symbol, record_time)).lastrowid
+            open_cycles[symbol] = cycle_id
+
+        if fill:
+            connection.execute("INSERT INTO fills (time, symbol, side, price, qty, realized_pnl, client_order_id, "
+                               "cycle_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (record_time, symbol, fill['side'], fill['price'], fill['qty'], fill['realized_pnl'],
+                                fill.get('client_order_id', ''), cycle_id))
+
+        if cycle_id is not None:
+            connection.execute("UPDATE cycles SET max_increase_pos_count = MAX(max_increase_pos_count, ?), "
+                               "realized_pnl = realized_pnl + ?, close_time = ? WHERE id = ?",
+                               (depth, fill['realized_pnl'] if fill else 0, None if pos else record_time, cycle_id))
+            if not pos:
+                del open_cycles[symbol]
+
+        connection.execute("INSERT INTO position_snapshots (time, symbol, pos, avg_price, current_increase_pos_count, "
+                           "total_profit) VALUES (?, ?, ?, ?, ?, ?)",
+                           (record_time, symbol, pos['pos'] if pos else 0, pos['avg_price'] if pos else 0, depth,
+                            total_profit))
+
+    def _write_order(self, connection, order: dict):
+        connection.execute("INSERT OR REPLACE INTO orders (client_order_id, symbol, side, type, price, orig_qty, "
+                           "executed_qty, status, update_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (order.get('clientOrderId'), order.get('symbol'), order.get('side'), order.get('type'),
+                            float(order.get('price') or 0), float(order.get('origQty') or 0),
+                            float(order.get('executedQty') or 0), order.get('status'),
+                            order.get('updateTime') or order.get('transactTime')))
+
+    def _write_sync(self, connection, open_cycles: dict, record_time: float, positions: dict, total_profit: float):
+        for symbol in list(open_cycles.keys()):
+            if symbol not in positions:
+                self._write_position(connection, open_cycles, record_time, symbol, None, total_profit, None)
+        for symbol, pos in positions.items():
+            if symbol not in open_cycles:
+                self._write_position(connection, open_cycles, record_time, symbol, pos, total_profit, None)
+
+    ########################### the queries ########################
+
+    def query(self, sql: str, params=()):
+        with self.connect() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def _where_symbol(self, symbol: str, condition: str = ""):
+        conditions = [condition] if condition else []
+        if symbol:
+            conditions.append("symbol = ?")
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", (symbol,) if symbol else ()
+
+    def realized_pnl(self, symbol: str = ""):
+        """
+        the realized pnl of every symbol.
+        :return: {symbol: pnl}
+        """
+        where, params = self._where_symbol(symbol)
+        return dict(self.query(f"SELECT symbol, SUM(realized_pnl) FROM fills{where} GROUP BY symbol", params))
+
+    def holding_time(self, symbol: str = ""):
+        """
+        the holding seconds of the closed cycles of every symbol.
+        :return: {symbol: {'cycles': 3, 'avg_seconds': 3600.0, 'max_seconds': 7200.0}}
+        """
+        where, params = self._where_symbol(symbol, "close_time IS NOT NULL")
+        rows = self.query(f"SELECT symbol, COUNT(*), AVG(close_time - open_time), MAX(close_time - open_time) "
+                          f"FROM cycles{where} GROUP BY symbol", params)
+        return {row[0]: {'cycles': row[1], 'avg_seconds': row[2], 'max_seconds': row[3]} for row in rows}
+
+    def martingale_depth(self, symbol: str = ""):
+        """
+        the max increase_pos_count reached by the cycles of every symbol, and how many cycles reached every depth.
+        :return: {symbol: {'max': 3, 'cycles': {1: 10, 2: 4, 3: 1}}}
+        """
+        where, params = self._where_symbol(symbol)
+        depths = {}
+        for symbol, depth, count in self.query(f"SELECT symbol, max_increase_pos_count, COUNT(*) FROM cycles{where} "
+                                               f"GROUP BY symbol, max_increase_pos_count", params):
+            item = depths.setdefault(symbol, {'max': 0, 'cycles': {}})
+            item['max'] = max(item['max'], depth)
+            item['cycles'][depth] = count
+        return depths
@@ -78,15 +78,18 @@ def load_json(filename: str):
 def save_json(filename: str, data: dict):
     """
     Save data into json file in temp path.
+    the data is written to a temp file and renamed, so a crash never leaves a truncated file.
     """
     filepath = get_file_path(filename)
-    with open(filepath, mode="w+", encoding="UTF-8") as f:
+    temp_path = filepath.with_name(filepath.name + '.tmp')
+    with open(temp_path, mode="w+", encoding="UTF-8") as f:
         json.dump(
             data,
             f,
             indent=4,
             ensure_ascii=False
         )
+    temp_path.replace(filepath)
 
 
 def round_to(value: float, target: float) -> Decimal: